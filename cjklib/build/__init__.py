@@ -23,9 +23,26 @@ __all__ = ["DatabaseBuilder"]
 
 import types
 import locale
+try:
+    from hashlib import sha1
+except ImportError:
+    # Python 2.4 support
+    from sha import new as sha1
 import sys
 import os.path
-
+import time
+import Queue
+import shutil
+import tempfile
+import traceback
+try:
+    import multiprocessing
+except ImportError:
+    # Python 2.5 and earlier, no parallel builds
+    multiprocessing = None
+
+from sqlalchemy import Table, Column, String
+from sqlalchemy.sql import text, select
 from sqlalchemy.exceptions import OperationalError
 
 from cjklib import dbconnector
@@ -40,6 +57,16 @@ class DatabaseBuilder:
     It contains all :class:`~cjklib.build.builder.TableBuilder` classes and a
     dependency graph to handle build requests.
     """
+    MANIFEST_TABLE = 'BuildManifest'
+    """Table storing fingerprints of built tables."""
+    FINGERPRINT_IGNORE_OPTIONS = frozenset(['dataPath', 'filePath', 'quiet',
+        'batchSize'])
+    """Builder options that do not influence the content of a table."""
+    BULK_LOAD_PRAGMAS = [('main.synchronous', 'OFF'),
+        ('main.journal_mode', 'MEMORY'), ('main.cache_size', '-262144'),
+        ('temp_store', 'MEMORY')]
+    """SQLite settings used for bulk loading."""
+
     def __init__(self, **options):
         """
         To modify the behaviour of :class:`~cjklib.build.builder.TableBuilder`
@@ -62,8 +89,22 @@ class DatabaseBuilder:
         :keyword prefer: list of :class:`~cjklib.build.builder.TableBuilder`
             names to prefer in conflicting cases
         :keyword additionalBuilders: list of externally provided TableBuilders
+        :keyword jobs: number of builders run in parallel, only supported for
+            SQLite databases stored in a file and Python 2.6 or newer
+        :keyword incremental: if ``True`` existing tables will be rebuilt if
+            their source files, builder or options changed since the last
+            incremental build. Built tables are recorded in table
+            ``BuildManifest``.
+        :keyword bulkLoad: if ``True`` SQLite databases are built with
+            settings favouring speed over durability, see
+            :attr:`~cjklib.build.DatabaseBuilder.BULK_LOAD_PRAGMAS`. The
+            database might get corrupted if the build is interrupted by a
+            crash.
         :raise ValueError: if two different options from two different builder
             collide.
+
+        .. versionadded:: 0.3.1
+           Options ``jobs``, ``incremental`` and ``bulkLoad``.
         """
         if 'dataPath' not in options:
             # look for data underneath the build module
@@ -85,6 +126,15 @@ class DatabaseBuilder:
         """Controls if existing tables will be rebuilt."""
         self.noFail = options.pop('noFail', False)
         """Controls if build process terminate on failed tables."""
+        self.jobs = options.pop('jobs', 1)
+        """Number of builders run in parallel."""
+        self.incremental = options.pop('incremental', False)
+        """Controls if existing tables will be rebuilt if outdated."""
+        self.bulkLoad = options.pop('bulkLoad', False)
+        """Controls if SQLite databases are built with bulk load settings."""
+        self.buildStatistics = []
+        """Statistics of tables built by the last build call."""
+        self._sourceHashes = {}
         # get connector to database
         databaseUrl = options.pop('databaseUrl', None)
         if 'dbConnectInst' in options:
@@ -226,8 +276,11 @@ class DatabaseBuilder:
 
             if self.needsRebuild(table):
                 filteredTables.append(table)
-            else:
-                if not self.quiet:
+            elif not self.quiet:
+                if self.incremental and self.db.mainHasTable(table):
+                    warn("Skipping table '%s' because it is up to date" \
+                        % table)
+                else:
                     warn("Skipping table '%s' because it already exists" \
                         % table)
         tables = filteredTables
@@ -260,72 +313,508 @@ class DatabaseBuilder:
         # build tables
         if not self.quiet and self.rebuildExisting:
             warn("Rebuilding tables and overwriting old ones...")
-        builderClasses.reverse()
+        self.buildStatistics = []
         self._instancesUnrequestedTable = set()
+        if self.bulkLoad and self.db.engine.name == 'sqlite':
+            previousSettings = self._setPragmas(self.db,
+                self.BULK_LOAD_PRAGMAS)
+        else:
+            previousSettings = []
+        try:
+            if self._canBuildParallel() and len(builderClasses) > 1:
+                self._buildParallel(builderClasses, buildDependentTables)
+            else:
+                self._buildSerial(builderClasses, buildDependentTables)
+        finally:
+            self._setPragmas(self.db, previousSettings)
+
+    @staticmethod
+    def _setPragmas(db, pragmas):
+        """
+        Changes settings of a SQLite database.
+
+        :type db: instance
+        :param db: :class:`~cjklib.dbconnector.DatabaseConnector` instance
+        :type pragmas: list of tuple
+        :param pragmas: pairs of pragma name and value
+        :rtype: list of tuple
+        :return: pairs of pragma name and previous value
+        """
+        previousSettings = []
+        for pragma, value in pragmas:
+            previousSettings.append((pragma,
+                db.selectScalar(text("PRAGMA %s" % pragma))))
+            db.execute(text("PRAGMA %s = %s" % (pragma, value)))
+        return previousSettings
+
+    def _buildSerial(self, builderClasses, buildDependentTables):
+        """
+        Builds the given tables one after another.
+
+        :type builderClasses: list of classobj
+        :param builderClasses: :class:`~cjklib.build.builder.TableBuilder`
+            classes in build order
+        """
+        builderClasses = builderClasses[::-1]
         while builderClasses:
             builder = builderClasses.pop()
 
-            transaction = self.db.connection.begin()
-
             try:
-                # get specific options given to the DatabaseBuilder
-                options = self.getBuilderOptions(builder, ignoreUnknown=True)
-                options['dbConnectInst'] = self.db
-                instance = builder(**options)
-                # mark tables as deletable if its only provided because of
-                #   dependencies and the table doesn't exists yet
-                if builder.PROVIDES in buildDependentTables \
-                    and not self.db.mainHasTable(builder.PROVIDES):
-                    self._instancesUnrequestedTable.add(instance)
-
-                if self.db.mainHasTable(builder.PROVIDES):
-                    # will only remove the table if found in the main database
-                    if not self.quiet:
-                        warn("Removing previously built table '%s'"
-                            % builder.PROVIDES)
-                    instance.remove()
-
+                startTime = time.time()
+                startPeakMemory = self._getPeakMemory()
+                instance = self._replaceTable(builder, buildDependentTables)
+                buildTime = time.time() - startTime
+                self._addBuildStatistics(builder, buildTime,
+                    instance.phaseTimes,
+                    self._getPeakMemoryIncrease(startPeakMemory))
                 if not self.quiet:
-                    warn("Building table '%s' with builder '%s'..."
-                        % (builder.PROVIDES, builder.__name__))
-
-                # remove old metadata
-                if builder.PROVIDES in self.db.tables:
-                    del self.db.tables[builder.PROVIDES]
-
-                instance.build()
-                transaction.commit()
+                    warn("Built table '%s' in %.2fs"
+                        % (builder.PROVIDES, buildTime))
             except IOError, e:
-                transaction.rollback()
                 # data not available, can't build table
                 if self.noFail:
                     if not self.quiet:
                         warn("Building table '%s' failed: '%s', skipping" \
                             % (builder.PROVIDES, str(e)))
-                    dependingTables = [builder.PROVIDES]
-                    remainingBuilderClasses = []
-                    for clss in builderClasses:
-                        if set(clss.DEPENDS) & set(dependingTables):
-                            # this class depends on one being removed
-                            dependingTables.append(clss.PROVIDES)
-                        else:
-                            remainingBuilderClasses.append(clss)
-                    if not self.quiet and len(dependingTables) > 1:
-                        warn("Ignoring depending table(s) '%s'" \
-                            % "', '".join(dependingTables[1:]))
-                    builderClasses = remainingBuilderClasses
+                    builderClasses = self._removeDependingBuilders(
+                        builder.PROVIDES, builderClasses)
                 else:
                     if not self.quiet: warn("Error")
                     self.clearTemporary()
                     raise
             except Exception, e:
-                transaction.rollback()
                 if not self.quiet: warn("Error")
                 self.clearTemporary()
                 raise
 
         self.clearTemporary()
 
+    def _replaceTable(self, builder, buildDependentTables, buildFunc=None):
+        """
+        Builds the table of the given builder inside a transaction, replacing
+        a previously built one.
+
+        :type builder: classobj
+        :param builder: :class:`~cjklib.build.builder.TableBuilder` class
+        :type buildFunc: function
+        :param buildFunc: function called with the builder instance to fill
+            the table, defaults to calling its ``build()`` method
+        :rtype: instance
+        :return: :class:`~cjklib.build.builder.TableBuilder` instance
+        """
+        transaction = self.db.connection.begin()
+
+        try:
+            # get specific options given to the DatabaseBuilder
+            options = self.getBuilderOptions(builder, ignoreUnknown=True)
+            options['dbConnectInst'] = self.db
+            instance = builder(**options)
+            # mark tables as deletable if its only provided because of
+            #   dependencies and the table doesn't exists yet
+            if builder.PROVIDES in buildDependentTables \
+                and not self.db.mainHasTable(builder.PROVIDES):
+                self._instancesUnrequestedTable.add(instance)
+
+            if self.db.mainHasTable(builder.PROVIDES):
+                # will only remove the table if found in the main database
+                if not self.quiet:
+                    warn("Removing previously built table '%s'"
+                        % builder.PROVIDES)
+                instance.remove()
+
+            # remove old metadata
+            if builder.PROVIDES in self.db.tables:
+                del self.db.tables[builder.PROVIDES]
+            self.db.clearStatementCache()
+
+            if buildFunc:
+                buildFunc(instance)
+            else:
+                if not self.quiet:
+                    warn("Building table '%s' with builder '%s'..."
+                        % (builder.PROVIDES, builder.__name__))
+                instance.build()
+            if self.incremental:
+                self._updateManifest(builder)
+            else:
+                # an earlier record doesn't describe the new table
+                self._removeFromManifest([builder.PROVIDES])
+            transaction.commit()
+        except:
+            transaction.rollback()
+            raise
+
+        return instance
+
+    def _addBuildStatistics(self, builder, buildTime, phaseTimes,
+        peakMemoryIncrease):
+        """
+        Records statistics of a newly built table in
+        :attr:`~cjklib.build.DatabaseBuilder.buildStatistics`.
+
+        :type builder: classobj
+        :param builder: :class:`~cjklib.build.builder.TableBuilder` class
+        :type buildTime: float
+        :param buildTime: seconds needed to build the table
+        :type phaseTimes: dict
+        :param phaseTimes: seconds spent in the phases of the build
+        :type peakMemoryIncrease: int
+        :param peakMemoryIncrease: increase of the peak resident memory of the
+            building process in KiB, ``None`` if unknown
+        """
+        preparer = self.db.engine.dialect.identifier_preparer
+        try:
+            rowCount = self.db.selectScalar(text("SELECT count(*) FROM %s"
+                % preparer.quote_identifier(builder.PROVIDES)))
+        except OperationalError:
+            rowCount = None
+
+        if rowCount is not None and buildTime > 0:
+            rowsPerSecond = rowCount / buildTime
+        else:
+            rowsPerSecond = None
+
+        self.buildStatistics.append({'table': builder.PROVIDES,
+            'builder': builder.__name__, 'rows': rowCount,
+            'seconds': buildTime, 'rowsPerSecond': rowsPerSecond,
+            'phases': dict(phaseTimes),
+            'peakMemoryIncrease': peakMemoryIncrease})
+
+    @staticmethod
+    def _getPeakMemory():
+        """
+        Gets the peak resident memory of the current process.
+
+        :rtype: int
+        :return: peak memory in KiB, ``None`` if unsupported on this platform
+        """
+        try:
+            import resource
+        except ImportError:
+            return None
+        peakMemory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            # given in bytes
+            peakMemory = peakMemory // 1024
+        return peakMemory
+
+    def _getPeakMemoryIncrease(self, startPeakMemory):
+        """
+        Gets the increase of the peak resident memory of the current process
+        since the given peak was measured.
+
+        :type startPeakMemory: int
+        :param startPeakMemory: earlier peak memory in KiB
+        :rtype: int
+        :return: increase in KiB, ``None`` if unsupported on this platform
+        """
+        peakMemory = self._getPeakMemory()
+        if peakMemory is None or startPeakMemory is None:
+            return None
+        return peakMemory - startPeakMemory
+
+    def getBuildStatistics(self):
+        """
+        Gets statistics on the tables built by the last call to
+        :meth:`~cjklib.build.DatabaseBuilder.build` in build order. Each
+        table is described by a dictionary with keys ``'table'``,
+        ``'builder'``, ``'rows'``, ``'seconds'``, ``'rowsPerSecond'``,
+        ``'phases'`` giving the seconds spent per build phase, and
+        ``'peakMemoryIncrease'`` giving the KiB by which the peak resident
+        memory of the building process grew while building the table. The
+        latter is ``0`` for a table built within the memory already used
+        before, e.g. for a table built after a larger one in the same process.
+        Unknown values are ``None``.
+
+        .. versionadded:: 0.3.1
+
+        :rtype: list of dict
+        :return: build statistics per table
+        """
+        return self.buildStatistics[:]
+
+    def _removeDependingBuilders(self, tableName, builderClasses):
+        """
+        Removes builders depending on the given table, e.g. after it failed to
+        build.
+
+        :type tableName: str
+        :param tableName: name of table
+        :type builderClasses: list of classobj
+        :param builderClasses: :class:`~cjklib.build.builder.TableBuilder`
+            classes
+        :rtype: list of classobj
+        :return: builders not depending on the given table
+        """
+        dependingTables = [tableName]
+        remainingBuilderClasses = []
+        for clss in builderClasses:
+            if set(clss.DEPENDS) & set(dependingTables):
+                # this class depends on one being removed
+                dependingTables.append(clss.PROVIDES)
+            else:
+                remainingBuilderClasses.append(clss)
+        if not self.quiet and len(dependingTables) > 1:
+            warn("Ignoring depending table(s) '%s'" \
+                % "', '".join(dependingTables[1:]))
+        return remainingBuilderClasses
+
+    def _canBuildParallel(self):
+        """
+        Checks if builders can be run in parallel for the current database.
+
+        :rtype: bool
+        :return: ``True`` if a parallel build is possible
+        """
+        if (multiprocessing is None or self.jobs <= 1
+            or self.db.engine.name != 'sqlite'):
+            return False
+        databaseFile = self.db.engine.url.database
+        return bool(databaseFile) and databaseFile != ':memory:'
+
+    def _buildParallel(self, builderClasses, buildDependentTables):
+        """
+        Builds the given tables running up to
+        :attr:`~cjklib.build.DatabaseBuilder.jobs` builders at a time in
+        separate processes.
+
+        Each builder writes to its own temporary SQLite database with the main
+        database attached for reading its dependencies. Finished tables are
+        merged into the main database in serial build order, so that the
+        result equals the one of a serial build. Builders are started once all
+        the tables they depend on are merged.
+
+        :type builderClasses: list of classobj
+        :param builderClasses: :class:`~cjklib.build.builder.TableBuilder`
+            classes in build order
+        """
+        # let builders read while tables are merged
+        journalMode = self.db.selectScalar(text("PRAGMA main.journal_mode"))
+        if self.db.selectScalar(
+            text("PRAGMA main.journal_mode = WAL")).lower() != 'wal':
+            if not self.quiet:
+                warn("Unable to switch to WAL journal, building serially")
+            return self._buildSerial(builderClasses, buildDependentTables)
+
+        tempDir = tempfile.mkdtemp(prefix='cjklib_build_')
+        resultQueue = multiprocessing.Queue()
+
+        buildTables = set([clss.PROVIDES for clss in builderClasses])
+        pending = builderClasses[:]
+        running = {}
+        finished = {}
+        mergedTables = set()
+        try:
+            try:
+                while pending:
+                    # start builders whose dependencies are available
+                    for builder in pending:
+                        if len(running) >= self.jobs:
+                            break
+                        if builder.PROVIDES in running \
+                            or builder.PROVIDES in finished:
+                            continue
+                        if set(builder.DEPENDS) & buildTables <= mergedTables:
+                            if not self.quiet:
+                                warn("Building table '%s' with builder '%s'..."
+                                    % (builder.PROVIDES, builder.__name__))
+                            databaseFile = os.path.join(tempDir,
+                                '%s.db' % builder.PROVIDES)
+                            process = multiprocessing.Process(
+                                target=self._buildInProcess,
+                                args=(builder, databaseFile, resultQueue))
+                            process.start()
+                            running[builder.PROVIDES] = (process, databaseFile)
+
+                    # wait for the next builder to finish
+                    if pending[0].PROVIDES not in finished:
+                        tableName, statistics, error = self._getBuildResult(
+                            resultQueue, running)
+                        process, databaseFile = running.pop(tableName)
+                        process.join()
+                        finished[tableName] = (databaseFile, statistics, error)
+
+                    # merge in build order
+                    while pending and pending[0].PROVIDES in finished:
+                        builder = pending.pop(0)
+                        databaseFile, statistics, error \
+                            = finished.pop(builder.PROVIDES)
+                        if error:
+                            isIOError, message, tracebackString = error
+                            if isIOError and self.noFail:
+                                if not self.quiet:
+                                    warn("Building table '%s' failed: '%s',"
+                                    " skipping" % (builder.PROVIDES,
+                                        message))
+                                pending = self._removeDependingBuilders(
+                                    builder.PROVIDES, pending)
+                                continue
+                            if not self.quiet:
+                                warn(tracebackString)
+                            if isIOError:
+                                raise IOError(message)
+                            raise Exception("Building table '%s' failed: %s"
+                                % (builder.PROVIDES, message))
+
+                        startTime = time.time()
+                        self._replaceTable(builder, buildDependentTables,
+                            lambda instance: self._mergeTable(instance,
+                                databaseFile))
+                        os.remove(databaseFile)
+                        mergedTables.add(builder.PROVIDES)
+
+                        buildTime, phaseTimes, peakMemoryIncrease = statistics
+                        phaseTimes['merge'] = time.time() - startTime
+                        self._addBuildStatistics(builder, buildTime,
+                            phaseTimes, peakMemoryIncrease)
+                        if not self.quiet:
+                            warn("Built table '%s' in %.2fs"
+                                % (builder.PROVIDES, buildTime))
+            except Exception, e:
+                if not self.quiet: warn("Error")
+                self.clearTemporary()
+                raise
+        finally:
+            for process, _ in running.values():
+                process.terminate()
+                process.join()
+            shutil.rmtree(tempDir, ignore_errors=True)
+            self.db.execute(text("PRAGMA main.journal_mode = %s" % journalMode))
+
+        self.clearTemporary()
+
+    def _getBuildResult(self, resultQueue, running):
+        """
+        Waits for the next builder of a parallel build to finish.
+
+        :param resultQueue: queue receiving the table name, build statistics
+            and error information
+        :type running: dict
+        :param running: mapping of table name to process and database file of
+            running builders
+        :rtype: tuple
+        :return: table name, build time, phase times and peak memory, and
+            error information
+        """
+        while True:
+            try:
+                return resultQueue.get(timeout=1)
+            except Queue.Empty:
+                # report builders that died without sending a result
+                for tableName, (process, _) in running.items():
+                    if not process.is_alive() and process.exitcode != 0:
+                        message = "process exited with code %d" \
+                            % process.exitcode
+                        return tableName, (0, {}, None), \
+                            (False, message, message)
+
+    def _buildInProcess(self, builder, databaseFile, resultQueue):
+        """
+        Builds the table of the given builder into a separate database. Runs
+        in a child process of a parallel build.
+
+        :type builder: classobj
+        :param builder: :class:`~cjklib.build.builder.TableBuilder` class
+        :type databaseFile: str
+        :param databaseFile: path of the SQLite database to build into
+        :param resultQueue: queue receiving the table name, build statistics
+            and error information
+        """
+        startTime = time.time()
+        startPeakMemory = self._getPeakMemory()
+        phaseTimes = {}
+        error = None
+        try:
+            # dependencies are attached read-write, but only read from
+            attach = [self.db.databaseUrl]
+            attach.extend(self.db.attached.keys())
+            db = dbconnector.DatabaseConnector({
+                'sqlalchemy.url': 'sqlite:///%s' % databaseFile,
+                'attach': attach, 'registerUnicode': self.db.registerUnicode})
+            if self.bulkLoad:
+                self._setPragmas(db, self.BULK_LOAD_PRAGMAS)
+
+            options = self.getBuilderOptions(builder, ignoreUnknown=True)
+            options['dbConnectInst'] = db
+            instance = builder(**options)
+            phaseTimes = instance.phaseTimes
+
+            transaction = db.connection.begin()
+            try:
+                instance.build()
+                transaction.commit()
+            except:
+                transaction.rollback()
+                raise
+        except Exception, e:
+            try:
+                message = unicode(e)
+            except UnicodeError:
+                message = repr(e)
+            error = (isinstance(e, IOError), message, traceback.format_exc())
+
+        statistics = (time.time() - startTime, phaseTimes,
+            self._getPeakMemoryIncrease(startPeakMemory))
+        resultQueue.put((builder.PROVIDES, statistics, error))
+
+    def _mergeTable(self, instance, databaseFile):
+        """
+        Copies the table built by the given builder instance from a separate
+        database into the main database. Schema and index definitions are
+        taken over verbatim and rows are copied in their original order.
+        Builders creating more than a single table with indices are rebuilt
+        in place.
+
+        :type instance: instance
+        :param instance: :class:`~cjklib.build.builder.TableBuilder` instance
+        :type databaseFile: str
+        :param databaseFile: path of the SQLite database built into
+        """
+        preparer = self.db.engine.dialect.identifier_preparer
+        tableName = instance.PROVIDES
+        schema = 'cjklib_build'
+        qschema = preparer.quote_identifier(schema)
+        qtable = preparer.quote_identifier(tableName)
+
+        self.db.execute(text("ATTACH DATABASE :database AS :schema"),
+            database=databaseFile, schema=schema)
+        try:
+            createStatement = None
+            indexStatements = []
+            plainTable = True
+            for objectType, name, tblName, sql in self.db.selectRows(
+                text("SELECT type, name, tbl_name, sql FROM %s.sqlite_master"
+                    " ORDER BY rowid" % qschema)):
+                if objectType == 'table' and name == tableName:
+                    createStatement = sql
+                elif objectType == 'index' and tblName == tableName:
+                    # implicit indices have no statement
+                    if sql:
+                        indexStatements.append(sql)
+                else:
+                    plainTable = False
+
+            if createStatement and plainTable:
+                columns = [preparer.quote_identifier(row[1]) for row
+                    in self.db.selectRows(
+                        text("PRAGMA %s.table_info(%s)" % (qschema, qtable)))]
+                columnList = ', '.join(['rowid'] + columns)
+
+                self.db.execute(text(createStatement))
+                self.db.execute(text(
+                    "INSERT INTO main.%s (%s) SELECT %s FROM %s.%s"
+                    " ORDER BY rowid" % (qtable, columnList, columnList,
+                        qschema, qtable)))
+                for indexStatement in indexStatements:
+                    self.db.execute(text(indexStatement))
+        finally:
+            self.db.execute(text("DETACH DATABASE :schema"), schema=schema)
+
+        if not createStatement or not plainTable:
+            if not self.quiet:
+                warn("Table '%s' can not be merged, rebuilding" % tableName)
+            instance.build()
+
     def clearTemporary(self):
         """
         Removes all tables only built temporarily as to satisfy build
@@ -349,6 +838,8 @@ class DatabaseBuilder:
                 # remove old metadata
                 if instance.PROVIDES in self.db.tables:
                     del self.db.tables[instance.PROVIDES]
+            self._removeFromManifest([instance.PROVIDES
+                for instance in self._instancesUnrequestedTable])
             del self._instancesUnrequestedTable
 
     def remove(self, tables):
@@ -387,13 +878,77 @@ class DatabaseBuilder:
                 # remove old metadata
                 if builder.PROVIDES in self.db.tables:
                     del self.db.tables[builder.PROVIDES]
+        self.db.clearStatementCache()
+        self._removeFromManifest(removed)
 
         return removed
 
+    def update(self, tables):
+        """
+        Updates the given tables by applying only the changes found in their
+        source, see :meth:`~cjklib.build.builder.EDICTFormatBuilder.update`.
+        Tables not yet existing in the main database or whose builder doesn't
+        support updates are built instead.
+
+        .. versionadded:: 0.3.1
+
+        :type tables: list
+        :param tables: list of tables to update
+        :raise UnsupportedError: if an unsupported table is given.
+        :rtype: dict
+        :return: number of inserted, deleted and updated entries per table
+        """
+        if type(tables) != type([]):
+            tables = [tables]
+
+        changes = {}
+        buildTables = []
+        for table in tables:
+            if table not in self._tableBuilderLookup:
+                raise exception.UnsupportedError("Table '%s' not provided"
+                    % table)
+            builder = self._tableBuilderLookup[table]
+            if not hasattr(builder, 'update') \
+                or not self.db.mainHasTable(table):
+                buildTables.append(table)
+                continue
+
+            if not self.quiet:
+                warn("Updating table '%s' with builder '%s'..."
+                    % (builder.PROVIDES, builder.__name__))
+            transaction = self.db.connection.begin()
+            try:
+                options = self.getBuilderOptions(builder, ignoreUnknown=True)
+                options['dbConnectInst'] = self.db
+                instance = builder(**options)
+                changes[table] = instance.update()
+
+                # renew existing records, the word index is updated together
+                #   with its dictionary
+                for tableName in [table, table + '_Words']:
+                    if tableName in self._tableBuilderLookup \
+                        and self._getManifestFingerprint(tableName):
+                        self._updateManifest(
+                            self._tableBuilderLookup[tableName])
+                transaction.commit()
+            except:
+                transaction.rollback()
+                raise
+
+            if not self.quiet:
+                warn("Inserted %d, deleted %d and updated %d entries"
+                    % changes[table])
+
+        if buildTables:
+            self.build(buildTables)
+
+        return changes
+
     def needsRebuild(self, tableName):
         """
         Returns ``True`` if either rebuild is turned on by default or the table
-        does not exist yet in any of the databases.
+        does not exist yet in any of the databases. In incremental mode
+        tables of the main database are also rebuilt if outdated.
 
         :type tableName: str
         :param tableName: table name
@@ -402,8 +957,171 @@ class DatabaseBuilder:
         """
         if self.rebuildExisting:
             return True
+        elif not self.db.hasTable(tableName):
+            return True
+        elif self.incremental and self.db.mainHasTable(tableName):
+            return self.isOutdated(tableName)
+        else:
+            return False
+
+    def isOutdated(self, tableName):
+        """
+        Returns ``True`` if the given table was built from different source
+        files, with a different builder or options than currently given, as
+        recorded in the build manifest. Tables without a record count as
+        outdated. If the source files are not available the table is
+        considered up to date.
+
+        .. versionadded:: 0.3.1
+
+        :type tableName: str
+        :param tableName: table name
+        :rtype: bool
+        :return: ``True``, if table is outdated
+        """
+        fingerprint = self.getFingerprint(tableName)
+        if fingerprint is None:
+            return False
+        return fingerprint != self._getManifestFingerprint(tableName)
+
+    def getFingerprint(self, tableName):
+        """
+        Gets a fingerprint of the given table's build input, made up of the
+        builder, its options, the content of its source files and the
+        fingerprints of the tables it depends on.
+
+        .. versionadded:: 0.3.1
+
+        :type tableName: str
+        :param tableName: table name
+        :rtype: str
+        :return: hexadecimal fingerprint, ``None`` if source files are not
+            available
+        """
+        if tableName not in self._tableBuilderLookup:
+            # provided externally
+            return ''
+        builder = self._tableBuilderLookup[tableName]
+
+        options = self.getBuilderOptions(builder, ignoreUnknown=True)
+        understoodOptions = builder.getDefaultOptions()
+        contentOptions = understoodOptions.copy()
+        contentOptions.update(options)
+        contentOptions = [(option, value) for option, value
+            in contentOptions.items() if option in understoodOptions
+                and option not in self.FINGERPRINT_IGNORE_OPTIONS]
+
+        options['dbConnectInst'] = self.db
+        instance = builder(**options)
+        try:
+            sourceFiles = instance.getSourceFiles()
+        except IOError:
+            return None
+
+        fingerprint = sha1()
+        fingerprint.update(repr((builder.__module__, builder.__name__,
+            sorted(contentOptions))))
+        for filePath in sourceFiles:
+            fingerprint.update(repr((os.path.basename(filePath),
+                self._getSourceHash(filePath))))
+        for dependency in builder.DEPENDS:
+            dependencyFingerprint = self._getManifestFingerprint(dependency)
+            if dependencyFingerprint is None:
+                dependencyFingerprint = self.getFingerprint(dependency)
+                if dependencyFingerprint is None:
+                    return None
+            fingerprint.update(repr((dependency, dependencyFingerprint)))
+
+        return fingerprint.hexdigest()
+
+    def _getSourceHash(self, filePath):
+        """
+        Gets the SHA-1 hash of the given file's content. Hashes are cached
+        as long as size and modification time of the file don't change.
+
+        :type filePath: str
+        :param filePath: path of file
+        :rtype: str
+        :return: hexadecimal hash
+        """
+        fileStat = os.stat(filePath)
+        key = (os.path.abspath(filePath), fileStat.st_size, fileStat.st_mtime)
+        if key not in self._sourceHashes:
+            sourceHash = sha1()
+            f = open(filePath, 'rb')
+            try:
+                for chunk in iter(lambda: f.read(1024 * 1024), ''):
+                    sourceHash.update(chunk)
+            finally:
+                f.close()
+            self._sourceHashes[key] = sourceHash.hexdigest()
+        return self._sourceHashes[key]
+
+    def _getManifestTable(self):
+        """
+        Gets the build manifest table of the main database.
+
+        :rtype: object
+        :return: SQLAlchemy Table, ``None`` if the manifest does not exist
+        """
+        if self.db.mainHasTable(self.MANIFEST_TABLE):
+            return self.db.tables[self.MANIFEST_TABLE]
+
+    def _getManifestFingerprint(self, tableName):
+        """
+        Gets the fingerprint recorded for the given table.
+
+        :type tableName: str
+        :param tableName: table name
+        :rtype: str
+        :return: hexadecimal fingerprint, ``None`` if no record exists
+        """
+        table = self._getManifestTable()
+        if table is None or not self.db.mainHasTable(tableName):
+            return None
+        return self.db.selectScalar(select([table.c.Fingerprint],
+            table.c.TableName == tableName))
+
+    def _updateManifest(self, builder):
+        """
+        Records the fingerprint of the table built by the given builder.
+
+        :type builder: classobj
+        :param builder: :class:`~cjklib.build.builder.TableBuilder` class
+        """
+        fingerprint = self.getFingerprint(builder.PROVIDES)
+
+        table = self._getManifestTable()
+        if table is None:
+            table = Table(self.MANIFEST_TABLE, self.db.metadata,
+                Column('TableName', String(255), primary_key=True),
+                Column('Builder', String(255), nullable=False),
+                Column('Fingerprint', String(40)),
+                useexisting=True)
+            table.create()
         else:
-            return not self.db.hasTable(tableName)
+            self.db.execute(table.delete()
+                .where(table.c.TableName == builder.PROVIDES))
+        self.db.execute(table.insert(), TableName=builder.PROVIDES,
+            Builder=builder.__name__, Fingerprint=fingerprint)
+
+    def _removeFromManifest(self, tableNames):
+        """
+        Removes the records of the given tables from the build manifest. The
+        manifest is dropped once empty.
+
+        :type tableNames: list of str
+        :param tableNames: table names
+        """
+        table = self._getManifestTable()
+        if table is None or not tableNames:
+            return
+        self.db.execute(table.delete().where(table.c.TableName.in_(tableNames)))
+        if not self.db.selectScalar(select([table.c.TableName]).limit(1)):
+            table.drop()
+            if self.MANIFEST_TABLE in self.db.tables:
+                del self.db.tables[self.MANIFEST_TABLE]
+            self.db.metadata.remove(table)
 
     def getBuildDependentTables(self, tableNames):
         """
@@ -792,15 +1510,33 @@ class DatabaseBuilder:
         """
         return self.db.engine.name in ['sqlite']
 
-    def optimize(self):
+    def optimize(self, pageSize=None, targetFile=None):
         """
-        Optimizes the current database.
-
+        Optimizes the current database. Statistics for the query planner are
+        gathered and the database is rebuilt to a compact file.
+
+        :type pageSize: int
+        :param pageSize: page size in bytes of the rebuilt database
+        :type targetFile: str
+        :param targetFile: if given, the database is written to a new
+            read-only file (requires SQLite 3.27), the current database is
+            left untouched
         :raise Exception: if database does not support optimization
         :raise OperationalError: if optimization failed
+
+        .. versionadded:: 0.3.1
+           Parameters ``pageSize`` and ``targetFile``.
         """
         if self.db.engine.name == 'sqlite':
-            self.db.execute('VACUUM')
+            self.db.execute(text('ANALYZE'))
+            if pageSize:
+                self.db.execute(text("PRAGMA main.page_size = %d" % pageSize))
+            if targetFile:
+                self.db.execute(text("VACUUM INTO :targetFile"),
+                    targetFile=targetFile)
+                os.chmod(targetFile, 0444)
+            else:
+                self.db.execute(text('VACUUM'))
         else:
             raise Exception('Database does not seem to support optimization')
 
@@ -56,7 +56,8 @@ __all__ = [
     "MandarinBraileInitialBuilder", "MandarinBraileFinalBuilder",
     # Library dependent
     "GlyphBuilder", "StrokeCountBuilder", "CombinedStrokeCountBuilder",
-    "CharacterComponentLookupBuilder", "CharacterRadicalStrokeCountBuilder",
+    "CharacterComponentLookupBuilder", "StrokeOrderLookupBuilder",
+    "CharacterRadicalStrokeCountBuilder",
     "CharacterResidualStrokeCountBuilder",
     "CombinedCharacterResidualStrokeCountBuilder",
     # Dictionary builder
@@ -68,17 +69,24 @@ __all__ = [
     "SimpleWenlinFormatBuilder"
     ]
 
+import sys
 import types
 import re
 import os.path
 import copy
+import time
 import xml.sax
 import itertools
 import logging
+import heapq
+import mmap
+import zipfile
+import cStringIO
 
 from sqlalchemy import Table, Column, Integer, String, DateTime, Text, Index
+from sqlalchemy import MetaData
 from sqlalchemy import select, union
-from sqlalchemy.sql import text, func
+from sqlalchemy.sql import text, func, literal_column
 from sqlalchemy.sql import or_
 from sqlalchemy.exceptions import IntegrityError, OperationalError
 
@@ -120,6 +128,9 @@ class TableBuilder(object):
             else:
                 setattr(self, option, optionValue)
 
+        self.phaseTimes = {}
+        """Seconds spent in the phases of the build, e.g. ``'insert'``."""
+
     @classmethod
     def getDefaultOptions(cls):
         """
@@ -166,6 +177,39 @@ class TableBuilder(object):
         """
         pass
 
+    def addPhaseTime(self, phase, seconds):
+        """
+        Adds the time spent in the given build phase to
+        :attr:`~cjklib.build.builder.TableBuilder.phaseTimes`. Phases used by
+        :class:`~cjklib.build.builder.EntryGeneratorBuilder` are ``'parse'``
+        for reading data, ``'insert'`` for writing entries and ``'index'`` for
+        creating indices.
+
+        .. versionadded:: 0.3.1
+
+        :type phase: str
+        :param phase: name of phase
+        :type seconds: float
+        :param seconds: time spent
+        """
+        self.phaseTimes[phase] = self.phaseTimes.get(phase, 0) + seconds
+
+    def getSourceFiles(self):
+        """
+        Gets the paths of the data files the table is built from. Builders
+        reading external files implement this to allow detecting changes in
+        the source data.
+
+        The base class' implementation returns an empty list.
+
+        .. versionadded:: 0.3.1
+
+        :rtype: list of str
+        :return: paths of source files
+        :raise IOError: if a source file is not found
+        """
+        return []
+
     def remove(self):
         """
         Removes the table provided by the TableBuilder from the database.
@@ -274,6 +318,23 @@ class EntryGeneratorBuilder(TableBuilder):
     COLUMN_TYPES = {}
     """Column types for created table"""
 
+    @classmethod
+    def getDefaultOptions(cls):
+        options = super(EntryGeneratorBuilder, cls).getDefaultOptions()
+        options.update({'batchSize': 1000})
+
+        return options
+
+    @classmethod
+    def getOptionMetaData(cls, option):
+        optionsMetaData = {'batchSize': {'type': 'int',
+                'description': "number of entries inserted per transaction"}}
+
+        if option in optionsMetaData:
+            return optionsMetaData[option]
+        else:
+            return super(EntryGeneratorBuilder, cls).getOptionMetaData(option)
+
     def getGenerator(self):
         """
         Returns the entry generator.
@@ -302,9 +363,141 @@ class EntryGeneratorBuilder(TableBuilder):
 
         return entryList
 
+    def insertEntries(self, table, generator):
+        """
+        Inserts the entries given by the generator into the table.
+
+        Entries are written in chunks of ``batchSize`` entries, each chunk
+        inside its own transaction. If a chunk violates an integrity
+        constraint the offending entry is searched for by bisection and
+        reported before the error is raised.
+
+        :type table: object
+        :param table: SQLAlchemy table
+        :type generator: iterator
+        :param generator: iterator over entries given as dict or list
+        :raise IntegrityError: if an entry violates an integrity constraint
+        """
+        # inside an enclosing transaction a failing chunk takes all previous
+        #   chunks with it
+        nested = self.db.connection.in_transaction()
+        batchSize = max(self.batchSize, 1)
+
+        insertedCount = 0
+        chunkIterator = self._iterChunks(table, generator, batchSize)
+        while True:
+            startTime = time.time()
+            try:
+                entries = chunkIterator.next()
+            except StopIteration:
+                entries = None
+            self.addPhaseTime('parse', time.time() - startTime)
+            if entries is None:
+                break
+
+            startTime = time.time()
+            transaction = self.db.connection.begin()
+            try:
+                self.db.execute(table.insert(), entries)
+                transaction.commit()
+            except IntegrityError, e:
+                transaction.rollback()
+                if not self.quiet:
+                    warn(unicode(e))
+                    if nested:
+                        # replay all entries up to the failing chunk
+                        entries = list(itertools.islice(
+                            self._iterEntries(table, self.getGenerator()),
+                            insertedCount + len(entries)))
+                    offendingEntry = self._findOffendingEntry(table, entries)
+                    if offendingEntry is not None:
+                        warn("Offending entry: %s" % repr(offendingEntry))
+                raise
+            self.addPhaseTime('insert', time.time() - startTime)
+            insertedCount += len(entries)
+
+    def _iterEntries(self, table, generator):
+        """
+        Normalises entries to dictionaries covering all columns of the table.
+
+        :type table: object
+        :param table: SQLAlchemy table
+        :type generator: iterator
+        :param generator: iterator over entries given as dict or list
+        :rtype: iterator
+        :return: iterator over entries given as dict
+        """
+        columns = [column.name for column in table.columns]
+        for newEntry in generator:
+            if type(newEntry) == type(dict()):
+                yield dict((column, newEntry.get(column, None))
+                    for column in columns)
+            else:
+                yield dict(zip(columns, newEntry))
+
+    def _iterChunks(self, table, generator, batchSize):
+        """
+        Groups entries into chunks of the given size.
+
+        :type table: object
+        :param table: SQLAlchemy table
+        :type generator: iterator
+        :param generator: iterator over entries given as dict or list
+        :type batchSize: int
+        :param batchSize: maximum number of entries per chunk
+        :rtype: iterator
+        :return: iterator over lists of entries given as dict
+        """
+        entryIterator = self._iterEntries(table, generator)
+        while True:
+            entries = list(itertools.islice(entryIterator, batchSize))
+            if not entries:
+                break
+            yield entries
+
+    def _findOffendingEntry(self, table, entries):
+        """
+        Bisects the given entries for the first entry that violates an
+        integrity constraint. Each probe inserts a prefix of the entries and
+        is rolled back, as partially inserted chunks cannot be undone
+        reliably on all engines.
+
+        :type table: object
+        :param table: SQLAlchemy table
+        :type entries: list of dict
+        :param entries: entries that failed to insert
+        :rtype: dict
+        :return: offending entry, or ``None`` if the entries insert cleanly
+        """
+        def insertFails(count):
+            transaction = self.db.connection.begin()
+            try:
+                try:
+                    self.db.execute(table.insert(), entries[:count])
+                    return False
+                except IntegrityError:
+                    return True
+            finally:
+                transaction.rollback()
+
+        if not entries or not insertFails(len(entries)):
+            return None
+
+        # find smallest prefix that fails
+        low, high = 1, len(entries)
+        while low < high:
+            middle = (low + high) // 2
+            if insertFails(middle):
+                high = middle
+            else:
+                low = middle + 1
+        return entries[low - 1]
+
     def build(self):
         # get generator, might raise an Exception if source not found
+        startTime = time.time()
         generator = self.getGenerator()
+        self.addPhaseTime('parse', time.time() - startTime)
 
         # get create statement
         table = self.buildTableObject(self.PROVIDES, self.COLUMNS,
@@ -312,28 +505,39 @@ class EntryGeneratorBuilder(TableBuilder):
         table.create()
 
         # write table content
-        #try:
-            #entries = self.getEntryDict(self.getGenerator())
-            #self.db.execute(table.insert(), entries)
-        #except IntegrityError, e:
-            #warn(unicode(e))
-            ##warn(unicode(insertStatement))
-            #raise
-
-        for newEntry in generator:
-            try:
-                table.insert(newEntry).execute()
-            except IntegrityError, e:
-                if not(self.quiet):
-                    warn(unicode(e))
-                raise
+        self.insertEntries(table, generator)
 
+        startTime = time.time()
         for index in self.buildIndexObjects(self.PROVIDES, self.INDEX_KEYS):
             index.create()
+        self.addPhaseTime('index', time.time() - startTime)
 
 #}
 #{ Unihan and Kanjidic character information
 
+if sys.version_info >= (2, 6):
+    _mergeSorted = heapq.merge
+else:
+    def _mergeSorted(*iterables):
+        """
+        Merges sorted iterables into a single sorted iterator, compatible with
+        ``heapq.merge()`` from Python 2.6.
+        """
+        heap = []
+        for iterator in map(iter, iterables):
+            try:
+                heap.append((iterator.next(), len(heap), iterator.next))
+            except StopIteration:
+                pass
+        heapq.heapify(heap)
+        while heap:
+            value, index, nextValue = heap[0]
+            yield value
+            try:
+                heapq.heapreplace(heap, (nextValue(), index, nextValue))
+            except StopIteration:
+                heapq.heappop(heap)
+
 class UnihanGenerator:
     """
     Regular expression matching one entry in the Unihan database
@@ -380,84 +584,145 @@ class UnihanGenerator:
         all other data is given as is. These are merged into one entry for each
         character.
         """
-        handleDict = self.getHandles()
-        handleReadBuffer = {}
-        # current entry goes here
-        entryIndex = -1
+        entryIndex = None
         entry = {}
+        for codePoint, key, value in self._iterFields():
+            if codePoint != entryIndex:
+                if entryIndex is not None:
+                    yield(fromCodepoint(entryIndex), entry)
+                entryIndex = codePoint
+                entry = {}
+            entry[key] = value
+
+        if entryIndex is not None:
+            yield(fromCodepoint(entryIndex), entry)
+
+    def tupleGenerator(self, keys):
+        """
+        Iterates over the Unihan entries given as tuples of the character
+        followed by the values of the given keys.
 
-        while True:
-            # synchronize all handles of sorted code points, break if we read
-            #   past the current entryIndex
-            for fileName, handle in handleDict.items():
-                # check if we already red something from the current handle
-                if fileName in handleReadBuffer:
-                    redIndex, key, value = handleReadBuffer[fileName]
-                    if entryIndex == redIndex:
-                        entry[key] = value
-                        del handleReadBuffer[fileName]
-                    else:
-                        # the red index is greater than our current one, skip
-                        assert entryIndex < redIndex, "File '%s' is not sorted"
-                        continue
+        .. versionadded:: 0.3.1
 
-                # we can read further into the current handle
-                for line in handle:
-                    if line.startswith('#') or line.strip() == '':
-                        continue
+        :type keys: list of str
+        :param keys: keys whose values are included in the given order
+        """
+        keyIndex = dict((key, index + 1) for index, key in enumerate(keys))
+        emptyEntry = [None] * (len(keys) + 1)
+
+        entryIndex = None
+        entry = emptyEntry[:]
+        for codePoint, key, value in self._iterFields():
+            if codePoint != entryIndex:
+                if entryIndex is not None:
+                    entry[0] = fromCodepoint(entryIndex)
+                    yield tuple(entry)
+                entryIndex = codePoint
+                entry = emptyEntry[:]
+            if key in keyIndex:
+                entry[keyIndex[key]] = value
+
+        if entryIndex is not None:
+            entry[0] = fromCodepoint(entryIndex)
+            yield tuple(entry)
+
+    def _iterFields(self):
+        """
+        Iterates over the fields of all Unihan files ordered by code point.
 
-                    resultObj = self.ENTRY_REGEX.match(line)
-                    if not resultObj:
-                        if not self.quiet:
-                            warn("Can't read line from '%s': '%s'"
-                                % (fileName, line))
-                        continue
-                    unicodeHexCodePoint, key, value = resultObj.group(1, 2, 3)
-                    redIndex = int(unicodeHexCodePoint, 16)
-                    # skip characters outside the BMP, i.e. for Chinese
-                    #   characters >= 0x10000 unless wideBuild is specified
-                    if not self.wideBuild and redIndex >= 0x10000:
-                        continue
-                    # if we have a limited target key set, check if the current
-                    #   one is to be included
-                    if self.limitKeys and not key in self.keySet:
-                        continue
-                    # check if we found data for the current entryIndex
-                    if redIndex == entryIndex:
-                        entry[key] = value
-                    else:
-                        handleReadBuffer[fileName] = (redIndex, key, value)
-                        # we red past our current entry
-                        break
-                else:
-                    # reached end of file
-                    if fileName not in handleReadBuffer:
-                        # our buffer is empty and file end reached, remove
-                        handleDict[fileName].close()
-                        del handleDict[fileName]
-
-            if entryIndex >= 0:
-                char = fromCodepoint(entryIndex)
-                yield(char, entry)
-
-            # if the read buffer is empty, all files are finished
-            if not handleReadBuffer:
-                break
+        :rtype: iterator
+        :return: iterator over tuples of code point, key and value
+        """
+        buffers = self.getBuffers()
+        for field in _mergeSorted(*[self._iterBufferFields(fileName, buf)
+            for fileName, buf in buffers.items()]):
+            yield field
+        # buffers of an abandoned iterator are closed once garbage collected
+        for buf in buffers.values():
+            buf.close()
+
+    def _iterBufferFields(self, fileName, buf):
+        """
+        Iterates over the fields of one Unihan file. Lines are only decoded if
+        their key is included.
+
+        :type fileName: str
+        :param fileName: name of the Unihan file
+        :param buf: file-like object with ``readline()`` giving byte strings
+        :rtype: iterator
+        :return: iterator over tuples of code point, key and value
+        """
+        for line in iter(buf.readline, ''):
+            # skip comments and empty lines
+            if not line.startswith('U+'):
+                continue
+
+            fields = line.split('\t', 2)
+            if len(fields) == 3:
+                unicodeHexCodePoint, key, value = fields
+            else:
+                resultObj = self.ENTRY_REGEX.match(line)
+                if not resultObj:
+                    if not self.quiet:
+                        warn("Can't read line from '%s': '%s'"
+                            % (fileName, line))
+                    continue
+                unicodeHexCodePoint, key, value = resultObj.group(1, 2, 3)
+                unicodeHexCodePoint = 'U+' + unicodeHexCodePoint
+
+            # if we have a limited target key set, check if the current
+            #   one is to be included
+            if self.limitKeys and key not in self.keySet:
+                continue
+            redIndex = int(unicodeHexCodePoint[2:], 16)
+            # skip characters outside the BMP, i.e. for Chinese
+            #   characters >= 0x10000 unless wideBuild is specified
+            if not self.wideBuild and redIndex >= 0x10000:
+                continue
+
+            yield redIndex, key, value.rstrip('\r\n').decode('utf8')
+
+    def getBuffers(self):
+        """
+        Returns buffers on the content of the Unihan database files. Plain
+        files are memory-mapped, members of a ZIP file are read into memory
+        without being decoded.
+
+        .. versionadded:: 0.3.1
 
-            # next entry with smallest index
-            entryIndex = min(
-                [redIndex for redIndex, _, _ in handleReadBuffer.values()])
-            entry = {}
+        :rtype: dict
+        :return: dictionary of names and buffers of the Unihan files
+        """
+        buffers = {}
+        if len(self.fileNames) == 1 and zipfile.is_zipfile(self.fileNames[0]):
+            z = zipfile.ZipFile(self.fileNames[0], "r")
+            try:
+                for member in z.namelist():
+                    buffers[member] = cStringIO.StringIO(z.read(member))
+            finally:
+                z.close()
+        else:
+            for member in self.fileNames:
+                f = open(member, 'rb')
+                try:
+                    if os.fstat(f.fileno()).st_size:
+                        buffers[member] = mmap.mmap(f.fileno(), 0,
+                            access=mmap.ACCESS_READ)
+                finally:
+                    f.close()
+        return buffers
 
+    @deprecated
     def getHandles(self):
-        """ 
+        """
         Returns a list of handles of the Unihan database files.
 
+        .. note:: Deprecated method, use :meth:`getBuffers` instead.
+
         :rtype: dict
         :return: dictionary of names and handles of the Unihan files
         """
         handles = {}
-        import zipfile
         if len(self.fileNames) == 1 and zipfile.is_zipfile(self.fileNames[0]):
             import StringIO
             z = zipfile.ZipFile(self.fileNames[0], "r")
@@ -484,19 +749,14 @@ class UnihanGenerator:
             if not self.quiet:
                 warn("Looking for all keys in Unihan database...")
             self.keySet = set()
-            handleDict = self.getHandles()
-            for handle in handleDict.values():
-                for line in handle:
-                    # ignore comments
-                    if line.startswith('#'):
-                        continue
-                    resultObj = self.ENTRY_REGEX.match(line)
-                    if not resultObj:
-                        continue
-
-                    _, key, _ = resultObj.group(1, 2, 3)
-                    self.keySet.add(key)
-                handle.close()
+            buffers = self.getBuffers()
+            try:
+                for fileName, buf in buffers.items():
+                    for _, key, _ in self._iterBufferFields(fileName, buf):
+                        self.keySet.add(key)
+            finally:
+                for buf in buffers.values():
+                    buf.close()
         return list(self.keySet)
 
 
@@ -524,12 +784,8 @@ class UnihanBuilder(EntryGeneratorBuilder):
 
         def generator(self):
             """Provides all data of one character per entry."""
-            columns = self.unihanGenerator.keys()
-            for char, entryDict in self.unihanGenerator.generator():
-                newEntryDict = {UnihanBuilder.CHARACTER_COLUMN: char}
-                for column in columns:
-                    newEntryDict[column] = entryDict.get(column, None)
-                yield newEntryDict
+            return self.unihanGenerator.tupleGenerator(
+                self.unihanGenerator.keys())
 
     PROVIDES = 'Unihan'
     CHARACTER_COLUMN = 'ChineseCharacter'
@@ -601,6 +857,24 @@ class UnihanBuilder(EntryGeneratorBuilder):
         else:
             return super(UnihanBuilder, cls).getOptionMetaData(option)
 
+    def getSourceFiles(self):
+        fileNames = UnihanGenerator.UNIHAN_FILE_MEMBERS[:]
+        fileNames.extend(['Unihan.zip', 'Unihan.txt'])
+        path = self.findFile(fileNames, "Unihan database file(s)")
+
+        # check for multiple file names (Unicode >= 5.2)
+        pathList = []
+        if path.endswith('Unihan.zip') or path.endswith('Unihan.txt'):
+            pathList = [path]
+        else:
+            dirname = os.path.dirname(path)
+            for fileName in UnihanGenerator.UNIHAN_FILE_MEMBERS:
+                filePath = os.path.join(dirname, fileName)
+                if os.path.exists(filePath):
+                    pathList.append(filePath)
+            assert(len(pathList) > 0)
+        return pathList
+
     def getUnihanGenerator(self):
         """
         Returns the :class:`UnihanGenerator`. Constructs it if needed.
@@ -609,26 +883,12 @@ class UnihanBuilder(EntryGeneratorBuilder):
         :return: instance of a :class:`UnihanGenerator`
         """
         if not self.unihanGenerator:
-            fileNames = UnihanGenerator.UNIHAN_FILE_MEMBERS[:]
-            fileNames.extend(['Unihan.zip', 'Unihan.txt'])
-            path = self.findFile(fileNames, "Unihan database file(s)")
+            pathList = self.getSourceFiles()
             if self.slimUnihanTable:
                 columns = self.INCLUDE_KEYS
             else:
                 columns = None
 
-            # check for multiple file names (Unicode >= 5.2)
-            pathList = []
-            if path.endswith('Unihan.zip') or path.endswith('Unihan.txt'):
-                pathList = [path]
-            else:
-                dirname = os.path.dirname(path)
-                for fileName in UnihanGenerator.UNIHAN_FILE_MEMBERS:
-                    filePath = os.path.join(dirname, fileName)
-                    if os.path.exists(filePath):
-                        pathList.append(filePath)
-                assert(len(pathList) > 0)
-
             self.unihanGenerator = UnihanGenerator(pathList, useKeys=columns,
                 wideBuild=self.wideBuild, quiet=self.quiet)
             if not self.quiet:
@@ -640,9 +900,11 @@ class UnihanBuilder(EntryGeneratorBuilder):
             .generator()
 
     def build(self):
+        startTime = time.time()
         generator = self.getUnihanGenerator()
         self.COLUMNS = [self.CHARACTER_COLUMN]
         self.COLUMNS.extend(generator.keys())
+        self.addPhaseTime('parse', time.time() - startTime)
 
         EntryGeneratorBuilder.build(self)
 
@@ -825,6 +1087,10 @@ class Kanjidic2Builder(EntryGeneratorBuilder):
         else:
             return super(Kanjidic2Builder, cls).getOptionMetaData(option)
 
+    def getSourceFiles(self):
+        return [self.findFile(['kanjidic2.xml.gz', 'kanjidic2.xml'],
+            "KANJIDIC2 XML file")]
+
     def getGenerator(self):
         """
         Returns the
@@ -834,8 +1100,7 @@ class Kanjidic2Builder(EntryGeneratorBuilder):
         :return: instance of a
             :class:`Kanjidic2Builder.KanjidicGenerator`
         """
-        path = self.findFile(['kanjidic2.xml.gz', 'kanjidic2.xml'],
-            "KANJIDIC2 XML file")
+        path, = self.getSourceFiles()
         if not self.quiet:
             warn("reading file '" + path + "'")
         return Kanjidic2Builder.KanjidicGenerator(path,
@@ -1638,6 +1903,11 @@ class CSVFileLoader(TableBuilder):
         else:
             return super(CSVFileLoader, cls).getOptionMetaData(option)
 
+    def getSourceFiles(self):
+        return [self.findFile([self.TABLE_DECLARATION_FILE_MAPPING],
+                "SQL table definition file"),
+            self.findFile([self.TABLE_CSV_FILE_MAPPING], "table")]
+
     ## The following method can be defined in child classes to filter entries
     ##   read from the file.
     #def filterEntry(self, entry):
@@ -1646,9 +1916,7 @@ class CSVFileLoader(TableBuilder):
     def build(self):
         import codecs
 
-        definitionFile = self.findFile([self.TABLE_DECLARATION_FILE_MAPPING],
-            "SQL table definition file")
-        contentFile = self.findFile([self.TABLE_CSV_FILE_MAPPING], "table")
+        definitionFile, contentFile = self.getSourceFiles()
 
         # get create statement
         if not self.quiet:
@@ -1669,6 +1937,7 @@ class CSVFileLoader(TableBuilder):
         doFilter = hasattr(self, 'filterEntry')
 
         if not self.entrywise:
+            startTime = time.time()
             entries = []
             for line in UnicodeCSVFileIterator(fileHandle):
                 if len(line) == 1 and not line[0].strip():
@@ -1684,7 +1953,9 @@ class CSVFileLoader(TableBuilder):
                     entryDict = self.filterEntry(entryDict)
                 if entryDict:
                     entries.append(entryDict)
+            self.addPhaseTime('parse', time.time() - startTime)
 
+            startTime = time.time()
             try:
                 self.db.execute(table.insert(), entries)
             except IntegrityError, e:
@@ -1693,6 +1964,7 @@ class CSVFileLoader(TableBuilder):
                     warn('Run builder with option \'--entrywise=True\''
                         ' to find violating entry')
                 raise
+            self.addPhaseTime('insert', time.time() - startTime)
         else:
             for line in UnicodeCSVFileIterator(fileHandle):
                 if len(line) == 1 and not line[0].strip():
@@ -1714,8 +1986,10 @@ class CSVFileLoader(TableBuilder):
 
 
         # get create index statement
+        startTime = time.time()
         for index in self.buildIndexObjects(self.PROVIDES, self.INDEX_KEYS):
             index.create()
+        self.addPhaseTime('index', time.time() - startTime)
 
 
 class PinyinSyllablesBuilder(CSVFileLoader):
@@ -2478,6 +2752,104 @@ class CharacterComponentLookupBuilder(EntryGeneratorBuilder):
             self.db, characterSet).generator()
 
 
+class StrokeOrderLookupBuilder(EntryGeneratorBuilder):
+    """
+    Builds a lookup table of stroke orders for all characters with stroke order
+    or decomposition information.
+
+    .. versionadded:: 0.3.1
+    """
+    class StrokeOrderLookupGenerator:
+        """Generates the character stroke order mapping."""
+        def __init__(self, dbConnectInst, characterSet, includePartial=False):
+            """
+            :type dbConnectInst: instance
+            :param dbConnectInst: instance of a
+                :class:`~cjklib.dbconnector.DatabaseConnector`
+            :type characterSet: set
+            :param characterSet: set of characters to generate the table for
+            :type includePartial: bool
+            :param includePartial: if ``True`` partial stroke orders are
+                generated, too
+            """
+            self.characterSet = characterSet
+            self.includePartial = includePartial
+            # create instance, locale is not important, we supply own glyph
+            self.cjk = characterlookup.CharacterLookup('T',
+                dbConnectInst=dbConnectInst)
+            # make sure a currently existing table is not used
+            self.cjk.hasStrokeOrderLookup = False
+
+        def generator(self):
+            """Provides one entry per character and *glyph*."""
+            # share caches between characters, full and partial stroke orders
+            #   need to be kept apart
+            cache = {}
+            partialCache = {}
+            for char, glyph in self.characterSet:
+                strokeOrder = self.cjk._buildStrokeOrder(char, glyph,
+                    cache=cache)
+                if self.includePartial:
+                    partialStrokeOrder = self.cjk._buildStrokeOrder(char,
+                        glyph, includePartial=True, cache=partialCache)
+                else:
+                    partialStrokeOrder = None
+
+                if strokeOrder or partialStrokeOrder:
+                    yield {'ChineseCharacter': char, 'Glyph': glyph,
+                        'StrokeOrder': strokeOrder,
+                        'PartialStrokeOrder': partialStrokeOrder}
+
+    PROVIDES = 'StrokeOrderLookup'
+    DEPENDS = ['CharacterDecomposition', 'StrokeOrder', 'StrokeCount']
+
+    COLUMNS = ['ChineseCharacter', 'Glyph', 'StrokeOrder',
+        'PartialStrokeOrder']
+    PRIMARY_KEYS = ['ChineseCharacter', 'Glyph']
+    COLUMN_TYPES = {'ChineseCharacter': String(1), 'Glyph': Integer(),
+        'StrokeOrder': String(255), 'PartialStrokeOrder': String(255)}
+
+    def __init__(self, **options):
+        """
+        :param options: extra options
+        :keyword dbConnectInst: instance of a
+            :class:`~cjklib.dbconnector.DatabaseConnector`
+        :keyword quiet: if ``True`` no status information will be printed to
+            stderr
+        :keyword includePartial: if ``True`` stroke orders where only
+            partial information is available are stored, too. Unknown strokes
+            are padded according to table ``StrokeCount``.
+        """
+        super(StrokeOrderLookupBuilder, self).__init__(**options)
+
+    @classmethod
+    def getDefaultOptions(cls):
+        options = super(StrokeOrderLookupBuilder, cls).getDefaultOptions()
+        options.update({'includePartial': False})
+
+        return options
+
+    @classmethod
+    def getOptionMetaData(cls, option):
+        optionsMetaData = {'includePartial': {'type': 'bool',
+            'description': "include partial stroke orders"}}
+
+        if option in optionsMetaData:
+            return optionsMetaData[option]
+        else:
+            return super(StrokeOrderLookupBuilder, cls).getOptionMetaData(
+                option)
+
+    def getGenerator(self):
+        tables = [self.db.tables[tableName] \
+            for tableName in ['StrokeOrder', 'CharacterDecomposition']]
+        characterSet = set(self.db.selectRows(
+            union(*[select([table.c.ChineseCharacter, table.c.Glyph]) \
+                for table in tables])))
+        return StrokeOrderLookupBuilder.StrokeOrderLookupGenerator(self.db,
+            characterSet, self.includePartial).generator()
+
+
 class CharacterRadicalStrokeCountBuilder(EntryGeneratorBuilder):
     """
     Builds a mapping between characters and their radical with stroke count of
@@ -2983,10 +3355,19 @@ class EDICTFormatBuilder(EntryGeneratorBuilder):
     One column will be provided for the headword, one for the reading (in EDICT
     that is the Kana) and one for the translation.
 
-    .. todo::
-        * Fix: Optimize insert, use transaction which disables autocommit and
-          cosider passing data all at once, requiring proper handling of row
-          indices.
+    Entries are streamed from the (compressed) source file and inserted in
+    batches. Optionally the word index is built in the same pass, see
+    :class:`~cjklib.build.builder.WordIndexBuilder`.
+
+    Under SQLite a full text index ``<PROVIDES>_Senses`` of translations can be
+    built using the FTS5 or FTS4 extension. It holds one row per sense, i.e.
+    each part of the translation separated by a slash, which is used by the
+    translation search strategies in :mod:`cjklib.dictionary.search`.
+
+    For readings with tones given as appended marks an additional indexed
+    column ``ReadingToneless`` can be built holding the reading without tones,
+    which is used by
+    :class:`~cjklib.dictionary.search.TonelessWildcardReading`.
     """
     class TableGenerator:
         """Generates the dictionary entries."""
@@ -3061,6 +3442,20 @@ class EDICTFormatBuilder(EntryGeneratorBuilder):
     """Number of starting lines to ignore."""
     FILTER = None
     """Filter to apply to the read entry before writing to table."""
+    WORD_INDEX_HEADWORD = 'Headword'
+    """Column of headword used for the word index."""
+    ENTRY_KEY_COLUMNS = ['Headword', 'Reading']
+    """Columns identifying an entry when updating an installed dictionary."""
+    SENSE_ROWID_FACTOR = 1024
+    """
+    Factor to the row id of a dictionary entry giving the first row id of its
+    senses in the translation index.
+    """
+    TONE_MARK_REGEX = None
+    """
+    Regular expression matching the tone mark appended to a reading entity,
+    ``None`` if the reading has no such tone marks.
+    """
 
     DEFAULT_COLLATION = {'mysql': 'utf8_unicode_ci', 'sqlite': 'NOCASE'}
     COLUMNS_WITH_COLLATION = ['Translation']
@@ -3079,6 +3474,17 @@ class EDICTFormatBuilder(EntryGeneratorBuilder):
         :keyword fileType: type of file (.zip, .tar, .tar.bz2, .tar.gz, .gz,
             .txt),
             overrides file type guessing
+        :keyword wordIndex: if ``True`` the word index table
+            ``<PROVIDES>_Words`` will be built in the same pass
+        :keyword translationIndex: if ``True`` the full text index
+            ``<PROVIDES>_Senses`` of translations will be built, if a SQLite
+            extension FTS5 or FTS4 exists.
+        :keyword tonelessReading: if ``True`` the indexed column
+            ``ReadingToneless`` will be built, if the reading supports it
+
+        .. versionadded:: 0.3.1
+           Options ``wordIndex``, ``translationIndex`` and
+           ``tonelessReading``.
         """
         super(EDICTFormatBuilder, self).__init__(**options)
 
@@ -3120,7 +3526,9 @@ class EDICTFormatBuilder(EntryGeneratorBuilder):
     def getDefaultOptions(cls):
         options = super(EDICTFormatBuilder, cls).getDefaultOptions()
         options.update({'enableFTS3': False, 'filePath': None,
-            'fileType': None, 'useCollation': True, 'collation': None})
+            'fileType': None, 'useCollation': True, 'collation': None,
+            'wordIndex': False, 'translationIndex': False,
+            'tonelessReading': False})
 
         return options
 
@@ -3138,6 +3546,13 @@ class EDICTFormatBuilder(EntryGeneratorBuilder):
                 'description': "use collations for dictionary entries"},
             'collation': {'type': 'string',
                 'description': "collation for dictionary entries"},
+            'wordIndex': {'type': 'bool',
+                'description': "build word index table in the same pass"},
+            'translationIndex': {'type': 'bool',
+                'description': "build full text index of translations"
+                    " (SQLite FTS5/FTS4)"},
+            'tonelessReading': {'type': 'bool',
+                'description': "build indexed column of toneless readings"},
                 }
 
         if option in optionsMetaData:
@@ -3145,12 +3560,15 @@ class EDICTFormatBuilder(EntryGeneratorBuilder):
         else:
             return super(EDICTFormatBuilder, cls).getOptionMetaData(option)
 
-    def getGenerator(self):
-        # get file handle
+    def getSourceFiles(self):
         if self.filePath:
-            filePath =  self.filePath
+            return [self.filePath]
         else:
-            filePath = self.findFile(self.FILE_NAMES)
+            return [self.findFile(self.FILE_NAMES)]
+
+    def getGenerator(self):
+        # get file handle
+        filePath, = self.getSourceFiles()
 
         handle = self.getFileHandle(filePath)
         if not self.quiet:
@@ -3186,24 +3604,35 @@ class EDICTFormatBuilder(EntryGeneratorBuilder):
 
         The file can be either normal content, zip, tar, .tar.gz, tar.bz2 or gz.
 
+        The content is decompressed and decoded while being read.
+
         :type filePath: str
         :param filePath: path of file
         :rtype: file
         :return: handle to file's content
         """
-        import zipfile
+        import codecs
         import tarfile
 
+        # zip and gzip members only support the io interface from Python 2.7,
+        #   fall back to codecs' slower stream readers
+        if sys.version_info >= (2, 7):
+            import io
+        else:
+            io = None
+
         if self.fileType == '.zip' \
             or not self.fileType and zipfile.is_zipfile(filePath):
-            import StringIO
             z = zipfile.ZipFile(filePath, 'r')
             archiveContent = self.getArchiveContentName(z.namelist(), filePath)
-            return StringIO.StringIO(z.read(archiveContent)\
-                .decode(self.ENCODING))
+            if io:
+                return io.TextIOWrapper(z.open(archiveContent),
+                    encoding=self.ENCODING)
+            else:
+                return codecs.getreader(self.ENCODING)(
+                    cStringIO.StringIO(z.read(archiveContent)))
         elif self.fileType in ('.tar', '.tar.bz2', '.tar.gz') \
             or not self.fileType and tarfile.is_tarfile(filePath):
-            import StringIO
             mode = ''
             ending = self.fileType or filePath
             if ending.endswith('bz2'):
@@ -3212,16 +3641,22 @@ class EDICTFormatBuilder(EntryGeneratorBuilder):
                 mode = ':gz'
             z = tarfile.open(filePath, 'r' + mode)
             archiveContent = self.getArchiveContentName(z.getnames(), filePath)
-            fileObj = z.extractfile(archiveContent)
-            return StringIO.StringIO(fileObj.read().decode(self.ENCODING))
+            # tar members don't support the io interface
+            return codecs.getreader(self.ENCODING)(
+                z.extractfile(archiveContent))
         elif self.fileType == '.gz' \
             or not self.fileType and filePath.endswith('.gz'):
             import gzip
-            import StringIO
-            z = gzip.GzipFile(filePath, 'r')
-            return StringIO.StringIO(z.read().decode(self.ENCODING))
+            if io:
+                return io.TextIOWrapper(
+                    io.BufferedReader(gzip.GzipFile(filePath, 'r')),
+                    encoding=self.ENCODING)
+            else:
+                return codecs.getreader(self.ENCODING)(
+                    gzip.GzipFile(filePath, 'r'))
+        elif io:
+            return io.open(filePath, 'r', encoding=self.ENCODING)
         else:
-            import codecs
             return codecs.open(filePath, 'r', self.ENCODING)
 
     def buildFTS3CreateTableStatement(self, table):
@@ -3297,7 +3732,21 @@ class EDICTFormatBuilder(EntryGeneratorBuilder):
 
     def insertFTS3Tables(self, tableName, generator, columns=None,
         fullTextColumns=None):
+        """
+        Inserts the entries given by the generator into the tables of a FTS3
+        table construct. Entries are written in chunks of ``batchSize``
+        entries, rows of both tables are matched by explicitly given row ids.
 
+        :type tableName: str
+        :param tableName: name of table
+        :type generator: iterator
+        :param generator: iterator over entries given as dict or list
+        :type columns: list of str
+        :param columns: column names
+        :type fullTextColumns: list of str
+        :param fullTextColumns: list of fulltext columns
+        :raise IntegrityError: if an entry violates an integrity constraint
+        """
         columns = columns or []
         fullTextColumns = fullTextColumns or []
 
@@ -3307,36 +3756,50 @@ class EDICTFormatBuilder(EntryGeneratorBuilder):
             autoload=True)
         fts3Table = Table(tableName + '_Text', self.db.metadata,
             autoload=True)
-        fts3FullRows = ['rowid']
-        fts3FullRows.extend(fullTextColumns)
 
-        for newEntry in generator:
+        preparer = self.db.engine.dialect.identifier_preparer
+        def insertStatement(table, tableColumns):
+            return text("INSERT INTO %s (rowid, %s) VALUES (:rowid, %s)"
+                % (preparer.format_table(table),
+                    ', '.join(preparer.quote_identifier(column)
+                        for column in tableColumns),
+                    ', '.join(':%s' % column for column in tableColumns)))
+        simpleInsert = insertStatement(simpleTable, simpleColumns)
+        fts3Insert = insertStatement(fts3Table, fullTextColumns)
+
+        rowId = (self.db.selectScalar(
+            select([func.max(text('rowid'))], from_obj=simpleTable)) or 0) + 1
+        # lists are given in order of the passed columns
+        entryTable = Table(tableName, MetaData(),
+            *[Column(column) for column in columns])
+        chunkIterator = self._iterChunks(entryTable, generator,
+            max(self.batchSize, 1))
+        while True:
+            startTime = time.time()
             try:
-                if type(newEntry) == type([]):
-                    simpleData = [newEntry[i] \
-                        for i, column in enumerate(columns) \
-                            if column not in fullTextColumns]
-                    fts3Data = [newEntry[i] \
-                        for i, column in enumerate(columns) \
-                            if column in fullTextColumns]
-                    fts3Data.insert('rowid', 0)
-                else:
-                    simpleData = dict([(key, value) \
-                        for key, value in newEntry.items() \
-                        if key in simpleColumns])
-                    fts3Data = dict([(key, value) \
-                        for key, value in newEntry.items() \
-                        if key in fullTextColumns])
-                    fts3Data['rowid'] = func.last_insert_rowid()
-
-                # table with non-FTS3 data
-                simpleTable.insert(simpleData).execute()
-                fts3Table.insert(fts3Data).execute()
+                entries = chunkIterator.next()
+            except StopIteration:
+                entries = None
+            self.addPhaseTime('parse', time.time() - startTime)
+            if entries is None:
+                break
+
+            for entry in entries:
+                entry['rowid'] = rowId
+                rowId += 1
+
+            startTime = time.time()
+            transaction = self.db.connection.begin()
+            try:
+                self.db.execute(simpleInsert, entries)
+                self.db.execute(fts3Insert, entries)
+                transaction.commit()
             except IntegrityError, e:
+                transaction.rollback()
                 if not self.quiet:
                     warn(unicode(e))
-                    #warn(unicode(insertStatement))
                 raise
+            self.addPhaseTime('insert', time.time() - startTime)
 
     def testFTS3(self):
         """
@@ -3360,6 +3823,189 @@ class EDICTFormatBuilder(EntryGeneratorBuilder):
         except OperationalError:
             return False
 
+    def _dropWordIndexTable(self):
+        """
+        Drops the word index table built together with the dictionary.
+        """
+        wordTableName = self.PROVIDES + '_Words'
+        if self.db.mainHasTable(wordTableName):
+            table = Table(wordTableName, self.db.metadata)
+            table.drop()
+            self.db.metadata.remove(table)
+            if wordTableName in self.db.tables:
+                del self.db.tables[wordTableName]
+
+    def _iterWithWordIndex(self, generator, wordTable):
+        """
+        Passes on the given dictionary entries while inserting their words
+        into the word index table.
+
+        :type generator: iterator
+        :param generator: iterator over dictionary entries given as dict
+        :type wordTable: object
+        :param wordTable: SQLAlchemy table of the word index
+        :rtype: iterator
+        :return: iterator over dictionary entries given as dict
+        """
+        wordEntryGenerator = WordIndexBuilder.WordEntryGenerator([])
+        wordEntries = []
+        for entry in generator:
+            yield entry
+
+            wordEntries.extend(wordEntryGenerator.getWordEntries(
+                entry[self.WORD_INDEX_HEADWORD], entry['Reading'],
+                entry['Translation']))
+            if len(wordEntries) >= self.batchSize:
+                self.db.execute(wordTable.insert(), wordEntries)
+                wordEntries = []
+
+        if wordEntries:
+            self.db.execute(wordTable.insert(), wordEntries)
+
+    def getTonelessReading(self, reading):
+        """
+        Returns the given reading with tone marks removed from its entities.
+
+        :type reading: str
+        :param reading: reading of a dictionary entry
+        :rtype: str
+        :return: reading without tone marks
+        """
+        return self.TONE_MARK_REGEX.sub('', reading)
+
+    def _iterWithTonelessReading(self, generator):
+        """
+        Adds the toneless form of the reading to the given dictionary entries.
+
+        :type generator: iterator
+        :param generator: iterator over dictionary entries given as dict or
+            list
+        :rtype: iterator
+        :return: iterator over dictionary entries given as dict
+        """
+        for entry in generator:
+            if type(entry) != type(dict()):
+                entry = dict(zip(self.COLUMNS, entry))
+            entry['ReadingToneless'] = self.getTonelessReading(entry['Reading'])
+            yield entry
+
+    def _dropTranslationIndexTable(self):
+        """
+        Drops the translation index table built together with the dictionary.
+        """
+        sensesTableName = self.PROVIDES + '_Senses'
+        if self.db.mainHasTable(sensesTableName):
+            table = Table(sensesTableName, self.db.metadata)
+            table.drop()
+            self.db.metadata.remove(table)
+            if sensesTableName in self.db.tables:
+                del self.db.tables[sensesTableName]
+
+    def _createTranslationIndexTable(self):
+        """
+        Creates the translation index table using the first full text search
+        extension supported by SQLite, FTS5 or FTS4.
+
+        :rtype: str
+        :return: name of the extension used, ``None`` if none is supported
+        """
+        preparer = self.db.engine.dialect.identifier_preparer
+        sensesTableName = preparer.quote_identifier(self.PROVIDES + '_Senses')
+        for module, arguments in (('FTS5', 'Translation'),
+            ('FTS4', 'Translation, tokenize=unicode61')):
+            try:
+                self.db.execute(text("CREATE VIRTUAL TABLE %s USING %s(%s)"
+                    % (sensesTableName, module, arguments)))
+                return module
+            except OperationalError:
+                pass
+
+    def _insertTranslationIndex(self, rows):
+        """
+        Inserts the senses of the given dictionary entries into the translation
+        index.
+
+        :type rows: iterator
+        :param rows: iterator over tuples of the row id and translation of a
+            dictionary entry
+        """
+        preparer = self.db.engine.dialect.identifier_preparer
+        insertStatement = text(
+            "INSERT INTO %s (rowid, Translation) VALUES (:rowid, :Translation)"
+                % preparer.quote_identifier(self.PROVIDES + '_Senses'))
+
+        senseEntries = []
+        for rowId, translation in rows:
+            senses = [sense for sense in translation.strip('/').split('/')
+                if sense.strip()]
+            if len(senses) > self.SENSE_ROWID_FACTOR:
+                # merge surplus senses with the last
+                senses[self.SENSE_ROWID_FACTOR - 1:] = ['/'.join(
+                    senses[self.SENSE_ROWID_FACTOR - 1:])]
+            for senseIdx, sense in enumerate(senses):
+                senseEntries.append({'Translation': sense,
+                    'rowid': rowId * self.SENSE_ROWID_FACTOR + senseIdx})
+
+            if len(senseEntries) >= self.batchSize:
+                self.db.execute(insertStatement, senseEntries)
+                senseEntries = []
+
+        if senseEntries:
+            self.db.execute(insertStatement, senseEntries)
+
+    def _deleteTranslationIndex(self, rowIds):
+        """
+        Deletes the senses of the given dictionary entries from the translation
+        index.
+
+        :type rowIds: list of int
+        :param rowIds: row ids of dictionary entries
+        """
+        if not rowIds:
+            return
+        preparer = self.db.engine.dialect.identifier_preparer
+        self.db.execute(text(
+            "DELETE FROM %s WHERE rowid BETWEEN :first AND :last"
+                % preparer.quote_identifier(self.PROVIDES + '_Senses')),
+            [{'first': rowId * self.SENSE_ROWID_FACTOR,
+                'last': (rowId + 1) * self.SENSE_ROWID_FACTOR - 1}
+                for rowId in rowIds])
+
+    def _buildTranslationIndex(self, table):
+        """
+        Builds the translation index for the entries of the given dictionary
+        table.
+
+        :type table: object
+        :param table: SQLAlchemy table of the dictionary
+        """
+        self._dropTranslationIndexTable()
+        module = None
+        if self.db.engine.name == 'sqlite':
+            module = self._createTranslationIndexTable()
+        if not module:
+            if not self.quiet:
+                warn("Full text index of translations unsupported:"
+                    " no SQLite extension FTS5 or FTS4 found.")
+            return
+
+        def iterRows():
+            # read in chunks, as the connection is written to in between
+            rowIdColumn = literal_column('rowid')
+            lastRowId = 0
+            while True:
+                rows = self.db.selectRows(
+                    select([rowIdColumn, table.c.Translation],
+                        rowIdColumn > lastRowId)
+                    .order_by(rowIdColumn).limit(self.batchSize))
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+                lastRowId = rows[-1][0]
+
+        self._insertTranslationIndex(iterRows())
+
     def build(self):
         """
         Build the table provided by the TableBuilder.
@@ -3367,7 +4013,27 @@ class EDICTFormatBuilder(EntryGeneratorBuilder):
         A search index is created to allow for fulltext searching.
         """
         # get generator, might raise an Exception if source not found
+        startTime = time.time()
         generator = self.getGenerator()
+        self.addPhaseTime('parse', time.time() - startTime)
+
+        if self.wordIndex:
+            self._dropWordIndexTable()
+            wordTable = self.buildTableObject(self.PROVIDES + '_Words',
+                WordIndexBuilder.COLUMNS, WordIndexBuilder.COLUMN_TYPES)
+            wordTable.create()
+            generator = self._iterWithWordIndex(generator, wordTable)
+
+        columns = self.COLUMNS
+        indexKeys = self.INDEX_KEYS
+        if self.tonelessReading:
+            if self.TONE_MARK_REGEX:
+                columns = columns + ['ReadingToneless']
+                indexKeys = indexKeys + [['ReadingToneless']]
+                generator = self._iterWithTonelessReading(generator)
+            elif not self.quiet:
+                warn("Toneless reading unsupported for reading of '%s'"
+                    % self.PROVIDES)
 
         hasFTS3 = self.enableFTS3 and self.db.engine.name == 'sqlite' \
             and self.testFTS3()
@@ -3379,44 +4045,43 @@ class EDICTFormatBuilder(EntryGeneratorBuilder):
                     reason = 'extension not found.'
                 warn("SQLite FTS3 fulltext search unsupported: %s" % reason)
             # get create statement
-            table = self.buildTableObject(self.PROVIDES, self.COLUMNS,
+            table = self.buildTableObject(self.PROVIDES, columns,
                 self.COLUMN_TYPES, self.PRIMARY_KEYS)
             table.create()
         else:
             # get create statement
-            self.buildFTS3Tables(self.PROVIDES, self.COLUMNS, self.COLUMN_TYPES,
+            self.buildFTS3Tables(self.PROVIDES, columns, self.COLUMN_TYPES,
                 self.PRIMARY_KEYS, self.FULLTEXT_COLUMNS)
 
         if not hasFTS3:
             # write table content
-            #try:
-                #entries = self.getEntryDict(generator)
-                #self.db.execute(table.insert(), entries)
-            #except IntegrityError, e:
-                #warn(unicode(e))
-                ##warn(unicode(insertStatement))
-                #raise
-            for newEntry in generator:
-                try:
-                    table.insert(newEntry).execute()
-                except IntegrityError, e:
-                    if not self.quiet:
-                        warn(unicode(e))
-                        #warn(unicode(insertStatement))
-                    raise
+            self.insertEntries(table, generator)
         else:
             # write table content
-            self.insertFTS3Tables(self.PROVIDES, generator, self.COLUMNS,
+            self.insertFTS3Tables(self.PROVIDES, generator, columns,
                 self.FULLTEXT_COLUMNS)
 
         # get create index statement
+        startTime = time.time()
         if not hasFTS3:
-            for index in self.buildIndexObjects(self.PROVIDES, self.INDEX_KEYS):
+            for index in self.buildIndexObjects(self.PROVIDES, indexKeys):
                 index.create()
         else:
             for index in self.buildIndexObjects(self.PROVIDES + '_Normal',
-                self.INDEX_KEYS):
+                indexKeys):
                 index.create()
+        if self.wordIndex:
+            for index in self.buildIndexObjects(self.PROVIDES + '_Words',
+                WordIndexBuilder.INDEX_KEYS):
+                index.create()
+        if self.translationIndex:
+            if hasFTS3:
+                if not self.quiet:
+                    warn("Full text index of translations not supported"
+                        " together with FTS3 tables")
+            else:
+                self._buildTranslationIndex(table)
+        self.addPhaseTime('index', time.time() - startTime)
 
     def remove(self):
         # get drop table statement
@@ -3440,6 +4105,207 @@ class EDICTFormatBuilder(EntryGeneratorBuilder):
             table.drop()
             self.db.metadata.remove(table)
 
+        if self.wordIndex:
+            self._dropWordIndexTable()
+        self._dropTranslationIndexTable()
+
+    def update(self):
+        """
+        Updates the installed table to the content of the source file.
+
+        Instead of rebuilding the table, entries are matched by the columns
+        given in :attr:`ENTRY_KEY_COLUMNS` and only new, removed and changed
+        entries are written. A word index table ``<PROVIDES>_Words`` and a
+        translation index ``<PROVIDES>_Senses`` found in the main database are
+        updated accordingly, as is the column ``ReadingToneless``. All changes
+        are applied inside a single transaction.
+
+        .. versionadded:: 0.3.1
+
+        :rtype: tuple of int
+        :return: number of inserted, deleted and updated entries
+        """
+        keyColumns = self.ENTRY_KEY_COLUMNS
+        valueColumns = [column for column in self.COLUMNS
+            if column not in keyColumns]
+
+        def groupEntries(entries):
+            groups = {}
+            for entry in entries:
+                key = tuple(entry[column] for column in keyColumns)
+                value = tuple(entry[column] for column in valueColumns)
+                groups.setdefault(key, []).append(value)
+            return groups
+
+        hasFTS3 = self.db.mainHasTable(self.PROVIDES + '_Text')
+        if not hasFTS3:
+            simpleTable = self.db.tables[self.PROVIDES]
+        else:
+            simpleTable = self.db.tables[self.PROVIDES + '_Normal']
+        hasTonelessReading = (self.TONE_MARK_REGEX is not None
+            and 'ReadingToneless' in [column.name
+                for column in simpleTable.columns])
+
+        # read new entries, might raise an Exception if source not found
+        entryColumns = self.COLUMNS
+        generator = self.getGenerator()
+        if hasTonelessReading:
+            entryColumns = entryColumns + ['ReadingToneless']
+            generator = self._iterWithTonelessReading(generator)
+        entryTable = Table(self.PROVIDES, MetaData(),
+            *[Column(column) for column in entryColumns])
+        newEntries = list(self._iterEntries(entryTable, generator))
+        newGroups = groupEntries(newEntries)
+
+        hasTranslationIndex = (not hasFTS3
+            and self.db.mainHasTable(self.PROVIDES + '_Senses'))
+        rowIdColumn = literal_column('rowid')
+        if not hasFTS3:
+            table = simpleTable
+            oldEntries = self.db.selectRows(select([rowIdColumn]
+                + [table.c[column] for column in self.COLUMNS]))
+        else:
+            fts3Table = self.db.tables[self.PROVIDES + '_Text']
+            preparer = self.db.engine.dialect.identifier_preparer
+            simpleRowId, fts3RowId = [literal_column('%s.rowid'
+                % preparer.format_table(fromTable))
+                for fromTable in (simpleTable, fts3Table)]
+            columns = [simpleRowId]
+            for column in self.COLUMNS:
+                if column in self.FULLTEXT_COLUMNS:
+                    columns.append(fts3Table.c[column])
+                else:
+                    columns.append(simpleTable.c[column])
+            oldEntries = self.db.selectRows(select(columns,
+                from_obj=simpleTable.join(fts3Table, simpleRowId == fts3RowId)))
+        oldRowIds = {}
+        for entry in oldEntries:
+            key = tuple(entry[1:len(keyColumns) + 1])
+            oldRowIds.setdefault(key, []).append(entry[0])
+        oldEntries = [entry[1:] for entry in oldEntries]
+        oldGroups = groupEntries(dict(zip(self.COLUMNS, entry))
+            for entry in oldEntries)
+
+        # compare entries sharing the same key
+        insertKeys = []
+        deleteKeys = []
+        updateKeys = []
+        for key in set(oldGroups) | set(newGroups):
+            oldValues = sorted(oldGroups.get(key, []))
+            newValues = sorted(newGroups.get(key, []))
+            if oldValues == newValues:
+                continue
+            elif len(oldValues) == 1 and len(newValues) == 1:
+                updateKeys.append(key)
+            else:
+                if oldValues:
+                    deleteKeys.append(key)
+                if newValues:
+                    insertKeys.append(key)
+
+        insertKeySet = set(insertKeys)
+        insertEntries = [entry for entry in newEntries
+            if tuple(entry[column] for column in keyColumns) in insertKeySet]
+
+        transaction = self.db.connection.begin()
+        try:
+            if not hasFTS3:
+                if hasTranslationIndex:
+                    self._deleteTranslationIndex([rowId
+                        for key in deleteKeys + updateKeys
+                        for rowId in oldRowIds[key]])
+                # target rows by row id, keys are compared case sensitively
+                #   while columns might have a case insensitive collation
+                for key in deleteKeys:
+                    self.db.execute(table.delete().where(
+                        rowIdColumn.in_(oldRowIds[key])))
+                for key in updateKeys:
+                    value, = newGroups[key]
+                    self.db.execute(table.update().where(
+                        rowIdColumn == oldRowIds[key][0]).values(
+                            dict(zip(valueColumns, value))))
+                # new rows get row ids above the current maximum
+                lastRowId = self.db.selectScalar(select(
+                    [func.max(rowIdColumn)], from_obj=table)) or 0
+                if insertEntries:
+                    self.db.execute(table.insert(), insertEntries)
+                if hasTranslationIndex:
+                    translationIdx = valueColumns.index('Translation')
+                    senseRows = [(oldRowIds[key][0],
+                        newGroups[key][0][translationIdx])
+                        for key in updateKeys]
+                    senseRows.extend(self.db.selectRows(
+                        select([rowIdColumn, table.c.Translation],
+                            rowIdColumn > lastRowId)))
+                    self._insertTranslationIndex(senseRows)
+            else:
+                for key in deleteKeys:
+                    for fromTable in (simpleTable, fts3Table):
+                        self.db.execute(fromTable.delete().where(
+                            literal_column('rowid').in_(oldRowIds[key])))
+                for key in updateKeys:
+                    value, = newGroups[key]
+                    values = dict(zip(valueColumns, value))
+                    for toTable in (simpleTable, fts3Table):
+                        tableValues = dict((column.name, values[column.name])
+                            for column in toTable.columns
+                            if column.name in values)
+                        if tableValues:
+                            self.db.execute(toTable.update()
+                                .where(literal_column('rowid')
+                                    == oldRowIds[key][0])
+                                .values(tableValues))
+                self.insertFTS3Tables(self.PROVIDES, iter(insertEntries),
+                    entryColumns, self.FULLTEXT_COLUMNS)
+
+            wordTableName = self.PROVIDES + '_Words'
+            if self.db.mainHasTable(wordTableName):
+                self._updateWordIndex(self.db.tables[wordTableName],
+                    newEntries, deleteKeys + insertKeys + updateKeys)
+
+            transaction.commit()
+        except:
+            transaction.rollback()
+            raise
+
+        return len(insertEntries), sum(len(oldGroups[key])
+            for key in deleteKeys), len(updateKeys)
+
+    def _updateWordIndex(self, wordTable, newEntries, changedKeys):
+        """
+        Renews the word index entries of changed dictionary entries.
+
+        :type wordTable: object
+        :param wordTable: SQLAlchemy table of the word index
+        :type newEntries: list of dict
+        :param newEntries: all entries of the source file
+        :type changedKeys: list of tuple
+        :param changedKeys: keys of changed entries
+        """
+        # words are shared between all entries of same headword and reading,
+        #   the word index is not indexed by headword so renew all words of
+        #   a headword with few table scans
+        headwordIdx = self.ENTRY_KEY_COLUMNS.index(self.WORD_INDEX_HEADWORD)
+        headwords = set(key[headwordIdx] for key in changedKeys)
+        if not headwords:
+            return
+
+        headwordList = list(headwords)
+        # stay below the limit of bound parameters
+        for i in range(0, len(headwordList), 500):
+            self.db.execute(wordTable.delete().where(
+                wordTable.c.Headword.in_(headwordList[i:i+500])))
+
+        wordEntryGenerator = WordIndexBuilder.WordEntryGenerator([])
+        wordEntries = []
+        for entry in newEntries:
+            headword = entry[self.WORD_INDEX_HEADWORD]
+            if headword in headwords:
+                wordEntries.extend(wordEntryGenerator.getWordEntries(
+                    headword, entry['Reading'], entry['Translation']))
+        if wordEntries:
+            self.db.execute(wordTable.insert(), wordEntries)
+
 
 class WordIndexBuilder(EntryGeneratorBuilder):
     """
@@ -3468,25 +4334,42 @@ class WordIndexBuilder(EntryGeneratorBuilder):
             #   enough
             self.wordRegex = re.compile(r'\([^\)]+\)|' \
                 + r'(?:; Bsp.: [^/]+?--[^/]+)|([^/,\(\)\[\]\!\?]+)')
+            # remember seen entries to prevent double entries
+            self.seenWordEntries = set()
+
+        def getWordEntries(self, headword, reading, translation):
+            """
+            Gets the word entries for a single dictionary entry, omitting
+            words already seen for the same headword and reading.
+
+            .. versionadded:: 0.3.1
+
+            :type headword: str
+            :param headword: headword of dictionary entry
+            :type reading: str
+            :param reading: reading of dictionary entry
+            :type translation: str
+            :param translation: translation of dictionary entry
+            :rtype: list of dict
+            :return: word entries
+            """
+            wordEntries = []
+            for word in self.wordRegex.findall(translation):
+                word = word.strip().lower()
+                if not word:
+                    continue
+                if (headword, reading, word) not in self.seenWordEntries:
+                    self.seenWordEntries.add((headword, reading, word))
+                    wordEntries.append({'Headword': headword,
+                        'Reading': reading, 'Word': word})
+            return wordEntries
 
         def generator(self):
             """Provides all data of one word per entry."""
-            # remember seen entries to prevent double entries
-            seenWordEntries = set()
-            newEntryDict = {}
-
             for headword, reading, translation in self.entries:
-                newEntryDict['Headword'] = headword
-                newEntryDict['Reading'] = reading
-                for word in self.wordRegex.findall(translation):
-                    word = word.strip().lower()
-                    if not word:
-                        continue
-                    if word \
-                        and (headword, reading, word) not in seenWordEntries:
-                        seenWordEntries.add((headword, reading, word))
-                        newEntryDict['Word'] = word
-                        yield newEntryDict
+                for wordEntry in self.getWordEntries(headword, reading,
+                    translation):
+                    yield wordEntry
 
     COLUMNS = ['Headword', 'Reading', 'Word']
     COLUMN_TYPES = {'Headword': String(255), 'Reading': String(255),
@@ -3550,11 +4433,15 @@ class CEDICTFormatBuilder(EDICTFormatBuilder):
     INDEX_KEYS = [['HeadwordTraditional'], ['HeadwordSimplified'], ['Reading']]
     COLUMN_TYPES = {'HeadwordTraditional': String(255),
         'HeadwordSimplified': String(255), 'Reading': String(255),
-        'Translation': Text()}
-    COLUMNS_WITH_COLLATION = ['Reading', 'Translation']
+        'ReadingToneless': String(255), 'Translation': Text()}
+    COLUMNS_WITH_COLLATION = ['Reading', 'ReadingToneless', 'Translation']
+    WORD_INDEX_HEADWORD = 'HeadwordTraditional'
+    ENTRY_KEY_COLUMNS = ['HeadwordTraditional', 'HeadwordSimplified',
+        'Reading']
 
     ENTRY_REGEX = re.compile(
         r'\s*(\S+)(?:\s+(\S+))?\s*\[([^\]]*)\]\s*(/.*/)\s*$')
+    TONE_MARK_REGEX = re.compile(r'(?<=\S)[1-5](?=\s|$)')
 
 
 class CEDICTBuilder(CEDICTFormatBuilder):
@@ -3908,6 +4795,12 @@ class SimpleWenlinFormatBuilder(EntryGeneratorBuilder):
             return super(SimpleWenlinFormatBuilder,
                 cls).getOptionMetaData(option)
 
+    def getSourceFiles(self):
+        if self.filePath:
+            return [self.filePath]
+        else:
+            return [self.findFile(self.FILE_NAMES)]
+
     def getGenerator(self):
         def prependLineGenerator(line, data):
             """
@@ -3918,10 +4811,7 @@ class SimpleWenlinFormatBuilder(EntryGeneratorBuilder):
                 yield nextLine
 
         # get file handle
-        if self.filePath:
-            filePath =  self.filePath
-        else:
-            filePath = self.findFile(self.FILE_NAMES)
+        filePath, = self.getSourceFiles()
 
         handle = self.getFileHandle(filePath)
         if not self.quiet:
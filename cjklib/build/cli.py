@@ -61,7 +61,7 @@ format --BuilderName-option or --TableName-option, e.g.
             'KangxiRadicalIsolatedCharacter', 'RadicalEquivalentCharacter',
             'Strokes', 'StrokeOrder', 'CharacterDecomposition',
             'LocaleCharacterGlyph', 'StrokeCount', 'ComponentLookup',
-            'CharacterRadicalResidualStrokeCount'],
+            'StrokeOrderLookup', 'CharacterRadicalResidualStrokeCount'],
         'UnihanCharacterSets': ['IICoreSet', 'GB2312Set', 'BIG5Set',
             'HKSCSSet', 'BIG5HKSCSSet', 'JISX0208Set', 'JISX0208_0213Set'],
         'UnihanData': ['UnihanCharacterSets', 'CharacterKangxiRadical',
@@ -89,7 +89,7 @@ format --BuilderName-option or --TableName-option, e.g.
             'CharacterResidualStrokeCount'],
         'ShapeLookupData': ['Strokes', 'StrokeOrder', 'CharacterDecomposition',
             'LocaleCharacterGlyph', 'StrokeCount', 'ComponentLookup',
-            'CharacterVariant', 'Glyphs'],
+            'StrokeOrderLookup', 'CharacterVariant', 'Glyphs'],
         'CharacterDomains': ['UnihanCharacterSets', 'GlyphInformationSet'],
         'cjklibData': ['Readings', 'SupportedCharacterReadings',
             'KangxiRadicalData', 'ShapeLookupData', 'CharacterDomains'],
@@ -301,6 +301,9 @@ along with cjklib.  If not, see <http://www.gnu.org/licenses/>.""" \
         parser.add_option("-r", "--rebuild", action="store_true",
             dest="rebuildExisting", default=False,
             help="build tables even if they already exist")
+        parser.add_option("-i", "--incremental", action="store_true",
+            dest="incremental", default=False,
+            help="rebuild existing tables if their data or options changed")
         parser.add_option("-d", "--keepDepending", action="store_false",
             dest="rebuildDepending", default=True,
             help="don't rebuild build-depends tables that are not given")
@@ -308,8 +311,31 @@ along with cjklib.  If not, see <http://www.gnu.org/licenses/>.""" \
             metavar="BUILDER", dest="prefer",
             help="builder preferred where several provide the same table" \
                 + " [default: %s]" % defaults.get("prefer", []))
+        parser.add_option("-j", "--jobs", action="store", type="int",
+            metavar="N", dest="jobs", default=1,
+            help="number of tables built in parallel, SQLite only"
+                " [default: %default]")
+        parser.add_option("--bulkLoad", action="store_true",
+            dest="bulkLoad", default=False,
+            help="build with fast but unsafe settings, SQLite only")
+        parser.add_option("--optimize", action="store_true", dest="optimize",
+            default=False,
+            help="analyze and compact the database after building")
+        parser.add_option("--optimizeInto", action="store", metavar="FILE",
+            dest="optimizeInto",
+            help="write an analyzed and compacted read-only copy of the"
+                " database to FILE after building, SQLite only")
+        parser.add_option("--pageSize", action="store", type="int",
+            metavar="BYTES", dest="pageSize",
+            help="page size of the optimized database, SQLite only")
         parser.add_option("-q", "--quiet", action="store_true", dest="quiet",
             default=False, help="don't print anything on stdout")
+        parser.add_option("--stats", action="store_true", dest="stats",
+            default=False, help="print timing statistics per built table")
+        parser.add_option("--stats-json", action="store", metavar="FILE",
+            dest="statsJson",
+            help="write timing statistics as JSON to FILE, '-' for stdout"
+                " with status messages moved to stderr")
         parser.add_option("--database", action="store", metavar="URL",
             dest="databaseUrl", default=defaults.get("databaseUrl", None),
             help="database url [default: %default]")
@@ -325,8 +351,9 @@ along with cjklib.  If not, see <http://www.gnu.org/licenses/>.""" \
             dest="ignoreConfig", default=False,
             help="ignore settings from cjklib.conf")
 
-        optionSet = set(['rebuildExisting', 'rebuildDepending', 'quiet',
-            'databaseUrl', 'attach', 'prefer'])
+        optionSet = set(['rebuildExisting', 'rebuildDepending', 'jobs',
+            'incremental', 'bulkLoad', 'optimize', 'optimizeInto', 'pageSize',
+            'quiet', 'stats', 'statsJson', 'databaseUrl', 'attach', 'prefer'])
         globalBuilderGroup = OptionGroup(parser, "Global builder commands")
         localBuilderGroup = OptionGroup(parser, "Local builder commands")
         for builder in build.DatabaseBuilder.getTableBuilderClasses():
@@ -442,9 +469,85 @@ along with cjklib.  If not, see <http://www.gnu.org/licenses/>.""" \
 
         return [clss.__name__ for clss in dbPreferClasses]
 
+    def printStatistics(self, statistics, output=None):
+        """
+        Prints a table of build statistics.
+
+        :type statistics: list of dict
+        :param statistics: build statistics as given by
+            :meth:`~cjklib.build.DatabaseBuilder.getBuildStatistics`
+        :type output: file
+        :param output: file to print to, defaults to stdout
+        """
+        output = output or sys.stdout
+
+        def formatNumber(value, formatString):
+            if value is None:
+                return '-'
+            return formatString % value
+
+        phases = ['parse', 'insert', 'index', 'merge']
+        usedPhases = [phase for phase in phases
+            if [stats for stats in statistics if phase in stats['phases']]]
+
+        header = ['Table', 'Rows', 'Time', 'Rows/s'] \
+            + [phase.capitalize() for phase in usedPhases] + ['Memory+']
+        lines = []
+        for stats in statistics:
+            line = [stats['table'], formatNumber(stats['rows'], '%d'),
+                '%.2fs' % stats['seconds'],
+                formatNumber(stats['rowsPerSecond'], '%d')]
+            line.extend(formatNumber(stats['phases'].get(phase), '%.2fs')
+                for phase in usedPhases)
+            if stats['peakMemoryIncrease'] is None:
+                line.append('-')
+            else:
+                line.append('%.1fM' % (stats['peakMemoryIncrease'] / 1024.))
+            lines.append(line)
+
+        widths = [max(len(line[i]) for line in [header] + lines)
+            for i in range(len(header))]
+        for line in [header] + lines:
+            print >> output, ' '.join([line[0].ljust(widths[0])]
+                + [entry.rjust(widths[i + 1]) for i, entry
+                    in enumerate(line[1:])])
+
+    def writeStatisticsJSON(self, statistics, filePath):
+        """
+        Writes build statistics as JSON.
+
+        :type statistics: list of dict
+        :param statistics: build statistics as given by
+            :meth:`~cjklib.build.DatabaseBuilder.getBuildStatistics`
+        :type filePath: str
+        :param filePath: path of output file, ``'-'`` for stdout
+        """
+        # json is only available from Python 2.6
+        import json
+
+        if filePath == '-':
+            json.dump(statistics, sys.stdout, indent=2, sort_keys=True)
+            print
+        else:
+            f = open(filePath, 'w')
+            try:
+                json.dump(statistics, f, indent=2, sort_keys=True)
+            finally:
+                f.close()
+
     def runBuild(self, buildGroupList, options):
         if not buildGroupList:
             return
+        printStatistics = options.pop('stats', False)
+        statisticsFile = options.pop('statsJson', None)
+        optimize = options.pop('optimize', False)
+        optimizeInto = options.pop('optimizeInto', None)
+        pageSize = options.pop('pageSize', None)
+        # keep stdout clean for statistics written to it as JSON
+        if statisticsFile == '-':
+            statusOutput = sys.stderr
+        else:
+            statusOutput = sys.stdout
         buildGroupList = set(buildGroupList)
         # by default fail if a table couldn't be built
         options['noFail'] = False
@@ -504,7 +607,16 @@ along with cjklib.  If not, see <http://www.gnu.org/licenses/>.""" \
         try:
             dbBuilder.build(groups)
 
-            print "finished"
+            if optimize or optimizeInto:
+                if not dbBuilder.isOptimizable():
+                    print >> sys.stderr, \
+                        "Error: database does not support optimization"
+                    return False
+                if not options.get('quiet', False):
+                    print >> statusOutput, "optimizing"
+                dbBuilder.optimize(pageSize=pageSize, targetFile=optimizeInto)
+
+            print >> statusOutput, "finished"
         except exception.UnsupportedError, e:
             print >> sys.stderr, \
                 "Error building local tables, some names do not exist: %s" % e
@@ -519,6 +631,12 @@ along with cjklib.  If not, see <http://www.gnu.org/licenses/>.""" \
                     "Interrupted while cleaning temporary tables"
             return False
 
+        statistics = dbBuilder.getBuildStatistics()
+        if printStatistics:
+            self.printStatistics(statistics, statusOutput)
+        if statisticsFile:
+            self.writeStatisticsJSON(statistics, statisticsFile)
+
         return True
 
     def run(self):
@@ -20,8 +20,9 @@ Chinese character based functions.
 """
 __all__ = ["CharacterLookup"]
 
-import math
-from sqlalchemy import select, union
+import sys
+import time
+from sqlalchemy import select, union, bindparam
 from sqlalchemy.sql import and_, or_
 
 from cjklib import reading
@@ -76,8 +77,18 @@ class CharacterLookup(object):
     see ``Scripts.txt`` from Unicode
     """
 
+    SNAPSHOT_TABLES = ['CharacterPinyin', 'CharacterJyutping',
+        'CharacterHangul', 'CharacterShanghaineseIPA', 'CharacterVariant',
+        'LocaleCharacterGlyph', 'Glyphs', 'StrokeCount', 'StrokeOrder',
+        'StrokeOrderLookup', 'CharacterDecomposition',
+        'CharacterKangxiRadical']
+    """
+    Tables loaded into memory when creating an instance with option
+    ``snapshot``. Tables missing from the database are skipped.
+    """
+
     def __init__(self, locale, characterDomain="Unicode", databaseUrl=None,
-        dbConnectInst=None):
+        dbConnectInst=None, snapshot=False, componentIndex=False):
         """
         If no parameters are given default values are assumed for the connection
         to the database. The database connection parameters can be given in
@@ -97,6 +108,20 @@ class CharacterLookup(object):
         :type dbConnectInst: instance
         :param dbConnectInst: instance of a
             :class:`~cjklib.dbconnector.DatabaseConnector`
+        :type snapshot: bool
+        :param snapshot: if ``True`` the tables given in
+            :attr:`~CharacterLookup.SNAPSHOT_TABLES` are loaded into memory
+            and lookups are answered without querying the database. Memory
+            usage and loading time are reported in
+            :attr:`~CharacterLookup.snapshotSize` and
+            :attr:`~CharacterLookup.snapshotLoadTime`.
+        :type componentIndex: bool
+        :param componentIndex: if ``True`` an inverted index over table
+            ``ComponentLookup`` is built on first use and component based
+            searches are answered from memory.
+
+        .. versionadded:: 0.3.1
+           Options ``snapshot`` and ``componentIndex``.
         """
         if locale not in set('TCJKV'):
             raise ValueError('Locale not one out of TCJKV: ' + repr(locale))
@@ -119,6 +144,20 @@ class CharacterLookup(object):
         """``True`` if table ``ComponentLookup`` exists"""
         self.hasStrokeCount = self.db.hasTable('StrokeCount')
         """``True`` if table ``StrokeCount`` exists"""
+        self.hasStrokeOrderLookup = self.db.hasTable('StrokeOrderLookup')
+        """``True`` if table ``StrokeOrderLookup`` exists"""
+        self._hasPartialStrokeOrderLookup = None
+
+        self._snapshot = None
+        self.snapshotSize = None
+        """Approximate memory usage of the snapshot in bytes if supported"""
+        self.snapshotLoadTime = None
+        """Time in seconds needed to load the snapshot"""
+        if snapshot:
+            self._loadSnapshot()
+
+        self._useComponentIndex = componentIndex
+        self._componentIndex = None
 
     def _getReadingFactory(self):
         """
@@ -132,6 +171,199 @@ class CharacterLookup(object):
             self._readingFactory = reading.ReadingFactory(dbConnectInst=self.db)
         return self._readingFactory
 
+    #{ In-memory snapshot
+
+    def _loadSnapshot(self):
+        """
+        Loads the tables given in :attr:`~CharacterLookup.SNAPSHOT_TABLES`
+        into dictionaries keyed by character, or by character and *glyph*.
+        Values keep the order the lookup methods request from the database.
+        """
+        startTime = time.time()
+
+        snapshot = {}
+        for tableName in self.SNAPSHOT_TABLES:
+            if not self.db.hasTable(tableName):
+                continue
+            table = self.db.tables[tableName]
+
+            if tableName in ('CharacterPinyin', 'CharacterJyutping',
+                'CharacterHangul', 'CharacterShanghaineseIPA'):
+                readingLookup = {}
+                for char, readingString in self.db.iterRows(
+                    select([table.c.ChineseCharacter, table.c.Reading])\
+                        .order_by(table.c.Reading)):
+                    readingLookup.setdefault(char, []).append(readingString)
+                characterLookup = {}
+                for readingString, char in self.db.iterRows(
+                    select([table.c.Reading, table.c.ChineseCharacter])\
+                        .order_by(table.c.ChineseCharacter)):
+                    characterLookup.setdefault(readingString, []).append(char)
+                snapshot[tableName] = (readingLookup, characterLookup)
+
+            elif tableName == 'CharacterVariant':
+                lookup = {}
+                for char, variant, variantType in self.db.iterRows(
+                    select([table.c.ChineseCharacter, table.c.Variant,
+                        table.c.Type]).order_by(table.c.Variant,
+                            table.c.Type)):
+                    lookup.setdefault(char, []).append((variant, variantType))
+                snapshot[tableName] = lookup
+
+            elif tableName == 'LocaleCharacterGlyph':
+                lookup = {}
+                for char, glyph, locale in self.db.iterRows(
+                    select([table.c.ChineseCharacter, table.c.Glyph,
+                        table.c.Locale]).order_by(table.c.Glyph)):
+                    lookup.setdefault(char, []).append((glyph, locale))
+                snapshot[tableName] = lookup
+
+            elif tableName == 'Glyphs':
+                lookup = {}
+                for char, glyph in self.db.iterRows(
+                    select([table.c.ChineseCharacter, table.c.Glyph])\
+                        .order_by(table.c.Glyph)):
+                    lookup.setdefault(char, []).append(glyph)
+                snapshot[tableName] = lookup
+
+            elif tableName in ('StrokeCount', 'StrokeOrder'):
+                lookup = {}
+                for char, glyph, value in self.db.iterRows(
+                    select([table.c.ChineseCharacter, table.c.Glyph,
+                        table.c[tableName]])):
+                    lookup.setdefault((char, glyph), value)
+                snapshot[tableName] = lookup
+
+            elif tableName == 'StrokeOrderLookup':
+                lookup = {}
+                for char, glyph, strokeOrder, partialStrokeOrder \
+                    in self.db.iterRows(select([table.c.ChineseCharacter,
+                        table.c.Glyph, table.c.StrokeOrder,
+                        table.c.PartialStrokeOrder])):
+                    lookup[(char, glyph)] = (strokeOrder, partialStrokeOrder)
+                snapshot[tableName] = lookup
+
+            elif tableName == 'CharacterDecomposition':
+                lookup = {}
+                for char, glyph, decomposition in self.db.iterRows(
+                    select([table.c.ChineseCharacter, table.c.Glyph,
+                        table.c.Decomposition]).order_by(table.c.SubIndex)):
+                    lookup.setdefault((char, glyph), []).append(decomposition)
+                snapshot[tableName] = lookup
+
+            elif tableName == 'CharacterKangxiRadical':
+                lookup = {}
+                for char, radicalIndex in self.db.iterRows(
+                    select([table.c.ChineseCharacter, table.c.RadicalIndex])):
+                    lookup.setdefault(char, radicalIndex)
+                snapshot[tableName] = lookup
+
+        self._snapshot = snapshot
+        self.snapshotLoadTime = time.time() - startTime
+        self.snapshotSize = _getObjectSize(snapshot)
+
+    def _getSnapshotTable(self, tableName):
+        """
+        Gets the in-memory representation of the given table.
+
+        :type tableName: str
+        :param tableName: name of table
+        :rtype: dict
+        :return: table content or ``None`` if no snapshot exists for the
+            given table
+        """
+        if self._snapshot is None:
+            return None
+        return self._snapshot.get(tableName, None)
+
+    def _getComponentIndex(self):
+        """
+        Gets the inverted index over table ``ComponentLookup``, building it on
+        first access.
+
+        Each pair of character and *glyph* is given an integer id. The index
+        maps components and characters to the set of ids they occur with, so
+        that searches reduce to set unions and intersections.
+
+        :rtype: dict
+        :return: component index
+        """
+        if self._componentIndex is None:
+            lookupTable = self.db.tables['ComponentLookup']
+
+            entryIds = {}
+            entries = []
+            componentIds = {}
+            characterIds = {}
+            for char, glyph, component in self.db.iterRows(
+                select([lookupTable.c.ChineseCharacter, lookupTable.c.Glyph,
+                    lookupTable.c.Component]).order_by(
+                        lookupTable.c.ChineseCharacter, lookupTable.c.Glyph)):
+                entryId = entryIds.get((char, glyph), None)
+                if entryId is None:
+                    entryId = entryIds[(char, glyph)] = len(entries)
+                    entries.append((char, glyph))
+                    characterIds.setdefault(char, set()).add(entryId)
+                componentIds.setdefault(component, set()).add(entryId)
+
+            strokeCounts = [None] * len(entries)
+            if self.hasStrokeCount:
+                strokeCountTable = self.db.tables['StrokeCount']
+                for char, glyph, strokeCount in self.db.iterRows(
+                    select([strokeCountTable.c.ChineseCharacter,
+                        strokeCountTable.c.Glyph,
+                        strokeCountTable.c.StrokeCount])):
+                    entryId = entryIds.get((char, glyph), None)
+                    if entryId is not None:
+                        strokeCounts[entryId] = strokeCount
+
+            self._componentIndex = {
+                'entryIds': entryIds,
+                'entries': entries,
+                'components': dict((component, frozenset(ids))
+                    for component, ids in componentIds.items()),
+                'characters': dict((char, frozenset(ids))
+                    for char, ids in characterIds.items()),
+                'strokeCounts': strokeCounts,
+                'localeIds': {},
+                }
+        return self._componentIndex
+
+    def _getComponentIndexLocaleIds(self, locale):
+        """
+        Gets the ids of all entries from the component index whose *glyph*
+        is valid for the given *character locale*. Entries without an entry
+        in table ``LocaleCharacterGlyph`` are valid for all locales.
+
+        :type locale: str
+        :param locale: *character locale* (one out of TCJKV)
+        :rtype: frozenset
+        :return: set of entry ids
+        """
+        index = self._getComponentIndex()
+        locale = locale.upper()
+        if locale not in index['localeIds']:
+            localeTable = self.db.tables['LocaleCharacterGlyph']
+            excludedIds = set()
+            includedIds = set()
+            for char, glyph, glyphLocale in self.db.iterRows(
+                select([localeTable.c.ChineseCharacter, localeTable.c.Glyph,
+                    localeTable.c.Locale])):
+                entryId = index['entryIds'].get((char, glyph), None)
+                if entryId is None:
+                    continue
+                if locale in glyphLocale.upper():
+                    includedIds.add(entryId)
+                else:
+                    excludedIds.add(entryId)
+            excludedIds -= includedIds
+            index['localeIds'][locale] = frozenset(
+                entryId for entryId in range(len(index['entries']))
+                    if entryId not in excludedIds)
+        return index['localeIds'][locale]
+
+    #}
+
     #{ Character domains
 
     def getCharacterDomain(self):
@@ -162,12 +394,32 @@ class CharacterLookup(object):
                             + "has no column 'ChineseCharacter'")
 
             self._characterDomain = characterDomain
+            self._domainCharacterSet = None
         else:
             raise ValueError("Unknown character domain '%s'" % characterDomain)
 
     characterDomain = property(getCharacterDomain, setCharacterDomain, None,
         """current *character domain*""")
 
+    def _getDomainCharacterSet(self):
+        """
+        Gets the set of characters inside the current *character domain*. The
+        content of domain tables is loaded on first access.
+
+        :rtype: instance
+        :return: a :class:`~cjklib.util.CharacterRangeSet` instance
+        """
+        if self._domainCharacterSet is None:
+            if self.getCharacterDomain() == 'Unicode':
+                self._domainCharacterSet = util.CharacterRangeSet(
+                    self.HAN_SCRIPT_RANGES)
+            else:
+                self._domainCharacterSet \
+                    = util.CharacterRangeSet.fromCharacters(
+                        self.db.iterScalars(select(
+                            [self._characterDomainTable.c.ChineseCharacter])))
+        return self._domainCharacterSet
+
     def getDomainCharacterIterator(self):
         """
         Returns an iterator over the full set of domain characters.
@@ -192,27 +444,8 @@ class CharacterLookup(object):
         :return: list of characters inside the current *character domain*
         """
         # constrain to selected character domain
-        if self.getCharacterDomain() == 'Unicode':
-            charSet = set(charList)
-            filteredCharList = set()
-            for char in self.getDomainCharacterIterator():
-                if char in charSet:
-                    filteredCharList.add(char)
-        else:
-            filteredCharList = set()
-            # break down into small chunks
-            for i in range(int(math.ceil(len(charList) / 500.0))):
-                charListPart = charList[i*500:(i+1)*500]
-                filteredCharList.update(self.db.selectScalars(select(
-                    [self._characterDomainTable.c.ChineseCharacter],
-                    self._characterDomainTable.c.ChineseCharacter.in_(
-                        charListPart))))
-        # sort
-        sortedFiltered = []
-        for char in charList:
-            if char in filteredCharList:
-                sortedFiltered.append(char)
-        return sortedFiltered
+        domainCharacterSet = self._getDomainCharacterSet()
+        return [char for char in charList if char in domainCharacterSet]
 
     def isCharacterInDomain(self, char):
         """
@@ -224,7 +457,7 @@ class CharacterLookup(object):
         :return: ``True`` if character is inside the current character domain,
             ``False`` otherwise.
         """
-        return char in self.filterDomainCharacters([char])
+        return char in self._getDomainCharacterSet()
 
     def getAvailableCharacterDomains(self):
         """
@@ -288,6 +521,15 @@ class CharacterLookup(object):
                 targetOptions=compatOptions)
 
         # lookup characters
+        snapshotTable = self._getSnapshotTable(tableName)
+        if snapshotTable is not None:
+            _, characterLookup = snapshotTable
+            chars = characterLookup.get(readingString, [])
+            if self.getCharacterDomain() == 'Unicode':
+                return chars[:]
+            else:
+                return self.filterDomainCharacters(chars)
+
         table = self.db.tables[tableName]
 
         # constrain to selected character domain
@@ -336,9 +578,14 @@ class CharacterLookup(object):
         readingFactory = self._getReadingFactory()
 
         # lookup readings
-        table = self.db.tables[tableName]
-        readings = self.db.selectScalars(select([table.c.Reading],
-            table.c.ChineseCharacter==char).order_by(table.c.Reading))
+        snapshotTable = self._getSnapshotTable(tableName)
+        if snapshotTable is not None:
+            readingLookup, _ = snapshotTable
+            readings = readingLookup.get(char, [])[:]
+        else:
+            table = self.db.tables[tableName]
+            readings = self.db.selectScalars(select([table.c.Reading],
+                table.c.ChineseCharacter==char).order_by(table.c.Reading))
 
         # check if we need to convert reading
         if compatReading != readingN \
@@ -498,18 +745,37 @@ class CharacterLookup(object):
         if not variantType in set('CMPZST'):
             raise ValueError("'%s' is not a valid variant type" % variantType)
 
+        snapshotTable = self._getSnapshotTable('CharacterVariant')
+        if snapshotTable is not None:
+            variants = [variant for variant, vType \
+                in snapshotTable.get(char, []) if vType == variantType]
+            if self.getCharacterDomain() == 'Unicode':
+                return variants
+            else:
+                return self.filterDomainCharacters(variants)
+
         table = self.db.tables['CharacterVariant']
-        # constrain to selected character domain
-        if self.getCharacterDomain() == 'Unicode':
-            fromObj = []
-        else:
-            fromObj = [table.join(self._characterDomainTable, table.c.Variant
-                == self._characterDomainTable.c.ChineseCharacter)]
+        def getStatement():
+            # constrain to selected character domain
+            if self.getCharacterDomain() == 'Unicode':
+                fromObj = []
+            else:
+                fromObj = [table.join(self._characterDomainTable,
+                    table.c.Variant
+                        == self._characterDomainTable.c.ChineseCharacter)]
 
-        return self.db.selectScalars(select([table.c.Variant],
-            and_(table.c.ChineseCharacter == char,
-                table.c.Type == variantType),
-            from_obj=fromObj).order_by(table.c.Variant))
+            return select([table.c.Variant],
+                and_(table.c.ChineseCharacter == bindparam('char',
+                        type_=table.c.ChineseCharacter.type),
+                    table.c.Type == bindparam('variantType',
+                        type_=table.c.Type.type)),
+                from_obj=fromObj).order_by(table.c.Variant)
+
+        statement = self.db.getCompiledStatement(
+            ('CharacterLookup.getCharacterVariants',
+                self.getCharacterDomain()), getStatement)
+        return self.db.selectScalars(statement, char=char,
+            variantType=variantType)
 
     def getAllCharacterVariants(self, char):
         """
@@ -528,6 +794,17 @@ class CharacterLookup(object):
         :rtype: list of tuple
         :return: list of character variant(s) with their type
         """
+        snapshotTable = self._getSnapshotTable('CharacterVariant')
+        if snapshotTable is not None:
+            variants = snapshotTable.get(char, [])
+            if self.getCharacterDomain() == 'Unicode':
+                return variants[:]
+            else:
+                domainVariants = set(self.filterDomainCharacters(
+                    [variant for variant, _ in variants]))
+                return [(variant, vType) for variant, vType in variants \
+                    if variant in domainVariants]
+
         table = self.db.tables['CharacterVariant']
         # constrain to selected character domain
         if self.getCharacterDomain() == 'Unicode':
@@ -538,7 +815,7 @@ class CharacterLookup(object):
 
         return self.db.selectRows(select([table.c.Variant, table.c.Type],
             table.c.ChineseCharacter == char,
-            from_obj=fromObj).order_by(table.c.Variant))
+            from_obj=fromObj).order_by(table.c.Variant, table.c.Type))
 
     def getDefaultGlyph(self, char):
         """
@@ -575,11 +852,27 @@ class CharacterLookup(object):
         :raise NoInformationError: if no glyph information is available
         :raise ValueError: if an invalid *character locale* is specified
         """
-        table = self.db.tables['LocaleCharacterGlyph']
-        glyph = self.db.selectScalar(select([table.c.Glyph],
-            and_(table.c.ChineseCharacter == char,
-                table.c.Locale.like(self._locale(locale))))\
-            .order_by(table.c.Glyph))
+        snapshotTable = self._getSnapshotTable('LocaleCharacterGlyph')
+        if snapshotTable is not None:
+            # validate locale
+            self._locale(locale)
+            for glyph, glyphLocale in snapshotTable.get(char, []):
+                if locale.upper() in glyphLocale.upper():
+                    break
+            else:
+                glyph = None
+        else:
+            table = self.db.tables['LocaleCharacterGlyph']
+            statement = self.db.getCompiledStatement(
+                'CharacterLookup.getLocaleDefaultGlyph',
+                lambda: select([table.c.Glyph],
+                    and_(table.c.ChineseCharacter == bindparam('char',
+                            type_=table.c.ChineseCharacter.type),
+                        table.c.Locale.like(bindparam('locale',
+                            type_=table.c.Locale.type))))\
+                    .order_by(table.c.Glyph))
+            glyph = self.db.selectScalar(statement, char=char,
+                locale=self._locale(locale))
 
         if glyph != None:
             return glyph
@@ -598,9 +891,18 @@ class CharacterLookup(object):
         :raise NoInformationError: if no glyph information is available
         """
         # return all known glyph indices, order to be deterministic
-        table = self.db.tables['Glyphs']
-        result = self.db.selectScalars(select([table.c.Glyph],
-            table.c.ChineseCharacter == char).order_by(table.c.Glyph))
+        snapshotTable = self._getSnapshotTable('Glyphs')
+        if snapshotTable is not None:
+            result = snapshotTable.get(char, [])[:]
+        else:
+            table = self.db.tables['Glyphs']
+            statement = self.db.getCompiledStatement(
+                'CharacterLookup.getCharacterGlyphs',
+                lambda: select([table.c.Glyph],
+                    table.c.ChineseCharacter == bindparam('char',
+                        type_=table.c.ChineseCharacter.type))\
+                    .order_by(table.c.Glyph))
+            result = self.db.selectScalars(statement, char=char)
         if not result:
             raise exception.NoInformationError(
                 "No glyph information available for '%s'" % char)
@@ -636,9 +938,20 @@ class CharacterLookup(object):
 
         # if table exists use it
         if self.hasStrokeCount:
-            table = self.db.tables['StrokeCount']
-            result = self.db.selectScalar(select([table.c.StrokeCount],
-                and_(table.c.ChineseCharacter == char, table.c.Glyph == glyph)))
+            snapshotTable = self._getSnapshotTable('StrokeCount')
+            if snapshotTable is not None:
+                result = snapshotTable.get((char, glyph), None)
+            else:
+                table = self.db.tables['StrokeCount']
+                statement = self.db.getCompiledStatement(
+                    'CharacterLookup.getStrokeCount',
+                    lambda: select([table.c.StrokeCount],
+                        and_(table.c.ChineseCharacter == bindparam('char',
+                                type_=table.c.ChineseCharacter.type),
+                            table.c.Glyph == bindparam('glyph',
+                                type_=table.c.Glyph.type))))
+                result = self.db.selectScalar(statement, char=char,
+                    glyph=glyph)
             if not result:
                 raise exception.NoInformationError(
                     "Character has no stroke count information")
@@ -1081,8 +1394,14 @@ class CharacterLookup(object):
         """
         if glyph == None:
             glyph = self.getDefaultGlyph(char)
-        strokeOrder = self._buildStrokeOrder(char, glyph,
-            includePartial=includePartial)
+        # if table exists use it, partial stroke orders are optional
+        if self.hasStrokeOrderLookup \
+            and (not includePartial or self._hasPartialStrokeOrders()):
+            strokeOrder = self._getStrokeOrderLookupEntry(char, glyph,
+                includePartial)
+        else:
+            strokeOrder = self._buildStrokeOrder(char, glyph,
+                includePartial=includePartial)
         if not strokeOrder:
             raise exception.NoInformationError(
                 "Character has no stroke order information")
@@ -1121,6 +1440,55 @@ class CharacterLookup(object):
 
         return strokeOrderDict
 
+    def _hasPartialStrokeOrders(self):
+        """
+        Checks if table ``StrokeOrderLookup`` was built including partial
+        stroke orders.
+
+        :rtype: bool
+        :return: ``True`` if partial stroke orders are available
+        """
+        if self._hasPartialStrokeOrderLookup is None:
+            table = self.db.tables['StrokeOrderLookup']
+            self._hasPartialStrokeOrderLookup = self.db.selectScalar(
+                select([table.c.PartialStrokeOrder],
+                    table.c.PartialStrokeOrder != None).limit(1)) is not None
+        return self._hasPartialStrokeOrderLookup
+
+    def _getStrokeOrderLookupEntry(self, char, glyph, includePartial=False):
+        """
+        Gets the stroke order sequence for the given character from the
+        database's table ``StrokeOrderLookup``.
+
+        :type char: str
+        :param char: Chinese character
+        :type glyph: int
+        :param glyph: *glyph* of the character
+        :type includePartial: bool
+        :param includePartial: if ``True`` the partial stroke order is
+            returned
+        :rtype: str
+        :return: string of stroke abbreviations separated by spaces and
+            hyphens.
+        """
+        snapshotTable = self._getSnapshotTable('StrokeOrderLookup')
+        if snapshotTable is not None:
+            entry = snapshotTable.get((char, glyph), None)
+        else:
+            table = self.db.tables['StrokeOrderLookup']
+            entry = self.db.selectRow(select([table.c.StrokeOrder,
+                table.c.PartialStrokeOrder],
+                and_(table.c.ChineseCharacter == char,
+                    table.c.Glyph == glyph)))
+        if not entry:
+            return None
+
+        strokeOrder, partialStrokeOrder = entry
+        if includePartial:
+            return partialStrokeOrder
+        else:
+            return strokeOrder
+
     def _getStrokeOrderEntry(self, char, glyph):
         """
         Gets the stroke order sequence for the given character from the
@@ -1134,10 +1502,19 @@ class CharacterLookup(object):
         :return: string of stroke abbreviations separated by spaces and
             hyphens.
         """
+        snapshotTable = self._getSnapshotTable('StrokeOrder')
+        if snapshotTable is not None:
+            return snapshotTable.get((char, glyph), None)
+
         table = self.db.tables['StrokeOrder']
-        return self.db.selectScalar(select([table.c.StrokeOrder],
-            and_(table.c.ChineseCharacter == char,
-                table.c.Glyph == glyph), distinct=True))
+        statement = self.db.getCompiledStatement(
+            'CharacterLookup._getStrokeOrderEntry',
+            lambda: select([table.c.StrokeOrder],
+                and_(table.c.ChineseCharacter == bindparam('char',
+                        type_=table.c.ChineseCharacter.type),
+                    table.c.Glyph == bindparam('glyph',
+                        type_=table.c.Glyph.type)), distinct=True))
+        return self.db.selectScalar(statement, char=char, glyph=glyph)
 
     def _buildStrokeOrder(self, char, glyph, includePartial=False, cache=None):
         """
@@ -1310,9 +1687,13 @@ class CharacterLookup(object):
         :raise NoInformationError: if no Kangxi radical index information for
             given character
         """
-        table = self.db.tables['CharacterKangxiRadical']
-        result = self.db.selectScalar(select([table.c.RadicalIndex],
-            table.c.ChineseCharacter == char))
+        snapshotTable = self._getSnapshotTable('CharacterKangxiRadical')
+        if snapshotTable is not None:
+            result = snapshotTable.get(char, None)
+        else:
+            table = self.db.tables['CharacterKangxiRadical']
+            result = self.db.selectScalar(select([table.c.RadicalIndex],
+                table.c.ChineseCharacter == char))
         if not result:
             raise exception.NoInformationError(
                 "Character has no Kangxi radical information")
@@ -2095,6 +2476,91 @@ class CharacterLookup(object):
         if not componentConstruct:
             return []
 
+        if self._useComponentIndex:
+            result = self._getCharactersForEquivalentComponentsFromIndex(
+                componentConstruct, includeAllGlyphs)
+        else:
+            result = self._selectCharactersForEquivalentComponents(
+                componentConstruct, includeAllGlyphs)
+
+        if not resultIncludeRadicalForms:
+            # exclude radical characters found in decomposition
+            result = [(char, glyph) for char, glyph in result \
+                if not self.isRadicalChar(char)]
+
+        return result
+
+    def _getCharactersForEquivalentComponentsFromIndex(self,
+        componentConstruct, includeAllGlyphs):
+        """
+        Gets all characters that contain at least one component per list
+        entry using the in-memory component index.
+
+        :type componentConstruct: list of list of str
+        :param componentConstruct: list of character components given as single
+            characters or, for alternative characters, given as a list
+        :type includeAllGlyphs: bool
+        :param includeAllGlyphs: if ``True`` all matches will be returned, if
+            ``False`` only those with glyphs matching the locale's default one
+            will be returned
+        :rtype: list of tuple
+        :return: list of pairs of matching characters and their *glyphs*
+        """
+        index = self._getComponentIndex()
+
+        # union of matches per entry, also include 米 for [u'米', u'木']
+        candidateSets = []
+        for characterList in componentConstruct:
+            entryIds = set()
+            for char in characterList:
+                entryIds.update(index['components'].get(char, ()))
+                entryIds.update(index['characters'].get(char, ()))
+            if not entryIds:
+                return []
+            candidateSets.append(entryIds)
+
+        # intersect starting with the smallest set
+        candidateSets.sort(key=len)
+        resultIds = candidateSets[0]
+        for entryIds in candidateSets[1:]:
+            resultIds = resultIds & entryIds
+            if not resultIds:
+                return []
+
+        if not includeAllGlyphs:
+            resultIds = resultIds & self._getComponentIndexLocaleIds(
+                self.locale)
+
+        entries = index['entries']
+        if self.getCharacterDomain() != 'Unicode':
+            domainSet = self._getDomainCharacterSet()
+            resultIds = [entryId for entryId in resultIds
+                if entries[entryId][0] in domainSet]
+
+        # sort by stroke count, missing counts first as in the SQL lookup
+        strokeCounts = index['strokeCounts']
+        def sortKey(entryId):
+            strokeCount = strokeCounts[entryId]
+            return (strokeCount is not None, strokeCount, entryId)
+
+        return [entries[entryId] for entryId in sorted(resultIds, key=sortKey)]
+
+    def _selectCharactersForEquivalentComponents(self, componentConstruct,
+        includeAllGlyphs):
+        """
+        Gets all characters that contain at least one component per list
+        entry querying the database.
+
+        :type componentConstruct: list of list of str
+        :param componentConstruct: list of character components given as single
+            characters or, for alternative characters, given as a list
+        :type includeAllGlyphs: bool
+        :param includeAllGlyphs: if ``True`` all matches will be returned, if
+            ``False`` only those with glyphs matching the locale's default one
+            will be returned
+        :rtype: list of tuple
+        :return: list of pairs of matching characters and their *glyphs*
+        """
         # create where clauses
         lookupTable = self.db.tables['ComponentLookup']
         localeTable = self.db.tables['LocaleCharacterGlyph']
@@ -2142,14 +2608,7 @@ class CharacterLookup(object):
         if self.hasStrokeCount:
             sel = sel.order_by(strokeCountTable.c.StrokeCount)
 
-        result = self.db.selectRows(sel)
-
-        if not resultIncludeRadicalForms:
-            # exclude radical characters found in decomposition
-            result = [(char, glyph) for char, glyph in result \
-                if not self.isRadicalChar(char)]
-
-        return result
+        return self.db.selectRows(sel)
 
     def getDecompositionEntries(self, char, glyph=None):
         """
@@ -2182,10 +2641,14 @@ class CharacterLookup(object):
                 return []
 
         # get entries from database
-        table = self.db.tables['CharacterDecomposition']
-        result = self.db.selectScalars(select([table.c.Decomposition],
-            and_(table.c.ChineseCharacter == char,
-                table.c.Glyph == glyph)).order_by(table.c.SubIndex))
+        snapshotTable = self._getSnapshotTable('CharacterDecomposition')
+        if snapshotTable is not None:
+            result = snapshotTable.get((char, glyph), [])
+        else:
+            table = self.db.tables['CharacterDecomposition']
+            result = self.db.selectScalars(select([table.c.Decomposition],
+                and_(table.c.ChineseCharacter == char,
+                    table.c.Glyph == glyph)).order_by(table.c.SubIndex))
 
         # extract character glyph information (example entry: '⿱卜[1]尸')
         return [CharacterLookup.decompositionFromString(decomposition) \
@@ -2420,3 +2883,32 @@ class CharacterLookup(object):
                                 componentGlyph=componentGlyph):
                                 return True
             return False
+
+
+def _getObjectSize(obj):
+    """
+    Estimates the memory used by the given object including all containers
+    and their content.
+
+    :param obj: object to measure
+    :rtype: int
+    :return: size in bytes, ``None`` if not supported (before Python 2.6)
+    """
+    if not hasattr(sys, 'getsizeof'):
+        return None
+
+    size = 0
+    seen = set()
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+    return size
@@ -21,18 +21,34 @@ Simple read access to (multiple) SQL databases.
 
 __all__ = ["getDBConnector", "getDefaultConfiguration", "DatabaseConnector"]
 
+import sys
 import os
 import logging
 import glob
 import operator
-from itertools import imap
-
-from sqlalchemy import MetaData, Table, engine_from_config
-from sqlalchemy.sql import text
+import threading
+import tempfile
+import marshal
+import inspect
+import atexit
+import urllib
+from itertools import imap, count
+
+import sqlalchemy
+from sqlalchemy import (MetaData, Table, Column, DefaultClause, Integer,
+    engine_from_config)
+from sqlalchemy import types
+from sqlalchemy.sql import text, visitors, bindparam
+from sqlalchemy.sql.expression import (_BindParamClause, _BinaryExpression,
+    _UnaryExpression, ClauseList, _Grouping, _FromGrouping, Select, _Label,
+    _TextClause, Function, _Null, Join, Alias, ColumnClause, TableClause,
+    _Cast, _TypeClause)
 from sqlalchemy.engine.url import make_url
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.interfaces import PoolListener
 
 from cjklib.util import (locateProjectFile, getConfigSettings, getSearchPaths,
-    deprecated, LazyDict, OrderedDict)
+    deprecated, LazyDict, LRUDict, OrderedDict)
 
 _dbconnectInst = None
 # Cached instance of a DatabaseConnector used for connections with settings of
@@ -41,6 +57,12 @@ _dbconnectInst = None
 _dbconnectInstSettings = None
 # Connection configuration for cached instance
 
+_unsavedMetadataCaches = {}
+# Metadata caches not yet written to disk, by path of cache file
+
+_memoryCopyIds = count()
+# Unique numbers for naming in-memory copies of served databases
+
 def getDBConnector(configuration=None, projectName='cjklib'):
     """
     Returns a shared :class:`~cjklib.dbconnector.DatabaseConnector` instance.
@@ -129,10 +151,195 @@ def getDefaultConfiguration(projectName='cjklib'):
     return configuration
 
 
+class _ConnectionState(object):
+    """Holds the connection shared by all threads."""
+
+
+class _ConnectionListener(PoolListener):
+    """
+    Prepares connections newly opened or checked out from the pool, so that
+    all of them see the same attached databases and functions.
+    """
+    def __init__(self, dbConnectInst):
+        self.db = dbConnectInst
+
+    def connect(self, dbapi_con, con_record):
+        self.db._prepareConnection(dbapi_con, con_record.info)
+
+    def checkout(self, dbapi_con, con_record, con_proxy):
+        self.db._prepareConnection(dbapi_con, con_record.info)
+
+
+def _hasSQLiteURISupport(dbapi):
+    """
+    Checks if the given SQLite DB-API module opens file names given as URI.
+    Python 2's module can't ask for URIs on connecting, so SQLite needs to
+    be compiled with option ``SQLITE_USE_URI``.
+
+    :param dbapi: DB-API module for SQLite
+    :rtype: bool
+    :return: ``True`` if URIs are supported
+    """
+    connection = dbapi.connect(':memory:')
+    try:
+        options = [option for option,
+            in connection.execute("PRAGMA compile_options")]
+    finally:
+        connection.close()
+    return 'USE_URI' in options or 'USE_URI=1' in options
+
+_PLAIN_TYPES = (type(None), bool, int, long, float, str, unicode)
+"""Types of values stored in metadata cache files"""
+
+def _getTypeSpecification(columnType, dialect):
+    """
+    Describes the given column type by plain values, so that it can be
+    stored in a metadata cache file.
+
+    :param columnType: SQLAlchemy type instance
+    :param dialect: SQLAlchemy dialect
+    :rtype: tuple
+    :return: ``'dialect'`` or ``'types'`` for the module defining the type's
+        class, the class name and a dictionary of arguments, ``None`` if the
+        type can't be described
+    """
+    typeClass = columnType.__class__
+    if typeClass.__module__ == dialect.__class__.__module__:
+        module = 'dialect'
+    elif typeClass.__module__ == types.__name__:
+        module = 'types'
+    else:
+        return None
+
+    try:
+        argNames = inspect.getargspec(typeClass.__init__)[0][1:]
+    except TypeError:
+        argNames = []
+    arguments = {}
+    for name in argNames:
+        value = getattr(columnType, name, None)
+        if not isinstance(value, _PLAIN_TYPES):
+            return None
+        arguments[name] = value
+    return module, typeClass.__name__, arguments
+
+def _getTypeFromSpecification(specification, dialect):
+    """
+    Creates a column type from a description given by
+    :func:`_getTypeSpecification`. Classes are only looked up in the module
+    of the dialect and in ``sqlalchemy.types``.
+
+    :type specification: tuple
+    :param specification: module, class name and arguments
+    :param dialect: SQLAlchemy dialect
+    :return: SQLAlchemy type instance
+    :raise ValueError: if the specification is invalid
+    """
+    module, className, arguments = specification
+    if module == 'dialect':
+        module = sys.modules[dialect.__class__.__module__]
+    elif module == 'types':
+        module = types
+    else:
+        raise ValueError("Invalid module %r" % module)
+
+    typeClass = getattr(module, className, None)
+    if not (isinstance(typeClass, type)
+        and issubclass(typeClass, types.TypeEngine)):
+        raise ValueError("Invalid type %r" % className)
+    # keyword names need to be str under Python 2.4
+    return typeClass(**dict((str(name), value)
+        for name, value in arguments.items()))
+
+def _boundLimitClause(compiler, select):
+    """
+    Renders limit and offset of the given select as bind parameters. Used as
+    method ``limit_clause`` of SQLite statement compilers.
+    """
+    selectIdx = compiler.selectIndices.get(id(select))
+    if selectIdx is None:
+        # select not seen on traversal, the statement can't be reused
+        compiler.limitsBound = False
+        return super(compiler.__class__, compiler).limit_clause(select)
+
+    def process(attr, name):
+        bindParam = bindparam(name, getattr(select, attr), type_=Integer)
+        text = compiler.process(bindParam)
+        compiler.limitNames.append((compiler.bind_names[bindParam], selectIdx,
+            attr))
+        return text
+
+    text = ''
+    if select._limit is not None:
+        text += ' \n LIMIT ' + process('_limit', 'cjklib_limit_%d' % selectIdx)
+    if select._offset is not None:
+        if select._limit is None:
+            text += ' \n LIMIT -1'
+        text += ' OFFSET ' + process('_offset', 'cjklib_offset_%d' % selectIdx)
+    return text
+
+_boundLimitCompilers = {}
+"""Statement compiler classes binding limits, by base class"""
+
+def _compileWithBoundLimits(dialect, statement, selects):
+    """
+    Compiles the given statement for SQLite passing limit and offset of its
+    selects as bind parameters, so that the compilation can be reused for
+    other values.
+
+    :param dialect: SQLAlchemy dialect
+    :param statement: SQLAlchemy statement
+    :type selects: list
+    :param selects: selects of the statement in order of traversal
+    :return: compiled statement, with attribute ``limitNames`` listing the
+        bind parameter name, index of select and attribute for each limit
+        and offset, and attribute ``limitsBound`` set to ``False`` if not all
+        of them could be bound
+    """
+    baseClass = dialect.statement_compiler
+    if baseClass not in _boundLimitCompilers:
+        _boundLimitCompilers[baseClass] = type('BoundLimitCompiler',
+            (baseClass, ), {'limit_clause': _boundLimitClause})
+
+    compiled = _boundLimitCompilers[baseClass](dialect, statement)
+    compiled.selectIndices = dict((id(select), idx)
+        for idx, select in enumerate(selects))
+    compiled.limitNames = []
+    compiled.limitsBound = True
+    compiled.compile()
+    return compiled
+
+
 class DatabaseConnector(object):
     """
     Database connection object.
     """
+    CONCURRENCY_MODES = ('single', 'thread', 'pool')
+    """
+    Supported modes of sharing the connector between threads:
+
+    - ``single``: one connection is used by all threads,
+    - ``thread``: each thread gets its own connection from the engine's pool,
+    - ``pool``: each thread checks out a connection from a shared pool of
+      ``sqlalchemy.pool_size`` connections, which should be returned calling
+      :meth:`~cjklib.dbconnector.DatabaseConnector.releaseConnection`
+      once the thread is done.
+    """
+    SERVING_MODES = ('readonly', 'memory')
+    """
+    Supported profiles for serving SQLite databases that are only read from:
+
+    - ``readonly``: databases are opened read-only and marked immutable, so
+      that no locks are taken, and are accessed through memory-mapped I/O,
+    - ``memory``: databases are copied into memory on start-up, to be
+      accessed as with ``readonly``.
+
+    Both need SQLite to be compiled with URI support (``SQLITE_USE_URI``).
+    """
+    SERVING_MMAP_SIZE = 1 << 30
+    """Default size of memory-mapped I/O in bytes for serving databases"""
+    STATEMENT_CACHE_SIZE = 500
+    """Default number of compiled statements kept in the statement cache"""
     @classmethod
     @deprecated
     def getDBConnector(cls, configuration=None, projectName='cjklib'):
@@ -161,10 +368,33 @@ class DatabaseConnector(object):
         configuration. Further databases can be attached by passing a list
         of URLs or names for keyword ``'attach'``.
 
+        Keyword ``'concurrency'`` selects how connections are shared between
+        threads, see :attr:`~cjklib.dbconnector.DatabaseConnector.CONCURRENCY_MODES`.
+        In all modes connections are reopened if used in a child process
+        after ``fork()``.
+
         .. seealso::
 
             documentation of sqlalchemy.create_engine()
 
+        Keyword ``'metadataCache'`` enables storing reflected table
+        definitions of SQLite databases in a file next to each database
+        (named after it with suffix ``.metadata``), so that later instances
+        can set up tables without reflection queries.
+
+        Keyword ``'serving'`` selects a profile for SQLite databases that
+        are only read from, see
+        :attr:`~cjklib.dbconnector.DatabaseConnector.SERVING_MODES`. Keyword
+        ``'mmapSize'`` sets the size of memory-mapped I/O in this case.
+
+        Keyword ``'statementCacheSize'`` sets the number of compiled
+        statements kept, see
+        :meth:`~cjklib.dbconnector.DatabaseConnector.compileStatement`.
+
+        .. versionadded:: 0.3.1
+           Keywords ``'concurrency'``, ``'metadataCache'``, ``'serving'``,
+           ``'mmapSize'`` and ``'statementCacheSize'``.
+
         :type configuration: dict
         :param configuration: database connection options for SQLAlchemy
         """
@@ -193,15 +423,88 @@ class DatabaseConnector(object):
             registerUnicode = (registerUnicode.lower()
                 in ['1', 'yes', 'true', 'on'])
         self.registerUnicode = registerUnicode
-
-        self.engine = engine_from_config(configuration, prefix='sqlalchemy.')
+        metadataCache = configuration.pop('metadataCache', False)
+        if isinstance(metadataCache, basestring):
+            metadataCache = (metadataCache.lower()
+                in ['1', 'yes', 'true', 'on'])
+        self.metadataCache = metadataCache
+        """Whether reflected table definitions are cached in files"""
+
+        self.concurrency = configuration.pop('concurrency', None) or 'single'
+        """Mode of sharing connections between threads"""
+        if self.concurrency not in self.CONCURRENCY_MODES:
+            raise ValueError("Invalid concurrency mode '%s'"
+                % self.concurrency)
+
+        self.serving = configuration.pop('serving', None) or None
+        """Profile for serving read-only databases"""
+        if self.serving is not None and self.serving not in self.SERVING_MODES:
+            raise ValueError("Invalid serving mode '%s'" % self.serving)
+        self.mmapSize = int(configuration.pop('mmapSize',
+            self.SERVING_MMAP_SIZE))
+        statementCacheSize = int(configuration.pop('statementCacheSize',
+            self.STATEMENT_CACHE_SIZE))
+
+        url = make_url(self.databaseUrl)
+        engineOptions = {}
+        if self.serving is not None:
+            if url.drivername != 'sqlite':
+                raise ValueError("Serving mode '%s' only supported for SQLite"
+                    % self.serving)
+            if url.database not in (None, '', ':memory:'):
+                if not _hasSQLiteURISupport(url.get_dialect().dbapi()):
+                    raise ValueError("Serving mode '%s' needs SQLite compiled"
+                        " with URI support (SQLITE_USE_URI)" % self.serving)
+                # open file read-only or the copy in memory
+                engineOptions['creator'] = self._connectServing
+        self._memoryCopies = {}
+        if self.concurrency != 'single' and url.drivername == 'sqlite':
+            if url.database in (None, '', ':memory:'):
+                raise ValueError("Concurrency mode '%s' not supported for"
+                    " in-memory databases" % self.concurrency)
+            if self.concurrency == 'pool' \
+                and 'sqlalchemy.poolclass' not in configuration:
+                # connections are moved between threads
+                engineOptions['poolclass'] = QueuePool
+                engineOptions['connect_args'] = {'check_same_thread': False}
+        self._connectArgs = engineOptions.get('connect_args', {})
+
+        self.engine = engine_from_config(configuration, prefix='sqlalchemy.',
+            **engineOptions)
         """SQLAlchemy engine object"""
-        self.connection = self.engine.connect()
-        """SQLAlchemy database connection object"""
-        self.metadata = MetaData(bind=self.connection)
+        self.attached = OrderedDict()
+        """Mapping of attached database URLs to internal schema names"""
+        self.compatibilityUnicodeSupport = False
+        self._functions = OrderedDict()
+        self.engine.pool.add_listener(_ConnectionListener(self))
+
+        if self.concurrency == 'single':
+            self._state = _ConnectionState()
+        else:
+            self._state = threading.local()
+        self._pid = os.getpid()
+        self._inheritedStates = []
+
+        if self.concurrency == 'single':
+            self.metadata = MetaData()
+        else:
+            self.metadata = MetaData(bind=self.engine)
         """SQLAlchemy metadata object"""
+        # open the first connection
+        self.connection
+        self.executeCount = 0
+        """Number of requests executed through this connector"""
+        self._statementCache = LRUDict(statementCacheSize)
+        # reads reorder the cache, too
+        self._statementLock = threading.Lock()
+        self.statementCacheHits = 0
+        """Number of statements taken from the statement cache"""
+        self.statementCacheMisses = 0
+        """Number of statements compiled as not found in the cache"""
 
         # multi-database table access
+        self._metadataCaches = {}
+        self._tableLock = threading.RLock()
         self.tables = LazyDict(self._tableGetter())
         """Dictionary of SQLAlchemy table objects"""
 
@@ -213,18 +516,165 @@ class DatabaseConnector(object):
             self._mainSchema = self.engine.url.database
 
         # attach other databases
-        self.attached = OrderedDict()
-        """Mapping of attached database URLs to internal schema names"""
         attach = configuration.pop('attach', [])
         searchPaths = self.engine.name == 'sqlite'
         for url in self._findAttachableDatabases(attach, searchPaths):
             self.attachDatabase(url)
 
         # register unicode functions
-        self.compatibilityUnicodeSupport = False
         if self.registerUnicode:
             self._registerUnicode()
 
+    @property
+    def connection(self):
+        """
+        SQLAlchemy database connection object, depending on the concurrency
+        mode one per thread.
+        """
+        if self._pid != os.getpid():
+            self._resetAfterFork()
+
+        connection = getattr(self._state, 'connection', None)
+        if connection is None:
+            connection = self._state.connection = self.engine.connect()
+            if self.concurrency == 'single':
+                self.metadata.bind = connection
+        elif getattr(self._state, 'prepared', None) != self._getPreparedState():
+            # connection is held, catch up on later attached databases
+            self._prepareConnection(connection.connection.connection,
+                connection.connection.info)
+        self._state.prepared = self._getPreparedState()
+        return connection
+
+    def releaseConnection(self):
+        """
+        Returns the connection of the current thread to the pool. A new one
+        is checked out once needed again.
+
+        .. versionadded:: 0.3.1
+        """
+        connection = getattr(self._state, 'connection', None)
+        if connection is not None:
+            del self._state.connection
+            connection.close()
+
+    def _resetAfterFork(self):
+        """
+        Drops the connections inherited from the parent process and sets up a
+        new pool. Inherited connections are kept referenced but not touched,
+        as closing them would affect the parent's connections.
+        """
+        self._inheritedStates.append((self._state, self.engine.pool))
+        self.engine.pool = self.engine.pool.recreate()
+        if self.concurrency == 'single':
+            self._state = _ConnectionState()
+        else:
+            self._state = threading.local()
+        # the lock might have been held by another thread while forking
+        self._statementLock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _getPreparedState(self):
+        """
+        Gets the state of attached databases and registered functions a
+        connection needs to be prepared with.
+        """
+        return (len(self.attached), self.compatibilityUnicodeSupport,
+            len(self._functions))
+
+    def _prepareConnection(self, dbapiConnection, info):
+        """
+        Attaches databases and registers functions on the given connection
+        unless done before.
+
+        :param dbapiConnection: DB-API connection
+        :type info: dict
+        :param info: info dictionary of the connection
+        """
+        attached = info.setdefault('cjklib_attached', set())
+        for databaseUrl, schema in self.attached.items():
+            if schema in attached:
+                continue
+            if self.engine.name == 'sqlite':
+                cursor = dbapiConnection.cursor()
+                cursor.execute("ATTACH DATABASE ? AS ?",
+                    (self._getDatabaseFile(databaseUrl), schema))
+                if self.serving is not None:
+                    cursor.execute('PRAGMA "%s".mmap_size = %d'
+                        % (schema, self.mmapSize))
+                cursor.close()
+            attached.add(schema)
+
+        if self.serving is not None and not info.get('cjklib_serving', False):
+            cursor = dbapiConnection.cursor()
+            cursor.execute("PRAGMA main.mmap_size = %d" % self.mmapSize)
+            cursor.execute("PRAGMA query_only = ON")
+            cursor.close()
+            info['cjklib_serving'] = True
+
+        if self.compatibilityUnicodeSupport \
+            and not info.get('cjklib_unicode', False):
+            self._registerUnicodeFunctions(dbapiConnection)
+            info['cjklib_unicode'] = True
+
+        functions = info.setdefault('cjklib_functions', set())
+        for name, (numArgs, function) in self._functions.items():
+            if name not in functions:
+                dbapiConnection.create_function(name, numArgs, function)
+                functions.add(name)
+
+    def _connectServing(self):
+        """
+        Opens a DB-API connection to the main database for the serving
+        profile.
+        """
+        _, connectArgs = self.engine.dialect.create_connect_args(
+            self.engine.url)
+        connectArgs.update(self._connectArgs)
+        return self.engine.dialect.dbapi.connect(
+            self._getDatabaseFile(self.databaseUrl), **connectArgs)
+
+    def _getDatabaseFile(self, databaseUrl):
+        """
+        Gets the file name SQLite opens for the given database. For serving
+        databases this is an URI, see http://www.sqlite.org/uri.html.
+
+        :type databaseUrl: str
+        :param databaseUrl: database URL
+        :rtype: str
+        :return: file name or URI
+        """
+        databaseFile = make_url(databaseUrl).database
+        if self.serving is None or databaseFile in (None, '', ':memory:'):
+            return databaseFile
+
+        readOnlyUri = 'file:%s?mode=ro&immutable=1' % urllib.pathname2url(
+            os.path.abspath(databaseFile))
+        if self.serving == 'readonly':
+            return readOnlyUri
+
+        pid = os.getpid()
+        if databaseUrl not in self._memoryCopies \
+            or self._memoryCopies[databaseUrl][0] != pid:
+            # copy in memory is kept as long as one connection is open
+            # a name reused while a former copy is still open would refer
+            #   to that copy
+            memoryUri = 'file:cjklib-%d-%d?mode=memory&cache=shared' % (
+                pid, _memoryCopyIds.next())
+            dbapi = self.engine.dialect.dbapi
+            holder = dbapi.connect(memoryUri, check_same_thread=False)
+            source = dbapi.connect(readOnlyUri)
+            try:
+                source.execute("VACUUM INTO ?", (memoryUri, ))
+            finally:
+                source.close()
+            if databaseUrl in self._memoryCopies:
+                # don't close a copy inherited from the parent process
+                self._inheritedStates.append(self._memoryCopies[databaseUrl])
+            self._memoryCopies[databaseUrl] = (pid, memoryUri, holder)
+
+        return self._memoryCopies[databaseUrl][1]
+
     def _findAttachableDatabases(self, attachList, searchPaths=False):
         """
         Returns URLs for databases that can be attached to a given database.
@@ -271,6 +721,28 @@ class DatabaseConnector(object):
 
         return attachable
 
+    def registerFunction(self, name, numArgs, function):
+        """
+        Registers a user function that can be called from SQL statements on
+        all connections. Only SQLite is supported. A function is registered
+        once, later calls with the same name are ignored.
+
+        .. versionadded:: 0.3.1
+
+        :type name: str
+        :param name: name of the SQL function
+        :type numArgs: int
+        :param numArgs: number of arguments, ``-1`` for any
+        :type function: function
+        :param function: function called with the SQL arguments
+        """
+        if self.engine.name != 'sqlite':
+            raise ValueError("User functions are only supported for SQLite")
+        if name not in self._functions:
+            self._functions[name] = (numArgs, function)
+            # register on the current connection, others follow once used
+            self.connection
+
     def _registerUnicode(self):
         """
         Register functions and collations to bring Unicode support to certain
@@ -279,14 +751,22 @@ class DatabaseConnector(object):
         if self.engine.name == 'sqlite':
             uUmlaut = self.selectScalar(text(u"SELECT lower('Ü');"))
             if uUmlaut != u'ü':
-                # register own Unicode aware functions
-                con = self.connection.connection
-                con.create_function("lower", 1, lambda s: s and s.lower())
-                con.create_collation("NOCASE",
-                    lambda a, b: cmp(a.decode('utf8').lower(),
-                        b.decode('utf8').lower()))
-
+                # register own Unicode aware functions, on all connections
                 self.compatibilityUnicodeSupport = True
+                self.connection
+
+    @staticmethod
+    def _registerUnicodeFunctions(dbapiConnection):
+        """
+        Registers Unicode aware functions and collations on the given SQLite
+        connection.
+
+        :param dbapiConnection: DB-API connection
+        """
+        dbapiConnection.create_function("lower", 1, lambda s: s and s.lower())
+        dbapiConnection.create_collation("NOCASE",
+            lambda a, b: cmp(a.decode('utf8').lower(),
+                b.decode('utf8').lower()))
 
     #{ Multiple database support
 
@@ -356,13 +836,17 @@ class DatabaseConnector(object):
             _, dbName = os.path.split(databaseFile)
             if dbName.endswith('.db'): dbName = dbName[:-3]
             schema = '%s_%d' % (dbName, len(self.attached))
-
-            self.execute(text("""ATTACH DATABASE :database AS :schema"""),
-                database=databaseFile, schema=schema)
         else:
             schema = url.database
 
         self.attached[databaseUrl] = schema
+        # attach to the current connection, others follow once used
+        self.executeCount += 1
+        try:
+            self.connection
+        except:
+            del self.attached[databaseUrl]
+            raise
 
         return schema
 
@@ -389,10 +873,23 @@ class DatabaseConnector(object):
         table name.
         """
         def getTable(tableName):
-            schema = self._findTable(tableName)
-            if schema is not None:
-                return Table(tableName, self.metadata, autoload=True,
-                    autoload_with=self.engine, schema=schema)
+            # the table object is registered with the metadata before its
+            #   columns are reflected, don't hand it out to other threads
+            self._tableLock.acquire()
+            try:
+                if tableName in self.tables:
+                    return self.tables[tableName]
+
+                schema = self._findTable(tableName)
+                if schema is not None:
+                    table = self._getCachedTable(tableName, schema)
+                    if table is None:
+                        table = Table(tableName, self.metadata, autoload=True,
+                            autoload_with=self.engine, schema=schema)
+                        self._cacheTable(table, schema)
+                    return table
+            finally:
+                self._tableLock.release()
 
             raise KeyError("Table '%s' not found in any database" % tableName)
 
@@ -423,12 +920,13 @@ class DatabaseConnector(object):
             hasTable = has_table
         else:
             hasTable = self.engine.has_table
-        if hasTable(tableName, schema=self._mainSchema):
-            return self._mainSchema
-        else:
-            for schema in self.attached.values():
-                if hasTable(tableName, schema=schema):
+        for schema in [self._mainSchema] + self.attached.values():
+            cache = self._getMetadataCache(schema)
+            if cache is not None:
+                if tableName in cache['names']:
                     return schema
+            elif hasTable(tableName, schema=schema):
+                return schema
         return None
 
     def hasTable(self, tableName):
@@ -458,6 +956,409 @@ class DatabaseConnector(object):
         """
         return self.engine.has_table(tableName, schema=self._mainSchema)
 
+    #}
+    #{ Metadata cache
+
+    METADATA_CACHE_VERSION = 2
+    """Format version of metadata cache files"""
+
+    def _getMetadataCacheFile(self, schema):
+        """
+        Gets the path of the file caching table definitions of the database
+        with the given schema.
+
+        :type schema: str
+        :param schema: schema name of database
+        :rtype: str
+        :return: path of the cache file, ``None`` if caching is disabled or
+            not supported for the given database
+        """
+        if not self.metadataCache or self.engine.name != 'sqlite':
+            return None
+
+        if schema == self._mainSchema:
+            databaseUrl = self.databaseUrl
+        else:
+            for databaseUrl, attachedSchema in self.attached.items():
+                if attachedSchema == schema:
+                    break
+            else:
+                return None
+
+        databaseFile = make_url(databaseUrl).database
+        if databaseFile in (None, '', ':memory:'):
+            return None
+        return databaseFile + '.metadata'
+
+    def _getMetadataCache(self, schema):
+        """
+        Gets the cached table definitions of the database with the given
+        schema, reading the cache file on first access.
+
+        The cache is keyed by the modification time and size of the database
+        file and by its schema version, and is set up anew from the list of
+        tables and views once one of them changes. Cache files only hold
+        plain values written by :mod:`marshal`, so that reading them doesn't
+        run any code.
+
+        :type schema: str
+        :param schema: schema name of database
+        :rtype: dict
+        :return: cache with entry ``'names'`` holding names of all tables and
+            views, and entry ``'tables'`` holding table definitions, ``None``
+            if caching is disabled or not supported for the given database
+        """
+        cacheFile = self._getMetadataCacheFile(schema)
+        if cacheFile is None:
+            return None
+
+        identifier_preparer = self.engine.dialect.identifier_preparer
+        qschema = identifier_preparer.quote_identifier(schema)
+        schemaVersion = self.selectScalar(
+            text("PRAGMA %s.schema_version" % qschema))
+        try:
+            fileStat = os.stat(cacheFile[:-len('.metadata')])
+        except OSError:
+            return None
+        key = (self.METADATA_CACHE_VERSION, sqlalchemy.__version__,
+            fileStat.st_mtime, fileStat.st_size, schemaVersion)
+
+        cache = self._metadataCaches.get(schema)
+        if cache is not None and cache['key'] == key:
+            return cache
+
+        try:
+            f = open(cacheFile, 'rb')
+            try:
+                cache = marshal.load(f)
+            finally:
+                f.close()
+            if isinstance(cache, dict) and cache.get('key') == key:
+                cache = {'key': key, 'names': set(cache['names']),
+                    'tables': dict(cache['tables'])}
+            else:
+                cache = None
+        except Exception:
+            # missing or unreadable
+            cache = None
+
+        if cache is None:
+            names = self.selectScalars(text(("SELECT name FROM %s.sqlite_master"
+                " WHERE type IN ('table', 'view')") % qschema))
+            cache = {'key': key, 'names': set(names), 'tables': {}}
+            _unsavedMetadataCaches[cacheFile] = cache
+
+        self._metadataCaches[schema] = cache
+        return cache
+
+    @classmethod
+    def saveMetadataCache(cls):
+        """
+        Writes table definitions reflected since the last save to the
+        metadata cache files. This is done automatically on exit.
+
+        .. versionadded:: 0.3.1
+        """
+        while _unsavedMetadataCaches:
+            cacheFile, cache = _unsavedMetadataCaches.popitem()
+            cls._writeMetadataCache(cacheFile, cache)
+
+    @staticmethod
+    def _writeMetadataCache(cacheFile, cache):
+        """
+        Writes the given cache to disk. The file is replaced in one step, so
+        that other processes never read a partially written cache. Failing
+        to write, e.g. for a read-only location, is not considered an error.
+
+        :type cacheFile: str
+        :param cacheFile: path of the cache file
+        :type cache: dict
+        :param cache: table definitions of one database
+        """
+        directory, fileName = os.path.split(cacheFile)
+        try:
+            fd, tempFile = tempfile.mkstemp(prefix=fileName + '.',
+                dir=directory or '.')
+            try:
+                f = os.fdopen(fd, 'wb')
+                try:
+                    marshal.dump({'key': cache['key'],
+                        'names': list(cache['names']),
+                        'tables': cache['tables']}, f)
+                finally:
+                    f.close()
+                os.chmod(tempFile, 0644)
+                if os.name == 'nt' and os.path.exists(cacheFile):
+                    os.remove(cacheFile)
+                os.rename(tempFile, cacheFile)
+            except:
+                os.remove(tempFile)
+                raise
+        except (IOError, OSError), e:
+            logging.debug("Unable to write metadata cache '%s': %s"
+                % (cacheFile, e))
+
+    def _getCachedTable(self, tableName, schema):
+        """
+        Sets up the table object from the metadata cache.
+
+        :type tableName: str
+        :param tableName: name of table
+        :type schema: str
+        :param schema: schema name of database including table
+        :rtype: object
+        :return: SQLAlchemy table object, ``None`` if table is not cached
+        """
+        cache = self._metadataCaches.get(schema)
+        if cache is None or tableName not in cache['tables']:
+            return None
+
+        key = '%s.%s' % (schema, tableName)
+        if key in self.metadata.tables:
+            return self.metadata.tables[key]
+
+        columns = []
+        try:
+            for name, typeSpecification, primaryKey, nullable, default \
+                in cache['tables'][tableName]:
+                columnType = _getTypeFromSpecification(typeSpecification,
+                    self.engine.dialect)
+                columnArgs = []
+                if default is not None:
+                    columnArgs.append(DefaultClause(text(default)))
+                columns.append(Column(name, columnType,
+                    primary_key=bool(primaryKey), nullable=bool(nullable),
+                    *columnArgs))
+        except (TypeError, ValueError), e:
+            logging.debug("Invalid metadata cache entry for table '%s': %s"
+                % (tableName, e))
+            return None
+
+        return Table(tableName, self.metadata, schema=schema, *columns)
+
+    def _cacheTable(self, table, schema):
+        """
+        Adds the definition of the given reflected table to the metadata
+        cache. Tables with foreign keys are not cached.
+
+        :param table: SQLAlchemy table object
+        :type schema: str
+        :param schema: schema name of database including table
+        """
+        cache = self._metadataCaches.get(schema)
+        if cache is None or table.foreign_keys:
+            return
+
+        definition = []
+        for column in table.columns:
+            typeSpecification = _getTypeSpecification(column.type,
+                self.engine.dialect)
+            if typeSpecification is None:
+                return
+            if column.server_default is not None:
+                default = column.server_default.arg.text
+            else:
+                default = None
+            definition.append((column.name, typeSpecification,
+                column.primary_key, column.nullable, default))
+        cache['tables'][table.name] = definition
+        _unsavedMetadataCaches[self._getMetadataCacheFile(schema)] = cache
+
+    #}
+    #{ Statement cache
+
+    def getCompiledStatement(self, key, statementFunc):
+        """
+        Gets a compiled statement from the statement cache. On a miss the
+        statement returned by ``statementFunc`` is compiled and stored under
+        the given key. Statements should use
+        :func:`~sqlalchemy.sql.expression.bindparam` for values that change
+        between calls, which are passed on execution, e.g.
+        ``selectScalar(compiled, char=u'...')``.
+
+        .. versionadded:: 0.3.1
+
+        :param key: hashable key identifying the statement
+        :type statementFunc: function
+        :param statementFunc: function without arguments returning the
+            statement
+        :return: compiled statement
+        """
+        compiled = self._getCachedStatement(key)
+        if compiled is None:
+            compiled = statementFunc().compile(dialect=self.engine.dialect)
+            self._cacheStatement(key, compiled)
+        return compiled
+
+    def compileStatement(self, statement):
+        """
+        Compiles the given statement, reusing a cached compilation of a
+        statement of the same shape. Statements are of the same shape if
+        they only differ in the values of their bind parameters. Under SQLite
+        also limit and offset are passed as bind parameters, for other
+        engines their values are part of the shape.
+
+        .. versionadded:: 0.3.1
+
+        :param statement: SQLAlchemy statement
+        :rtype: tuple
+        :return: compiled statement and its parameters, the statement itself
+            and no parameters if its shape can not be determined
+        """
+        bindLimits = self.engine.name == 'sqlite'
+        shape = self._getStatementShape(statement, bindLimits)
+        if shape is None:
+            self._getCachedStatement(None)
+            return statement, {}
+        shape, bindParams, selects = shape
+
+        cached = self._getCachedStatement(shape)
+        if cached is not None:
+            compiled, bindNames, limitNames = cached
+        else:
+            if bindLimits:
+                compiled = _compileWithBoundLimits(self.engine.dialect,
+                    statement, selects)
+                if not compiled.limitsBound:
+                    return compiled, compiled.params
+                limitNames = compiled.limitNames
+            else:
+                compiled = statement.compile(dialect=self.engine.dialect)
+                limitNames = []
+            bindNames = [compiled.bind_names[bindParam]
+                for bindParam in bindParams]
+            self._cacheStatement(shape, (compiled, bindNames, limitNames))
+
+        params = dict((name, bindParam.value)
+            for name, bindParam in zip(bindNames, bindParams))
+        for name, selectIdx, attr in limitNames:
+            params[name] = getattr(selects[selectIdx], attr)
+        return compiled, params
+
+    @staticmethod
+    def _getStatementShape(statement, bindLimits=False):
+        """
+        Gets a key describing the given statement without its bind parameter
+        values, together with the bind parameters and selects in order of
+        traversal.
+
+        :param statement: SQLAlchemy statement
+        :type bindLimits: bool
+        :param bindLimits: if ``True`` values of limit and offset are left out
+            of the shape
+        :rtype: tuple
+        :return: shape, list of bind parameters and list of selects, ``None``
+            if statement includes unsupported constructs
+        """
+        shape = ['shape']
+        bindParams = []
+        selects = []
+        for element in visitors.iterate(statement, {}):
+            if isinstance(element, _BindParamClause):
+                bindParams.append(element)
+                key = (element.type.__class__, )
+            elif isinstance(element, ColumnClause):
+                table = element.table
+                if table is not None:
+                    table = (table.__class__, getattr(table, 'name', None),
+                        getattr(table, 'schema', None))
+                key = (element.name, element.is_literal, table)
+            elif isinstance(element, TableClause):
+                key = (element.name, getattr(element, 'schema', None))
+            elif isinstance(element, _BinaryExpression):
+                key = (element.operator, element.negate,
+                    tuple(sorted(element.modifiers.items())))
+            elif isinstance(element, _UnaryExpression):
+                key = (element.operator, element.modifier, element.negate)
+            elif isinstance(element, ClauseList):
+                key = (element.operator, element.group,
+                    element.group_contents)
+            elif isinstance(element, Select):
+                if element._correlate or element._prefixes:
+                    return None
+                selects.append(element)
+                if bindLimits:
+                    limits = (element._limit is not None,
+                        element._offset is not None)
+                else:
+                    limits = (element._limit, element._offset)
+                key = limits + (element._distinct, element.use_labels,
+                    element.for_update, element._should_correlate)
+            elif isinstance(element, (_Label, Alias)):
+                key = (element.name, )
+            elif isinstance(element, _TextClause):
+                key = (element.text, )
+            elif isinstance(element, Function):
+                key = (element.name, tuple(element.packagenames))
+            elif isinstance(element, Join):
+                key = (element.isouter, )
+            elif isinstance(element, (_Cast, _TypeClause)):
+                key = (element.type.__class__, )
+            elif isinstance(element, (_Grouping, _FromGrouping, _Null)):
+                key = ()
+            else:
+                return None
+            shape.append((element.__class__, ) + key)
+
+        return tuple(shape), bindParams, selects
+
+    def getStatementCacheInfo(self):
+        """
+        Gets statistics of the statement cache.
+
+        .. versionadded:: 0.3.1
+
+        :rtype: dict
+        :return: number of ``hits``, ``misses`` and cached statements
+            (``size``)
+        """
+        self._statementLock.acquire()
+        try:
+            return {'hits': self.statementCacheHits,
+                'misses': self.statementCacheMisses,
+                'size': len(self._statementCache)}
+        finally:
+            self._statementLock.release()
+
+    def clearStatementCache(self):
+        """
+        Removes all statements from the statement cache, needed once tables
+        are changed.
+
+        .. versionadded:: 0.3.1
+        """
+        self._statementLock.acquire()
+        try:
+            self._statementCache.clear()
+        finally:
+            self._statementLock.release()
+
+    def _getCachedStatement(self, key):
+        """
+        Gets a cached statement and counts the hit or miss. The cache is
+        shared between threads and guarded by a lock.
+
+        :param key: key of the statement, ``None`` to only count a miss
+        :return: cached statement, ``None`` if not found
+        """
+        self._statementLock.acquire()
+        try:
+            if key is not None and key in self._statementCache:
+                self.statementCacheHits += 1
+                return self._statementCache[key]
+            self.statementCacheMisses += 1
+            return None
+        finally:
+            self._statementLock.release()
+
+    def _cacheStatement(self, key, value):
+        """Stores a compiled statement in the shared statement cache."""
+        self._statementLock.acquire()
+        try:
+            self._statementCache[key] = value
+        finally:
+            self._statementLock.release()
+
     #}
     #{ Select commands
 
@@ -465,6 +1366,7 @@ class DatabaseConnector(object):
         """
         Executes a request on the given database.
         """
+        self.executeCount += 1
         return self.connection.execute(*options, **keywords)
 
     def _decode(self, data):
@@ -488,73 +1390,82 @@ class DatabaseConnector(object):
             else:
                 return data
 
-    def selectScalar(self, request):
+    def selectScalar(self, request, **params):
         """
         Executes a select query and returns a single variable.
 
         :param request: SQL request
+        :param params: values of bind parameters
         :return: a scalar
         """
-        result = self.execute(request)
+        result = self.execute(request, **params)
         assert result.rowcount <= 1
         firstRow = result.fetchone()
         assert not firstRow or len(firstRow) == 1
         if firstRow:
             return self._decode(firstRow[0])
 
-    def selectScalars(self, request):
+    def selectScalars(self, request, **params):
         """
         Executes a select query and returns a list of scalars.
 
         :param request: SQL request
+        :param params: values of bind parameters
         :return: a list of scalars
         """
-        result = self.execute(request)
+        result = self.execute(request, **params)
         return [self._decode(row[0]) for row in result.fetchall()]
 
-    def iterScalars(self, request):
+    def iterScalars(self, request, **params):
         """
         Executes a select query and returns an iterator of scalars.
 
         .. versionadded:: 0.3
 
         :param request: SQL request
+        :param params: values of bind parameters
         :return: an iterator of scalars
         """
-        result = self.execute(request)
+        result = self.execute(request, **params)
         return imap(self._decode, imap(operator.itemgetter(0), result))
 
-    def selectRow(self, request):
+    def selectRow(self, request, **params):
         """
         Executes a select query and returns a single table row.
 
         :param request: SQL request
+        :param params: values of bind parameters
         :return: a list of scalars
         """
-        result = self.execute(request)
+        result = self.execute(request, **params)
         assert result.rowcount <= 1
         firstRow = result.fetchone()
         if firstRow:
             return self._decode(tuple(firstRow))
 
-    def selectRows(self, request):
+    def selectRows(self, request, **params):
         """
         Executes a select query and returns a list of table rows.
 
         :param request: SQL request
+        :param params: values of bind parameters
         :return: a list of tuples
         """
-        result = self.execute(request)
+        result = self.execute(request, **params)
         return [self._decode(tuple(row)) for row in result.fetchall()]
 
-    def iterRows(self, request):
+    def iterRows(self, request, **params):
         """
         Executes a select query and returns an iterator of table rows.
 
         .. versionadded:: 0.3
 
         :param request: SQL request
+        :param params: values of bind parameters
         :return: an iterator of tuples
         """
-        result = self.execute(request)
+        result = self.execute(request, **params)
         return imap(self._decode, result)
+
+
+atexit.register(DatabaseConnector.saveMetadataCache)
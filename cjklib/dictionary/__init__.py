@@ -40,20 +40,151 @@ __all__ = [
     ]
 
 import types
-from itertools import imap, ifilter
+import base64
+from itertools import imap, ifilter, count
 
-from sqlalchemy import select, Table
-from sqlalchemy.sql import or_
+from sqlalchemy import select, union, Table
+from sqlalchemy.sql import or_, and_, text, literal_column
+from sqlalchemy.sql.expression import func
 from sqlalchemy.exc import NoSuchTableError
 
 from cjklib import dbconnector
 from cjklib import exception
-from cjklib.util import cachedproperty
+from cjklib.characterlookup import CharacterLookup
+from cjklib.util import cachedproperty, getCharacterList, CharacterRangeSet
 
 from cjklib.dictionary import entry as entryfactory
 from cjklib.dictionary import format as formatstrategy
 from cjklib.dictionary import search as searchstrategy
 
+# Python 2.4 support
+if not hasattr(__builtins__, 'any'):
+    def any(iterable):
+        for element in iterable:
+            if element:
+                return True
+        return False
+
+    def all(iterable):
+        for element in iterable:
+            if not element:
+                return False
+        return True
+
+_matchFunctions = {}
+"""Filter functions of running searches by id, called from SQL."""
+_matchFunctionIds = count()
+"""Generator of unique ids for filter functions."""
+
+def _callMatchFunction(functionId, *row):
+    """
+    Calls the filter function registered under the given id for a row of a
+    dictionary table. Registered as SQLite function ``cjklib_match``.
+    """
+    function = _matchFunctions.get(functionId)
+    return function is None or function(row)
+
+_hanCharacters = CharacterRangeSet(CharacterLookup.HAN_SCRIPT_RANGES)
+"""Characters of the Han script."""
+
+def _hasHanCharacters(searchStr):
+    """Checks if the given string includes a character of the Han script."""
+    return any(char in _hanCharacters for char in getCharacterList(searchStr))
+
+def _isHanOnly(searchStr):
+    """
+    Checks if the given string only consists of characters of the Han script,
+    ignoring whitespace.
+    """
+    chars = [char for char in getCharacterList(searchStr)
+        if not char.isspace()]
+    return bool(chars) and all(char in _hanCharacters for char in chars)
+
+def _getKeysetClause(orderKeys, values):
+    """
+    Returns a where clause selecting rows following the row with the given
+    values in the order given by columns and direction. NULL values are
+    assumed to sort before all other values, as done by SQLite and MySQL.
+    """
+    clauses = []
+    equalClauses = []
+    for (column, descending), value in zip(orderKeys, values):
+        if not descending:
+            if value is None:
+                following = column != None
+            else:
+                following = column > value
+        elif value is None:
+            following = None
+        else:
+            following = or_(column < value, column == None)
+        if following is not None:
+            clauses.append(and_(*(equalClauses + [following])))
+
+        if value is None:
+            equalClauses.append(column == None)
+        else:
+            equalClauses.append(column == value)
+
+    clause = or_(*clauses)
+    column, descending = orderKeys[0]
+    if values[0] is not None and not descending:
+        # leading range allows for an index seek
+        clause = and_(column >= values[0], clause)
+    return clause
+
+def _encodeCursor(values):
+    """
+    Encodes the values of the last row of a page as continuation token. Each
+    value is stored with its length and type: ``n`` for ``None``, ``i`` for
+    integers, ``f`` for floats and ``s`` for strings.
+    """
+    parts = []
+    for value in values:
+        if value is None:
+            part = 'n'
+        elif isinstance(value, (int, long)):
+            part = 'i%d' % value
+        elif isinstance(value, float):
+            part = 'f%r' % value
+        else:
+            if not isinstance(value, unicode):
+                value = unicode(value)
+            part = 's' + value.encode('utf8')
+        parts.append('%d:%s' % (len(part), part))
+    return base64.urlsafe_b64encode(''.join(parts))
+
+def _decodeCursor(cursor, valueCount):
+    """
+    Decodes the values of the last row of a page from a continuation token.
+
+    :raise ValueError: if the token is invalid
+    """
+    try:
+        encoded = base64.urlsafe_b64decode(str(cursor))
+        values = []
+        while encoded:
+            length, encoded = encoded.split(':', 1)
+            length = int(length)
+            part, encoded = encoded[:length], encoded[length:]
+            if len(part) != length:
+                raise ValueError("Truncated value")
+            if part == 'n':
+                values.append(None)
+            elif part[:1] == 'i':
+                values.append(int(part[1:]))
+            elif part[:1] == 'f':
+                values.append(float(part[1:]))
+            elif part[:1] == 's':
+                values.append(part[1:].decode('utf8'))
+            else:
+                raise ValueError("Unknown type")
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError("Invalid cursor '%s'" % cursor)
+    if len(values) != valueCount:
+        raise ValueError("Invalid cursor '%s'" % cursor)
+    return values
+
 #{ Access methods
 
 def getDictionaryClasses():
@@ -246,6 +377,57 @@ class BaseDictionary(object):
         """
         raise NotImplementedError()
 
+    def getPage(self, method, searchStr=None, limit=100, orderBy=None,
+        cursor=None, **options):
+        """
+        Gets a page of dictionary entries for one of the access methods
+        ``getAll`` and ``getFor...``, together with a continuation token for
+        the following page.
+
+        Pages are read using keyset pagination: entries are ordered by the
+        given columns and all columns of the dictionary as tiebreak, and the
+        following page starts after the values of the last entry. Deep pages
+        thus cost the same as the first one. Ranking of translation searches is
+        not applied. Descending order needs to be given as tuple
+        ``(column, 'desc')``, other SQLAlchemy expressions are taken to sort
+        ascending.
+
+        Example:
+
+            >>> from cjklib.dictionary import CEDICT
+            >>> d = CEDICT()
+            >>> entries, cursor = d.getPage('getForReading', 'zhidao',
+            ...     limit=10, orderBy=['Reading'], toneMarkType='numbers')
+            >>> while cursor:
+            ...     moreEntries, cursor = d.getPage('getForReading', 'zhidao',
+            ...         limit=10, orderBy=['Reading'], cursor=cursor,
+            ...         toneMarkType='numbers')
+            ...     entries.extend(moreEntries)
+
+        .. versionadded:: 0.3.1
+
+        :type method: str
+        :param method: name of the access method, e.g. ``'getForReading'``
+        :type searchStr: str
+        :param searchStr: search string, not needed for ``getAll``
+        :type limit: int
+        :param limit: maximum number of returned entries
+        :type orderBy: list
+        :param orderBy: list of column names or SQLAlchemy column objects giving
+            the order of returned entries, or tuples of one of them and
+            ``'asc'`` or ``'desc'`` giving the sort direction
+        :type cursor: str
+        :param cursor: continuation token of the previous page, ``None`` for
+            the first page
+        :param options: options passed on to the access method
+        :rtype: tuple
+        :return: list of entries, and continuation token or ``None`` if no
+            entries follow
+        :raise ValueError: if the access method is unknown or the cursor is
+            invalid
+        """
+        raise NotImplementedError()
+
 
 class EDICTStyleDictionary(BaseDictionary):
     """Access for EDICT-style dictionaries."""
@@ -288,11 +470,98 @@ class EDICTStyleDictionary(BaseDictionary):
         except NoSuchTableError:
             pass
 
-    def _search(self, whereClause, filters, limit, orderBy):
+    @cachedproperty
+    def _dictionaryRowId(self):
         """
-        Does the actual search for a given where clause and then narrows the
-        result set given a list of filters. The results are then formatted
-        given the instance's rules.
+        Row id of the dictionary table under SQLite, ``None`` if not
+        available, e.g. for a view.
+        """
+        if self.db.engine.name != 'sqlite':
+            return None
+
+        dictionaryTable = self.db.tables[self.DICTIONARY_TABLE]
+        preparer = self.db.engine.dialect.identifier_preparer
+        tableType = self.db.selectScalar(text(
+            "SELECT type FROM %s.sqlite_master WHERE name = :name"
+                % preparer.quote_identifier(dictionaryTable.schema or 'main')),
+            name=dictionaryTable.name)
+        if tableType != 'table':
+            return None
+
+        return literal_column('%s.rowid'
+            % preparer.format_table(dictionaryTable))
+
+    def _getUnionClause(self, clauses):
+        """
+        Returns a clause matching entries that match any of the given
+        clauses.
+
+        SQLite mostly resorts to a full table scan for a disjunction of
+        clauses on different columns. Here each clause is run as its own
+        subquery selecting row ids, so that every branch can use its index,
+        and all are combined using ``UNION``.
+        """
+        if self._dictionaryRowId is None or len(clauses) < 2:
+            return or_(*clauses)
+
+        dictionaryTable = self.db.tables[self.DICTIONARY_TABLE]
+        return self._dictionaryRowId.in_(union(*[
+            select([self._dictionaryRowId], clause, from_obj=[dictionaryTable],
+                correlate=False)
+            for clause in clauses]))
+
+    def _getOrderKeys(self, orderBy):
+        """
+        Returns SQLAlchemy columns and ``True`` for descending order for the
+        given list of column names or columns, optionally given as tuple
+        together with the sort direction ``'asc'`` or ``'desc'``.
+        """
+        dictionaryTable = self.db.tables[self.DICTIONARY_TABLE]
+
+        orderKeys = []
+        if orderBy is not None:
+            if type(orderBy) != type([]):
+                orderBy = [orderBy]
+
+            for col in orderBy:
+                direction = 'asc'
+                if isinstance(col, tuple):
+                    col, direction = col
+                    if direction not in ('asc', 'desc'):
+                        raise ValueError("Invalid sort direction '%s'"
+                            % direction)
+                if isinstance(col, basestring):
+                    col = dictionaryTable.c[col]
+                orderKeys.append((col, direction == 'desc'))
+
+        return orderKeys
+
+    def _getOrderByColumns(self, orderBy):
+        """
+        Returns SQLAlchemy columns for the given list of column names or
+        columns, optionally given as tuple together with the sort direction.
+        """
+        orderByCols = []
+        for column, descending in self._getOrderKeys(orderBy):
+            if descending:
+                orderByCols.append(column.desc())
+            else:
+                orderByCols.append(column)
+
+        return orderByCols
+
+    def _searchRows(self, whereClause, filters, limit, orderByCols,
+        columns=None):
+        """
+        Does the actual search for a given where clause. Under SQLite the
+        given filters are applied inside the query so that the given limit is
+        exact, otherwise a function for filtering the rows is returned.
+
+        :param columns: additional columns selected after the dictionary's
+            columns
+        :rtype: tuple
+        :return: iterator over rows, and a filter function still to be
+            applied or ``None``
         """
         def _getFilterFunction(filterList):
             """Creates a function for filtering search results."""
@@ -311,26 +580,39 @@ class EDICTStyleDictionary(BaseDictionary):
 
         dictionaryTable = self.db.tables[self.DICTIONARY_TABLE]
 
-        orderByCols = []
-        if orderBy is not None:
-            if type(orderBy) != type([]):
-                orderBy = [orderBy]
-
-            for col in orderBy:
-                if isinstance(col, basestring):
-                    orderByCols.append(dictionaryTable.c[col])
-                else:
-                    orderByCols.append(col)
-
-        # lookup in db
-        results = self.db.iterRows(
-            select([dictionaryTable.c[col] for col in self.COLUMNS],
-                whereClause, distinct=True).order_by(*orderByCols).limit(limit))
-
-        # filter
+        filterFunction = None
+        functionId = None
         if filters:
-            results = ifilter(_getFilterFunction(filters), results)
+            filterFunction = _getFilterFunction(filters)
+            if self.db.engine.name == 'sqlite':
+                self.db.registerFunction('cjklib_match', -1,
+                    _callMatchFunction)
+                functionId = _matchFunctionIds.next()
+                whereClause = and_(whereClause, func.cjklib_match(functionId,
+                    *[dictionaryTable.c[col] for col in self.COLUMNS]))
+
+        # lookup in db, reusing the compiled statement of same shape
+        statement, params = self.db.compileStatement(
+            select([dictionaryTable.c[col] for col in self.COLUMNS]
+                    + (columns or []), whereClause, distinct=True)
+                .order_by(*orderByCols).limit(limit))
+
+        if functionId is not None:
+            # the filter function is only registered while the query runs,
+            #   rows are fetched at once so that it can be removed right away
+            _matchFunctions[functionId] = filterFunction
+            try:
+                rows = self.db.selectRows(statement, **params)
+            finally:
+                del _matchFunctions[functionId]
+            return iter(rows), None
+        else:
+            return self.db.iterRows(statement, **params), filterFunction
 
+    def _getEntries(self, results):
+        """
+        Formats the given rows given the instance's rules.
+        """
         # format readings and translations
         if self.columnFormatStrategies:
             results = imap(list, results)
@@ -339,9 +621,25 @@ class EDICTStyleDictionary(BaseDictionary):
             results = imap(tuple, results)
 
         # format results
-        entries = self.entryFactory.getEntries(results)
+        return self.entryFactory.getEntries(results)
 
-        return entries
+    def _search(self, whereClause, filters, limit, orderBy):
+        """
+        Does the actual search for a given where clause and then narrows the
+        result set given a list of filters. The results are then formatted
+        given the instance's rules.
+
+        Under SQLite the filters are applied inside the query so that the
+        given limit is exact.
+        """
+        results, filterFunction = self._searchRows(whereClause, filters,
+            limit, self._getOrderByColumns(orderBy))
+
+        # filter
+        if filterFunction:
+            results = ifilter(filterFunction, results)
+
+        return self._getEntries(results)
 
     def getAll(self, limit=None, orderBy=None):
         """
@@ -351,7 +649,8 @@ class EDICTStyleDictionary(BaseDictionary):
         :param limit: limiting number of returned entries
         :type orderBy: list
         :param orderBy: list of column names or SQLAlchemy column objects giving
-            the order of returned entries
+            the order of returned entries, or tuples of one of them and
+            ``'asc'`` or ``'desc'`` giving the sort direction
         """
         return self._search(None, None, limit, orderBy)
 
@@ -374,32 +673,33 @@ class EDICTStyleDictionary(BaseDictionary):
         :param limit: limiting number of returned entries
         :type orderBy: list
         :param orderBy: list of column names or SQLAlchemy column objects giving
-            the order of returned entries
+            the order of returned entries, or tuples of one of them and
+            ``'asc'`` or ``'desc'`` giving the sort direction
 
         .. todo::
             * bug: Specifying a ``limit`` might yield less results than
-              possible.
+              possible on engines other than SQLite.
         """
         clauses, filters = self._getHeadwordSearch(headwordStr)
 
         return self._search(or_(*clauses), filters, limit, orderBy)
 
-    def _getReadingSearch(self, readingStr, **options):
+    def _getPlainReadingSearch(self, readingStr, **options):
         dictionaryTable = self.db.tables[self.DICTIONARY_TABLE]
 
-        clauses = []
-        filters = []
-
-        # reading search
         readingClause = self.readingSearchStrategy.getWhereClause(
             dictionaryTable.c.Reading, readingStr, **options)
-        clauses.append(readingClause)
 
         readingMatchFunc = self.readingSearchStrategy.getMatchFunction(
             readingStr, **options)
-        filters.append((['Reading'], readingMatchFunc))
 
-        # mixed search
+        return [readingClause], [(['Reading'], readingMatchFunc)]
+
+    def _getMixedReadingSearch(self, readingStr, **options):
+        dictionaryTable = self.db.tables[self.DICTIONARY_TABLE]
+
+        clauses = []
+        filters = []
         if self.mixedReadingSearchStrategy:
             mixedClause = self.mixedReadingSearchStrategy.getWhereClause(
                 dictionaryTable.c.Headword, dictionaryTable.c.Reading,
@@ -415,6 +715,16 @@ class EDICTStyleDictionary(BaseDictionary):
 
         return clauses, filters
 
+    def _getReadingSearch(self, readingStr, **options):
+        clauses, filters = self._getPlainReadingSearch(readingStr, **options)
+
+        mixedClauses, mixedFilters = self._getMixedReadingSearch(readingStr,
+            **options)
+        clauses.extend(mixedClauses)
+        filters.extend(mixedFilters)
+
+        return clauses, filters
+
     def getForReading(self, readingStr, limit=None, orderBy=None, **options):
         """
         Get dictionary entries whose reading matches the given string.
@@ -423,13 +733,14 @@ class EDICTStyleDictionary(BaseDictionary):
         :param limit: limiting number of returned entries
         :type orderBy: list
         :param orderBy: list of column names or SQLAlchemy column objects giving
-            the order of returned entries
+            the order of returned entries, or tuples of one of them and
+            ``'asc'`` or ``'desc'`` giving the sort direction
         :raise ConversionError: if search string cannot be converted to the
             dictionary's reading.
 
         .. todo::
             * bug: Specifying a ``limit`` might yield less results than
-              possible.
+              possible on engines other than SQLite.
         """
         clauses, filters = self._getReadingSearch(readingStr, **options)
 
@@ -451,18 +762,32 @@ class EDICTStyleDictionary(BaseDictionary):
         """
         Get dictionary entries whose translation matches the given string.
 
+        If no order is given and the translation search strategy supports
+        ranking, e.g. using a full text index, best matching entries are
+        returned first.
+
         :type limit: int
         :param limit: limiting number of returned entries
         :type orderBy: list
         :param orderBy: list of column names or SQLAlchemy column objects giving
-            the order of returned entries
+            the order of returned entries, or tuples of one of them and
+            ``'asc'`` or ``'desc'`` giving the sort direction
 
         .. todo::
             * bug: Specifying a ``limit`` might yield less results than
-              possible.
+              possible on engines other than SQLite.
         """
         clauses, filters = self._getTranslationSearch(translationStr)
 
+        if orderBy is None and hasattr(self.translationSearchStrategy,
+            'getRankedWhereClause'):
+            dictionaryTable = self.db.tables[self.DICTIONARY_TABLE]
+            ranked = self.translationSearchStrategy.getRankedWhereClause(
+                dictionaryTable.c.Translation, translationStr)
+            if ranked is not None:
+                rankedClause, rank = ranked
+                return self._search(rankedClause, filters, limit, [rank])
+
         return self._search(or_(*clauses), filters, limit, orderBy)
 
     def getFor(self, searchStr, limit=None, orderBy=None, **options):
@@ -470,28 +795,108 @@ class EDICTStyleDictionary(BaseDictionary):
         Get dictionary entries whose headword, reading or translation matches
         the given string.
 
+        Searches that cannot match the given string are skipped, e.g. readings
+        for strings including Han characters. Under SQLite the remaining
+        searches are combined using ``UNION`` so that each can use its index.
+
         :type limit: int
         :param limit: limiting number of returned entries
         :type orderBy: list
         :param orderBy: list of column names or SQLAlchemy column objects giving
-            the order of returned entries
+            the order of returned entries, or tuples of one of them and
+            ``'asc'`` or ``'desc'`` giving the sort direction
 
         .. todo::
             * bug: Specifying a ``limit`` might yield less results than
-              possible.
+              possible on engines other than SQLite.
         """
+        clauses, filters = self._getSearch(searchStr, **options)
+
+        return self._search(self._getUnionClause(clauses), filters, limit,
+            orderBy)
+
+    def _getSearch(self, searchStr, **options):
+        # skip searches that cannot match: readings are phonetic and hold no
+        #   Han characters, translations are not made of Han characters only
+        searchFuncs = [self._getHeadwordSearch]
+        if not _hasHanCharacters(searchStr):
+            searchFuncs.append(self._getPlainReadingSearch)
+        searchFuncs.append(self._getMixedReadingSearch)
+        if not _isHanOnly(searchStr):
+            searchFuncs.append(self._getTranslationSearch)
+
         clauseList = []
         filterList = []
-        for searchFunc in (self._getHeadwordSearch, self._getReadingSearch,
-            self._getTranslationSearch):
+        for searchFunc in searchFuncs:
             try:
                 clauses, filters =  searchFunc(searchStr, **options)
             except exception.ConversionError:
-                pass
+                continue
             clauseList.extend(clauses)
             filterList.extend(filters)
 
-        return self._search(or_(*clauseList), filterList, limit, orderBy)
+        return clauseList, filterList
+
+    def getPage(self, method, searchStr=None, limit=100, orderBy=None,
+        cursor=None, **options):
+        dictionaryTable = self.db.tables[self.DICTIONARY_TABLE]
+
+        if method == 'getAll':
+            whereClause = filters = None
+        else:
+            searchFuncs = {'getFor': self._getSearch,
+                'getForHeadword': self._getHeadwordSearch,
+                'getForReading': self._getReadingSearch,
+                'getForTranslation': self._getTranslationSearch}
+            if method not in searchFuncs:
+                raise ValueError("Unknown access method '%s'" % method)
+            clauses, filters = searchFuncs[method](searchStr, **options)
+            if method == 'getFor':
+                whereClause = self._getUnionClause(clauses)
+            else:
+                whereClause = or_(*clauses)
+
+        # order by the given columns and all dictionary columns as tiebreak,
+        #   the same as the rows made unique by DISTINCT, a column repeated
+        #   in the order prevents SQLite from using an index
+        orderKeys = self._getOrderKeys(orderBy)
+        for col in self.COLUMNS:
+            column = dictionaryTable.c[col]
+            if not any(column is keyColumn for keyColumn, _ in orderKeys):
+                orderKeys.append((column, False))
+        orderByCols = []
+        for column, descending in orderKeys:
+            if descending:
+                orderByCols.append(column.desc())
+            else:
+                orderByCols.append(column)
+        if cursor is not None:
+            keysetClause = _getKeysetClause(orderKeys,
+                _decodeCursor(cursor, len(orderKeys)))
+            if whereClause is not None:
+                whereClause = and_(whereClause, keysetClause)
+            else:
+                whereClause = keysetClause
+
+        # select keys separately, also keeping SQLite from turning DISTINCT
+        #   into a grouping that reads all rows
+        rows, filterFunction = self._searchRows(whereClause, filters, limit,
+            orderByCols, [column.label('OrderKey%d' % idx)
+                for idx, (column, _) in enumerate(orderKeys)])
+        rows = list(rows)
+
+        # continue after the last row read, filtering in Python might give
+        #   shorter pages
+        nextCursor = None
+        if limit is not None and len(rows) == limit:
+            nextCursor = _encodeCursor(list(rows[-1][len(self.COLUMNS):]))
+
+        if filterFunction:
+            rows = ifilter(filterFunction, rows)
+        entries = list(self._getEntries(row[:len(self.COLUMNS)]
+            for row in rows))
+
+        return entries, nextCursor
 
 
 class EDICT(EDICTStyleDictionary):
@@ -612,22 +1017,11 @@ class CEDICT(EDICTStyleEnhancedReadingDictionary):
                 % headword \
                 + " Allowed values 's'implified, 't'raditional, or 'b'oth")
 
-    def _getReadingSearch(self, readingStr, **options):
+    def _getMixedReadingSearch(self, readingStr, **options):
         dictionaryTable = self.db.tables[self.DICTIONARY_TABLE]
 
         clauses = []
         filters = []
-
-        # reading search
-        readingClause = self.readingSearchStrategy.getWhereClause(
-            dictionaryTable.c.Reading, readingStr, **options)
-        clauses.append(readingClause)
-
-        readingMatchFunc = self.readingSearchStrategy.getMatchFunction(
-            readingStr, **options)
-        filters.append((['Reading'], readingMatchFunc))
-
-        # mixed search
         if self.mixedReadingSearchStrategy:
             mixedClauses = []
             if self.headword != 't':
@@ -145,6 +145,9 @@ class NonReadingEntityWhitespace(Base):
 
     def format(self, columns):
         headword, headwordSimplified, reading, translation = columns
+        if reading is None:
+            # reading failed to convert in a previous strategy
+            return columns
 
         readingEntities = []
         precedingIsNonReading = False
@@ -395,8 +395,13 @@ class DictionaryInstaller(object):
         :keyword prefix: installation prefix for a global install (Unix only).
         :keyword forceUpdate: dictionary will be installed even if a newer
             version already exists
+        :keyword update: if ``True`` an installed dictionary is updated by
+            applying only the changed entries instead of being rebuilt
         :keyword quiet: if ``True`` no status information will be printed to
             stdout
+
+        .. versionadded:: 0.3.1
+           Option ``update``.
         """
         # get database connection
         configuration = {}
@@ -433,6 +438,7 @@ class DictionaryInstaller(object):
 
         # check if we already have newest version
         forceUpdate = options.pop('forceUpdate', False)
+        update = options.pop('update', False)
         if not forceUpdate and db.hasTable(dictionaryName):
             if db.hasTable('Version'):
                 table = db.tables['Version']
@@ -455,25 +461,52 @@ class DictionaryInstaller(object):
             **options)
 
         try:
-            tables = [dictionaryName]
-            if not db.mainHasTable('Version'):
-                tables.append('Version')
-            dbBuilder.build(tables)
+            if update and db.mainHasTable(dictionaryName):
+                if not db.mainHasTable('Version'):
+                    dbBuilder.build(['Version'])
 
-            table = db.tables['Version']
-            db.execute(table.delete().where(
-                table.c.TableName == dictionaryName))
+                # apply changes and set version in one transaction
+                transaction = db.connection.begin()
+                try:
+                    dbBuilder.update([dictionaryName])
+                    self._setVersion(db, dictionaryName,
+                        downloader.getVersion())
+                    transaction.commit()
+                except:
+                    transaction.rollback()
+                    raise
+            else:
+                tables = [dictionaryName]
+                if not db.mainHasTable('Version'):
+                    tables.append('Version')
+                dbBuilder.build(tables)
 
-            version = downloader.getVersion()
-            if version:
-                db.execute(table.insert().values(TableName=dictionaryName,
-                    ReleaseDate=version))
+                self._setVersion(db, dictionaryName, downloader.getVersion())
         finally:
             # remove temporary tables
             dbBuilder.clearTemporary()
 
         return configuration['sqlalchemy.url']
 
+    @staticmethod
+    def _setVersion(db, dictionaryName, version):
+        """
+        Records the version of the installed dictionary.
+
+        :type db: instance
+        :param db: :class:`~cjklib.dbconnector.DatabaseConnector` instance
+        :type dictionaryName: str
+        :param dictionaryName: name of dictionary
+        :type version: datetime
+        :param version: release date of the dictionary, ``None`` if unknown
+        """
+        table = db.tables['Version']
+        db.execute(table.delete().where(table.c.TableName == dictionaryName))
+
+        if version:
+            db.execute(table.insert().values(TableName=dictionaryName,
+                ReleaseDate=version))
+
 
 class CommandLineInstaller(object):
     """Command line dictionary installer."""
@@ -623,6 +656,9 @@ along with cjklib.  If not, see <http://www.gnu.org/licenses/>.""" \
         parser.add_option("-f", "--forceUpdate", action="store_true",
             dest="forceUpdate", default=False,
             help="install dictionary even if the version is older or equal")
+        parser.add_option("-u", "--update", action="store_true",
+            dest="update", default=False,
+            help="only apply changes to an installed dictionary")
         parser.add_option("--prefix", action="store",
             metavar="PREFIX", dest="prefix", default=None,
             help="installation prefix")
@@ -17,9 +17,6 @@
 
 """
 Search strategies for dictionaries.
-
-.. todo::
-    * Impl: Allow simple FTS3 searching as build support is already provided.
 """
 
 __all__ = [
@@ -39,9 +36,13 @@ __all__ = [
 
 import re
 import string
+import math
+import struct
 
-from sqlalchemy.sql import and_, or_
+from sqlalchemy import MetaData, Table, Column, Integer
+from sqlalchemy.sql import and_, or_, select, text, literal_column
 from sqlalchemy.sql.expression import func
+from sqlalchemy.exc import OperationalError
 
 from cjklib.reading import ReadingFactory
 from cjklib import exception
@@ -70,6 +71,45 @@ def _escapeWildcards(string, escape='\\'):
     # insert escape
     return _wildcardRegexCache[escape].sub(r'%s\1' % re.escape(escape), string)
 
+def _getLikePrefix(query, escape='\\'):
+    r"""
+    Returns the literal part of a SQL LIKE statement preceding the first
+    wildcard.
+
+        >>> _getLikePrefix('zhi\\_dao_ %')
+        'zhi_dao'
+    """
+    prefix = []
+    chars = iter(query)
+    for char in chars:
+        if char == escape:
+            try:
+                prefix.append(chars.next())
+            except StopIteration:
+                pass
+        elif char in ('_', '%'):
+            break
+        else:
+            prefix.append(char)
+    return ''.join(prefix)
+
+def _getPrefixRange(prefix):
+    """
+    Returns lower and upper bound of strings starting with the given prefix,
+    ignoring case of ASCII characters like SQL LIKE does.
+    """
+    lowerBound = []
+    upperBound = []
+    for char in prefix:
+        if char in string.ascii_letters:
+            lowerBound.append(char.upper())
+            upperBound.append(char.lower())
+        else:
+            lowerBound.append(char)
+            upperBound.append(char)
+    # largest codepoint, also sorting last in UTF-8
+    return ''.join(lowerBound), ''.join(upperBound) + u'\U0010ffff'
+
 _FULL_WIDTH_MAP = dict((ord(halfWidth), unichr(ord(halfWidth) + 65248))
     for halfWidth in (string.ascii_uppercase + string.ascii_lowercase))
 """Mapping of halfwidth characters to fullwidth."""
@@ -81,6 +121,36 @@ def _mapToFullwidth(string):
     else:
         return string.translate(_FULL_WIDTH_MAP)
 
+_FULL_TEXT_TOKEN_REGEX = re.compile(r'\w+', re.UNICODE)
+"""Regular expression matching tokens of a full text query."""
+
+def _bm25(matchInfo, k1=1.2, b=0.75):
+    """
+    Calculates the Okapi BM25 rank of a full text match from the result of
+    SQLite's FTS4 function ``matchinfo(table, 'pcnalx')``. As for FTS5's
+    ``bm25()`` better matches get lower values.
+    """
+    values = struct.unpack('@%dI' % (len(matchInfo) / 4), str(matchInfo))
+    phraseCount, columnCount, rowCount = values[:3]
+    averageLengths = values[3:3 + columnCount]
+    lengths = values[3 + columnCount:3 + 2 * columnCount]
+    hits = values[3 + 2 * columnCount:]
+
+    score = 0.
+    for phraseIdx in range(phraseCount):
+        for columnIdx in range(columnCount):
+            idx = 3 * (phraseIdx * columnCount + columnIdx)
+            frequency, rowsWithHits = hits[idx], hits[idx + 2]
+            if not frequency:
+                continue
+            idf = max(math.log((rowCount - rowsWithHits + 0.5)
+                / (rowsWithHits + 0.5)), 1e-6)
+            length = (float(lengths[columnIdx])
+                / (averageLengths[columnIdx] or 1))
+            score += (idf * frequency * (k1 + 1)
+                / (frequency + k1 * (1 - b + b * length)))
+    return -score
+
 defaultSingleCharacter = '_'
 defaultMultipleCharacters = '%'
 
@@ -410,12 +480,184 @@ class Wildcard(Exact, _WildcardBase):
 #{ Translation search strategies
 
 class SingleEntryTranslation(Exact):
-    """Basic translation search strategy."""
-    def __init__(self, caseInsensitive=True, **options):
+    """
+    Basic translation search strategy.
+
+    If the dictionary comes with a full text index of its translations (see
+    :class:`~cjklib.build.builder.EDICTFormatBuilder`), candidate entries are
+    looked up in the index instead of scanning the whole table. Search strings
+    the index cannot serve fall back to a ``LIKE`` clause.
+    """
+    SENSE_ROWID_FACTOR = 1024
+    """
+    Factor to the row id of a dictionary entry giving the first row id of its
+    senses in the full text index, see
+    :attr:`~cjklib.build.builder.EDICTFormatBuilder.SENSE_ROWID_FACTOR`.
+    """
+    def __init__(self, caseInsensitive=True, fullText=True, **options):
+        """
+        :type caseInsensitive: bool
+        :param caseInsensitive: if ``True``, latin characters match their
+            upper/lower case equivalent, if ``False`` case sensitive matches
+            will be made
+        :type fullText: bool
+        :param fullText: if ``True`` the full text index of translations will
+            be used if available
+
+        .. versionadded:: 0.3.1
+           Option ``fullText``.
+        """
         Exact.__init__(self, caseInsensitive=caseInsensitive,
             **options)
+        self._fullText = fullText
+        self._sensesTable = None
+
+    def setDictionaryInstance(self, dictInstance):
+        super(SingleEntryTranslation, self).setDictionaryInstance(
+            dictInstance)
+        self._sensesTable = None
+        tableName = getattr(dictInstance, 'DICTIONARY_TABLE', None)
+        if self._fullText and tableName:
+            self._setFullTextIndex(dictInstance.db, tableName)
+
+    def _setFullTextIndex(self, db, tableName):
+        """
+        Looks up the full text index of translations for the given dictionary
+        table.
+        """
+        sensesTableName = tableName + '_Senses'
+        if (db.engine.name != 'sqlite' or not db.hasTable(tableName)
+            or not db.hasTable(sensesTableName)):
+            return
+
+        schema = db.tables[tableName].schema
+        if db.tables[sensesTableName].schema != schema:
+            return
+
+        preparer = db.engine.dialect.identifier_preparer
+        createStatement = db.selectScalar(text(
+            "SELECT sql FROM %s.sqlite_master WHERE name = :name"
+                % preparer.quote_identifier(schema)), name=sensesTableName)
+        for module in ('FTS5', 'FTS4'):
+            if module in (createStatement or '').upper():
+                break
+        else:
+            return
+
+        sensesTable = Table(sensesTableName, MetaData(),
+            Column('rowid', Integer), Column('Translation'), Column('rank'),
+            Column(sensesTableName), schema=schema)
+        try:
+            # fails if the SQLite extension is missing
+            db.selectScalar(select([sensesTable.c.rowid]).limit(1))
+        except OperationalError:
+            return
+        if module == 'FTS4':
+            db.registerFunction('cjklib_bm25', 1, _bm25)
+
+        self._fullTextModule = module
+        self._sensesTable = sensesTable
+        self._dictionaryRowId = literal_column('%s.rowid'
+            % preparer.format_table(db.tables[tableName]))
+
+    def _getFullTextQuery(self, searchStr):
+        """
+        Gets the full text query for the given search string, that finds all
+        senses possibly matching.
+
+        :type searchStr: str
+        :param searchStr: search string
+        :rtype: str
+        :return: full text query, ``None`` if no full text index is available
+            or the search string is not supported
+        """
+        if self._sensesTable is None:
+            return None
+
+        prefix = False
+        if hasattr(self, '_parseWildcardString'):
+            # only support a trailing wildcard
+            entities = self._parseWildcardString(searchStr)
+            if entities and isinstance(entities[-1], self.MultipleWildcard):
+                prefix = True
+                entities = entities[:-1]
+            if any(not isinstance(entity, basestring) for entity in entities):
+                return None
+            searchStr = ''.join(entities)
+
+        # senses are indexed separately
+        if '/' in searchStr:
+            return None
+        tokens = _FULL_TEXT_TOKEN_REGEX.findall(searchStr)
+        if not tokens:
+            return None
+
+        if self._fullTextModule == 'FTS5':
+            return '"%s"%s' % (' '.join(tokens), prefix and ' *' or '')
+        else:
+            return '"%s%s"' % (' '.join(tokens), prefix and '*' or '')
+
+    def _getFullTextClause(self, searchStr):
+        """
+        Gets a clause selecting entries with senses found in the full text
+        index.
+
+        :type searchStr: str
+        :param searchStr: search string
+        :return: SQLAlchemy clause, ``None`` if no full text index can be used
+        """
+        query = self._getFullTextQuery(searchStr)
+        if query is None:
+            return None
+
+        senses = self._sensesTable
+        return self._dictionaryRowId.in_(
+            select([senses.c.rowid / self.SENSE_ROWID_FACTOR],
+                senses.c.Translation.op('MATCH')(query)))
+
+    def getRankedWhereClause(self, column, searchStr):
+        """
+        Returns a SQLAlchemy clause like
+        :meth:`~cjklib.dictionary.search.SingleEntryTranslation.getWhereClause`
+        together with an expression ordering entries by the relevance of their
+        best matching sense (bm25).
+
+        .. versionadded:: 0.3.1
+
+        :type column: SQLAlchemy column instance
+        :param column: column to check against
+        :type searchStr: str
+        :param searchStr: search string
+        :rtype: tuple
+        :return: SQLAlchemy clause and expression to order by, ``None`` if no
+            full text index can be used
+        """
+        query = self._getFullTextQuery(searchStr)
+        if query is None:
+            return None
+
+        senses = self._sensesTable
+        entryRowId = senses.c.rowid / self.SENSE_ROWID_FACTOR
+        matchClause = senses.c.Translation.op('MATCH')(query)
+        if self._fullTextModule == 'FTS5':
+            ranked = select([entryRowId.label('EntryRowId'),
+                func.min(senses.c.rank).label('Rank')],
+                matchClause).group_by(entryRowId)
+        else:
+            # auxiliary functions can't be aggregated
+            ranked = select([entryRowId.label('EntryRowId'),
+                func.cjklib_bm25(func.matchinfo(senses.c[senses.name],
+                    'pcnalx')).label('Rank')],
+                matchClause)
+        ranked = ranked.alias('ranked')
+
+        return self._dictionaryRowId == ranked.c.EntryRowId, ranked.c.Rank
 
     def getWhereClause(self, column, searchStr):
+        clause = self._getFullTextClause(searchStr)
+        if clause is not None:
+            return clause
+
         return self._contains(column, _escapeWildcards(searchStr), escape='\\')
 
     def getMatchFunction(self, searchStr):
@@ -439,6 +681,10 @@ class WildcardTranslation(SingleEntryTranslation,
             + '/')
 
     def getWhereClause(self, column, searchStr):
+        clause = self._getFullTextClause(searchStr)
+        if clause is not None:
+            return clause
+
         wildcardSearchStr = self._getWildcardQuery(searchStr)
         return self._contains(column, wildcardSearchStr)
 
@@ -501,6 +747,10 @@ class SimpleWildcardTranslation(SingleEntryTranslation,
         return self._compileRegex('/' + regexStr + '/')
 
     def getWhereClause(self, column, searchStr):
+        clause = self._getFullTextClause(searchStr)
+        if clause is not None:
+            return clause
+
         wildcardSearchStr = self._getWildcardQuery(searchStr)
         return self._contains(column, wildcardSearchStr)
 
@@ -549,6 +799,10 @@ class CEDICTWildcardTranslation(SingleEntryTranslation,
         return self._compileRegex('/' + regexStr + '[/,]')
 
     def getWhereClause(self, column, searchStr):
+        clause = self._getFullTextClause(searchStr)
+        if clause is not None:
+            return clause
+
         wildcardSearchStr = self._getWildcardQuery(searchStr)
         return self._contains(column, wildcardSearchStr)
 
@@ -602,6 +856,10 @@ class HanDeDictWildcardTranslation(SingleEntryTranslation,
             + '[/\,\;\.\?\!]')
 
     def getWhereClause(self, column, searchStr):
+        clause = self._getFullTextClause(searchStr)
+        if clause is not None:
+            return clause
+
         wildcardSearchStr = self._getWildcardQuery(searchStr)
         return self._contains(column, wildcardSearchStr)
 
@@ -980,6 +1238,36 @@ class _TonelessReadingWildcardBase(_SimpleReadingWildcardBase):
 
         return self._wildcardForms
 
+    def _getTonelessForms(self, searchStr, **options):
+        """
+        Returns the reading entities of the wildcard forms with tones removed,
+        together with a flag marking forms that include a tonal entity. A form
+        is ``None`` if an entity can't be split into plain entity and tone.
+        """
+        tonelessForms = []
+        for entities in self._getPlainForms(searchStr, **options):
+            tonelessEntities = []
+            hasTone = False
+            for entity in entities:
+                if not isinstance(entity, basestring):
+                    entity, plainEntity, tone = entity
+                    if plainEntity is None:
+                        tonelessEntities = None
+                        break
+                    hasTone = hasTone or tone is not None
+                    tonelessEntities.append(plainEntity)
+                elif self._supportWildcards:
+                    tonelessEntities.extend(self._parseWildcardString(entity))
+                else:
+                    tonelessEntities.extend(getCharacterList(entity))
+
+            if tonelessEntities is None:
+                tonelessForms.append(None)
+            else:
+                tonelessForms.append((tonelessEntities, hasTone))
+
+        return tonelessForms
+
     def _hasWildcardForms(self, searchStr, **options):
         wildcardForms = self._getWildcardForms(searchStr, **options)
         return any(any((not isinstance(entity, basestring))
@@ -1011,6 +1299,11 @@ class TonelessWildcardReading(SimpleReading,
     Reading based search strategy with support for missing tonal information and
     wildcards.
 
+    If the dictionary provides a column ``ReadingToneless`` (see option
+    ``tonelessReading`` of :class:`~cjklib.build.builder.EDICTFormatBuilder`)
+    searches are done on the indexed toneless reading, by exact lookup or by a
+    range lookup for the part preceding the first wildcard.
+
     Example:
 
         >>> from cjklib.dictionary import *
@@ -1050,8 +1343,65 @@ class TonelessWildcardReading(SimpleReading,
                 self._dictInstance.READING,
                 **self._dictInstance.READING_OPTIONS))
 
+    def _getFormClause(self, column, entities):
+        """
+        Returns a where clause matching the given reading entities, using an
+        exact lookup if no wildcard is included.
+        """
+        if any((not isinstance(entity, basestring)) for entity in entities):
+            return self._like(column, self._getWildcardReading(entities))
+        else:
+            return self._equals(column, ' '.join(entities))
+
+    def _getTonelessClause(self, column, tonelessColumn, searchStr,
+        **options):
+        """
+        Returns a where clause on the toneless reading column. Tonal entities
+        are checked on the reading column for forms including such.
+        """
+        wildcardForms = self._getWildcardForms(searchStr, **options)
+        tonelessForms = self._getTonelessForms(searchStr, **options)
+
+        clauses = []
+        for wildcardEntities, tonelessForm in zip(wildcardForms,
+            tonelessForms):
+            if tonelessForm is None:
+                clauses.append(self._getFormClause(column, wildcardEntities))
+                continue
+
+            tonelessEntities, hasTone = tonelessForm
+            clause = self._getFormClause(tonelessColumn, tonelessEntities)
+            if not self._needsIEquals:
+                # limit pattern by a range on the plain prefix to use the
+                #   index, comparisons follow the column's collation
+                prefixEntities = []
+                for entity in tonelessEntities:
+                    if not isinstance(entity, basestring):
+                        if entity.SQL_LIKE_STATEMENT != '%':
+                            prefixEntities.append('')
+                        break
+                    prefixEntities.append(entity)
+                else:
+                    prefixEntities = []
+                prefix = ' '.join(prefixEntities)
+                if prefix:
+                    rangeColumn = tonelessColumn
+                    if self._sqlCollation:
+                        rangeColumn = rangeColumn.collate(self._sqlCollation)
+                    clause = and_(rangeColumn >= prefix,
+                        rangeColumn < prefix + u'\uffff', clause)
+            if hasTone:
+                clause = and_(clause,
+                    self._getFormClause(column, wildcardEntities))
+            clauses.append(clause)
+
+        return or_(*clauses)
+
     def getWhereClause(self, column, searchStr, **options):
-        if self._hasWildcardForms(searchStr, **options):
+        if 'ReadingToneless' in column.table.c:
+            return self._getTonelessClause(column,
+                column.table.c.ReadingToneless, searchStr, **options)
+        elif self._hasWildcardForms(searchStr, **options):
             queries = self._getWildcardQuery(searchStr, **options)
             return or_(*[self._like(column, query) for query in queries])
         else:
@@ -1206,6 +1556,29 @@ class _MixedReadingWildcardBase(_SimpleReadingWildcardBase):
 
         return self._wildcardForms
 
+    def _getPairClause(self, headwordColumn, readingColumn, headwordQuery,
+        readingQuery):
+        """
+        Returns a where clause for the given headword and reading queries. The
+        literal prefix of either query is given as a range, so that an index
+        can be used.
+        """
+        clause = and_(self._like(headwordColumn, headwordQuery),
+            self._like(readingColumn, readingQuery))
+        if self._needsIlike:
+            return clause
+
+        for column, query in ((headwordColumn, headwordQuery),
+            (readingColumn, readingQuery)):
+            prefix = _getLikePrefix(query, self.escape)
+            if prefix:
+                lowerBound, upperBound = _getPrefixRange(prefix)
+                if self._sqlCollation:
+                    column = column.collate(self._sqlCollation)
+                return and_(column >= lowerBound, column < upperBound, clause)
+
+        return clause
+
     def _getWildcardHeadword(self, entities):
         """Join chars, taking care of wildcards."""
         entityList = [entity.SQL_LIKE_STATEMENT_HEADWORD for entity in entities]
@@ -1311,10 +1684,9 @@ class MixedWildcardReading(SimpleReading,
         """
         queries = self._getWildcardQuery(searchStr, **options)
         if queries:
-            return or_(*[
-                    and_(self._like(headwordColumn, headwordQuery),
-                        self._like(readingColumn, readingQuery))
-                    for headwordQuery, readingQuery in queries])
+            return or_(*[self._getPairClause(headwordColumn, readingColumn,
+                    headwordQuery, readingQuery)
+                for headwordQuery, readingQuery in queries])
         else:
             return None
 
@@ -1456,10 +1828,9 @@ class MixedTonelessWildcardReading(SimpleReading,
         """
         queries = self._getWildcardQuery(searchStr, **options)
         if queries:
-            return or_(*[
-                    and_(self._like(headwordColumn, headwordQuery),
-                        self._like(readingColumn, readingQuery))
-                    for headwordQuery, readingQuery in queries])
+            return or_(*[self._getPairClause(headwordColumn, readingColumn,
+                    headwordQuery, readingQuery)
+                for headwordQuery, readingQuery in queries])
         else:
             return None
 
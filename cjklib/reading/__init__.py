@@ -23,8 +23,10 @@ __all__ = ['operator', 'converter', 'ReadingFactory']
 
 import types
 
-from cjklib.exception import UnsupportedError
+from cjklib.exception import (UnsupportedError, DecompositionError,
+    CompositionError, ConversionError)
 from cjklib import dbconnector
+from cjklib.util import LRUDict
 from cjklib.reading import operator as readingoperator
 from cjklib.reading import converter as readingconverter
 
@@ -237,6 +239,7 @@ class ReadingFactory(object):
         self._sharedState[self.db] = {}
         self._sharedState[self.db]['readingOperatorInstances'] = {}
         self._sharedState[self.db]['readingConverterInstances'] = {}
+        self._sharedState[self.db]['readingMappingTables'] = {}
 
     def publishReadingOperator(self, readingOperator):
         """
@@ -734,6 +737,73 @@ class ReadingFactory(object):
         return readingConv.convertEntities(readingEntities, fromReading,
             toReading)
 
+    def convertMany(self, readingStrings, fromReading, toReading, *args,
+        **options):
+        """
+        Converts the given strings in the source reading to the given target
+        reading and returns an iterator over the converted strings in input
+        order.
+
+        The converter is resolved once for all strings and identical input
+        strings are converted only once as long as they are held in a cache of
+        recent conversions.
+
+        By default the first error raised on converting stops the iteration.
+        If ``captureErrors`` is set to ``True``, the exception instance
+        (:exc:`~cjklib.exception.DecompositionError`,
+        :exc:`~cjklib.exception.CompositionError` or
+        :exc:`~cjklib.exception.ConversionError`) is yielded instead of the
+        converted string and conversion continues with the next string.
+
+        .. versionadded:: 0.3.1
+
+        :type readingStrings: iterable of str
+        :param readingStrings: strings that need to be converted
+        :type fromReading: str
+        :param fromReading: name of the source reading
+        :type toReading: str
+        :param toReading: name of the target reading
+        :param args: optional list of
+            :class:`ReadingOperators <cjklib.reading.operator.ReadingOperator>`
+            to use for handling source and target readings.
+        :param options: additional options for handling the input, see
+            :meth:`~cjklib.reading.ReadingFactory.convert`
+        :keyword cacheSize: maximum number of converted strings cached for
+            reuse on repeated input, ``0`` disables the cache
+        :keyword captureErrors: if ``True`` exceptions on conversion will be
+            yielded in place of the converted string
+        :rtype: iterator of str
+        :return: the converted strings
+        :raise UnsupportedError: if source or target reading is not supported
+            for conversion.
+        """
+        cacheSize = options.pop('cacheSize', 10000)
+        captureErrors = options.pop('captureErrors', False)
+
+        readingConv = self._getReadingConverterInstance(fromReading, toReading,
+            *args, **options)
+
+        conversionErrors = (DecompositionError, CompositionError,
+            ConversionError)
+        if cacheSize:
+            cache = LRUDict(cacheSize)
+        else:
+            cache = {}
+        for readingStr in readingStrings:
+            if readingStr in cache:
+                result = cache[readingStr]
+            else:
+                try:
+                    result = readingConv.convert(readingStr, fromReading,
+                        toReading)
+                except conversionErrors, e:
+                    if not captureErrors:
+                        raise
+                    result = e
+                if cacheSize:
+                    cache[readingStr] = result
+            yield result
+
     #}
     #{ ReadingOperator methods
 
@@ -40,10 +40,9 @@ import copy
 import types
 
 from sqlalchemy import select
-from sqlalchemy.sql import and_
 
 from cjklib.exception import (ConversionError, AmbiguousConversionError,
-    InvalidEntityError, UnsupportedError)
+    DecompositionError, InvalidEntityError, UnsupportedError)
 from cjklib import dbconnector
 from cjklib.reading import operator as readingoperator
 import cjklib.reading
@@ -229,6 +228,48 @@ class ReadingConverter(object):
                 = self._f._getReadingOperatorInstance(readingN)
         return self.targetOperators[readingN]
 
+    def _getMappingTable(self, tableName, keyColumns, valueColumn):
+        """
+        Gets a mapping from the given key column(s) of a table to the values of
+        another column.
+
+        The table is read once per database and the mapping is shared between
+        all converters using the same database, so that no further queries are
+        issued on conversion.
+
+        :type tableName: str
+        :param tableName: name of the mapping table
+        :type keyColumns: str or tuple of str
+        :param keyColumns: column, or tuple of columns, used as key
+        :type valueColumn: str
+        :param valueColumn: column holding the mapped value
+        :rtype: dict
+        :return: mapping of key (tuple for several key columns) to a list of
+            values
+        """
+        mappingTables = self._f._sharedState[self.db]['readingMappingTables']
+        cacheKey = (tableName, keyColumns, valueColumn)
+        if cacheKey not in mappingTables:
+            table = self.db.tables[tableName]
+            if type(keyColumns) == type(()):
+                columns = [table.c[column] for column in keyColumns]
+            else:
+                columns = [table.c[keyColumns]]
+
+            mapping = {}
+            for row in self.db.iterRows(
+                select(columns + [table.c[valueColumn]])):
+                if len(columns) > 1:
+                    key = row[:-1]
+                else:
+                    key = row[0]
+                if key not in mapping:
+                    mapping[key] = []
+                mapping[key].append(row[-1])
+            mappingTables[cacheKey] = mapping
+
+        return mappingTables[cacheKey]
+
 
 class DialectSupportReadingConverter(ReadingConverter):
     """
@@ -850,18 +891,16 @@ class PinyinWadeGilesConverter(RomanisationConverter):
         plainSyllable, tone = self._f.splitEntityTone(entity, fromReading,
             **self.DEFAULT_READING_OPTIONS[fromReading])
 
-        # lookup in database
+        # lookup in mapping table
         if fromReading == "WadeGiles":
-            table = self.db.tables['WadeGilesPinyinMapping']
-            transSyllable = self.db.selectScalar(
-                select([table.c.Pinyin], table.c.WadeGiles == plainSyllable))
+            mapping = self._getMappingTable('WadeGilesPinyinMapping',
+                'WadeGiles', 'Pinyin')
+            transSyllable = mapping.get(plainSyllable, [None])[0]
         elif fromReading == "Pinyin":
             # mapping from WG to Pinyin has old, dialect forms, use index
-            table = self.db.tables['WadeGilesPinyinMapping']
-            transSyllables = self.db.selectScalars(
-                select([table.c.WadeGiles],
-                    and_(table.c.Pinyin == plainSyllable,
-                        table.c.PinyinIdx == 0)))
+            mapping = self._getMappingTable('WadeGilesPinyinMapping',
+                ('Pinyin', 'PinyinIdx'), 'WadeGiles')
+            transSyllables = mapping.get((plainSyllable, 0), [])
             if len(transSyllables) > 1:
                 raise AmbiguousConversionError(
                     "conversion for entity '%s' is ambiguous: %s" \
@@ -1249,11 +1288,10 @@ class GRPinyinConverter(RomanisationConverter):
             plainSyllable, tone = self._f.splitEntityTone(entity, fromReading,
                 **self.DEFAULT_READING_OPTIONS[fromReading])
 
-        # lookup in database
+        # lookup in mapping table
         if fromReading == "GR":
-            table = self.db.tables['PinyinGRMapping']
-            transSyllable = self.db.selectScalar(select([table.c.Pinyin],
-                table.c.GR == plainSyllable))
+            mapping = self._getMappingTable('PinyinGRMapping', 'GR', 'Pinyin')
+            transSyllable = mapping.get(plainSyllable, [None])[0]
             transTone = self._grToneMapping[tone]
 
         elif fromReading == "Pinyin":
@@ -1262,9 +1300,8 @@ class GRPinyinConverter(RomanisationConverter):
                 erlhuahForm = True
                 plainSyllable = plainSyllable[:-1]
 
-            table = self.db.tables['PinyinGRMapping']
-            transSyllable = self.db.selectScalar(select([table.c.GR],
-                table.c.Pinyin == plainSyllable))
+            mapping = self._getMappingTable('PinyinGRMapping', 'Pinyin', 'GR')
+            transSyllable = mapping.get(plainSyllable, [None])[0]
             if self._pyToneMapping[tone]:
                 transTone = self._pyToneMapping[tone]
             else:
@@ -1438,11 +1475,11 @@ class PinyinIPAConverter(DialectSupportReadingConverter):
         :rtype: str
         :return: IPA representation
         """
-        # lookup in database
-        table = self.db.tables['PinyinIPAMapping']
-        transSyllables = self.db.selectScalars(select([table.c.IPA],
-            and_(table.c.Pinyin == plainSyllable,
-                table.c.Feature.in_(['', 'Default']))))
+        # lookup in mapping table
+        mapping = self._getMappingTable('PinyinIPAMapping',
+            ('Pinyin', 'Feature'), 'IPA')
+        transSyllables = (mapping.get((plainSyllable, ''), [])
+            + mapping.get((plainSyllable, 'Default'), []))
 
         if not transSyllables:
             raise ConversionError("conversion for entity '" + plainSyllable \
@@ -1534,11 +1571,10 @@ class PinyinIPAConverter(DialectSupportReadingConverter):
             _, final = converterInst._getToOperator('Pinyin').getOnsetRhyme(
                 plainSyllable)
             if final == 'e':
-                # lookup in database
-                table = converterInst.db.tables['PinyinIPAMapping']
-                transSyllables = converterInst.db.selectScalars(
-                    select([table.c.IPA], and_(table.c.Pinyin == plainSyllable,
-                        table.c.Feature == '5thTone')))
+                # lookup in mapping table
+                mapping = converterInst._getMappingTable('PinyinIPAMapping',
+                    ('Pinyin', 'Feature'), 'IPA')
+                transSyllables = mapping.get((plainSyllable, '5thTone'), [])
                 if not transSyllables:
                     raise ConversionError("conversion for entity '" \
                         + plainSyllable + "' not supported")
@@ -1616,15 +1652,15 @@ class PinyinBrailleConverter(DialectSupportReadingConverter):
         self._pinyinInitial2Braille = {}
         self._braille2PinyinInitial = {}
 
-        table = self.db.tables['PinyinBrailleInitialMapping']
-        entries = self.db.selectRows(
-            select([table.c.PinyinInitial, table.c.Braille]))
+        mapping = self._getMappingTable('PinyinBrailleInitialMapping',
+            'PinyinInitial', 'Braille')
 
-        for pinyinInitial, brailleChar in entries:
+        for pinyinInitial, brailleChars in mapping.items():
             # Pinyin 2 Braille
-            if pinyinInitial in self._pinyinInitial2Braille:
+            if len(brailleChars) > 1:
                 raise ValueError(
                     "Ambiguous mapping from Pinyin syllable initial to Braille")
+            brailleChar = brailleChars[0]
             self._pinyinInitial2Braille[pinyinInitial] = brailleChar
             # Braille 2 Pinyin
             if brailleChar not in self._braille2PinyinInitial:
@@ -1638,15 +1674,15 @@ class PinyinBrailleConverter(DialectSupportReadingConverter):
         self._pinyinFinal2Braille = {}
         self._braille2PinyinFinal = {}
 
-        table = self.db.tables['PinyinBrailleFinalMapping']
-        entries = self.db.selectRows(
-            select([table.c.PinyinFinal, table.c.Braille]))
+        mapping = self._getMappingTable('PinyinBrailleFinalMapping',
+            'PinyinFinal', 'Braille')
 
-        for pinyinFinal, brailleChar in entries:
+        for pinyinFinal, brailleChars in mapping.items():
             # Pinyin 2 Braille
-            if pinyinFinal in self._pinyinFinal2Braille:
+            if len(brailleChars) > 1:
                 raise ValueError(
                     "Ambiguous mapping from Pinyin syllable final to Braille")
+            brailleChar = brailleChars[0]
             self._pinyinFinal2Braille[pinyinFinal] = brailleChar
             # Braille 2 Pinyin
             if brailleChar not in self._braille2PinyinFinal:
@@ -1766,15 +1802,13 @@ class PinyinBrailleConverter(DialectSupportReadingConverter):
             initial, final = fromOperator.getOnsetRhyme(plainEntity)
 
             # get all possible forms
+            mapping = self._getMappingTable('PinyinInitialFinal',
+                ('PinyinInitial', 'PinyinFinal'), 'Pinyin')
             forms = []
             for i in self._braille2PinyinInitial[initial]:
                 for f in self._braille2PinyinFinal[final]:
                     # get Pinyin syllable
-                    table = self.db.tables['PinyinInitialFinal']
-                    entry = self.db.selectScalar(
-                        select([table.c.Pinyin],
-                            and_(table.c.PinyinInitial == i,
-                                table.c.PinyinFinal == f)))
+                    entry = mapping.get((i, f), [None])[0]
                     if entry:
                         forms.append(entry)
 
@@ -1924,12 +1958,11 @@ class JyutpingYaleConverter(RomanisationConverter):
         plainSyllable, tone = self._f.splitEntityTone(entity, fromReading,
             **self.DEFAULT_READING_OPTIONS[fromReading])
 
-        # lookup in database
+        # lookup in mapping table
         if fromReading == "CantoneseYale":
-            table = self.db.tables['JyutpingYaleMapping']
-            transSyllable = self.db.selectScalar(
-                select([table.c.Jyutping],
-                    table.c.CantoneseYale == plainSyllable))
+            mapping = self._getMappingTable('JyutpingYaleMapping',
+                'CantoneseYale', 'Jyutping')
+            transSyllable = mapping.get(plainSyllable, [None])[0]
             # get tone
             if tone:
                 # get tone number from first character of string representation
@@ -1937,10 +1970,9 @@ class JyutpingYaleConverter(RomanisationConverter):
             else:
                 transTone = None
         elif fromReading == "Jyutping":
-            table = self.db.tables['JyutpingYaleMapping']
-            transSyllable = self.db.selectScalar(
-                select([table.c.CantoneseYale],
-                    table.c.Jyutping == plainSyllable))
+            mapping = self._getMappingTable('JyutpingYaleMapping',
+                'Jyutping', 'CantoneseYale')
+            transSyllable = mapping.get(plainSyllable, [None])[0]
             # get tone
             if not tone:
                 transTone = None
@@ -2020,6 +2052,13 @@ class BridgeConverter(ReadingConverter):
 
     CONVERSION_DIRECTIONS = _getConversionDirections(CONVERSION_BRIDGE)
 
+    CONTEXT_SENSITIVE_STEPS = frozenset([('Pinyin', 'MandarinIPA')])
+    """
+    Conversion steps whose result for an entity depends on its neighbours (e.g.
+    tone sandhi and coarticulation in IPA). Bridges including one of those are
+    never converted using a composed table.
+    """
+
     def __init__(self, *args, **options):
         """
         :param args: optional list of
@@ -2036,6 +2075,15 @@ class BridgeConverter(ReadingConverter):
         :keyword targetOperators: list of
             :class:`ReadingOperators <cjklib.reading.operator.ReadingOperator>`
             used for handling target readings.
+        :keyword compiledBridge: if set to ``True`` (default) single reading
+            entities will be converted using a table composed lazily from both
+            conversion steps, falling back to the two-stage conversion for
+            input including other entities and for context-sensitive steps
+            listed in
+            :attr:`~cjklib.reading.converter.BridgeConverter.CONTEXT_SENSITIVE_STEPS`.
+
+        .. versionadded:: 0.3.1
+           Option ``compiledBridge``.
         """
         super(BridgeConverter, self).__init__(*args, **options)
 
@@ -2043,7 +2091,12 @@ class BridgeConverter(ReadingConverter):
         for fromReading, bridgeReading, toReading in self.CONVERSION_BRIDGE:
             self.bridgeLookup[(fromReading, toReading)] = bridgeReading
 
-        self.conversionOptions = options
+        self.conversionOptions = options.copy()
+        # option only used here, don't let it split the cache of the
+        #   converters doing the single steps
+        self.conversionOptions.pop('compiledBridge', None)
+
+        self._composedEntityTables = {}
 
     @classmethod
     def getDefaultOptions(cls):
@@ -2071,12 +2124,105 @@ class BridgeConverter(ReadingConverter):
                     (bridgeReading, targetReading)].getDefaultOptions()
             mergeOptions(defaultOptions, toDefaultOptions)
 
+        defaultOptions.update({'compiledBridge': True})
+
         return defaultOptions
 
     def convertEntities(self, readingEntities, fromReading, toReading):
         if (fromReading, toReading) not in self.CONVERSION_DIRECTIONS:
             raise UnsupportedError("conversion direction from '" \
                 + fromReading + "' to '" + toReading + "' not supported")
+
+        if self.compiledBridge \
+            and self._isCompilableBridge(fromReading, toReading):
+            toReadingEntities = self._convertEntitiesComposed(readingEntities,
+                fromReading, toReading)
+            if toReadingEntities is not None:
+                return toReadingEntities
+
+        return self._convertEntitiesTwoStage(readingEntities, fromReading,
+            toReading)
+
+    def _isCompilableBridge(self, fromReading, toReading):
+        """
+        Checks if the bridge between the given readings only consists of
+        entity wise conversion steps.
+
+        :type fromReading: str
+        :param fromReading: name of the source reading
+        :type toReading: str
+        :param toReading: name of the target reading
+        :rtype: bool
+        :return: ``True`` if a composed table can be used
+        """
+        bridgeReading = self.bridgeLookup[(fromReading, toReading)]
+        return (fromReading, bridgeReading) not in self.CONTEXT_SENSITIVE_STEPS \
+            and (bridgeReading, toReading) not in self.CONTEXT_SENSITIVE_STEPS
+
+    def _convertEntitiesComposed(self, readingEntities, fromReading,
+        toReading):
+        """
+        Converts the given entities using the composed table of the bridge.
+        Missing entries are filled in lazily by doing the two-stage conversion
+        of the single entity.
+
+        :type readingEntities: list of str
+        :param readingEntities: list of entities written in source reading
+        :type fromReading: str
+        :param fromReading: name of the source reading
+        :type toReading: str
+        :param toReading: name of the target reading
+        :rtype: list of str
+        :return: list of entities written in target reading or ``None`` if
+            the input includes entities that cannot be converted in isolation
+        """
+        table = self._composedEntityTables.setdefault(
+            (fromReading, toReading), {})
+        fromOperator = self._getFromOperator(fromReading)
+
+        toReadingEntities = []
+        for entity in readingEntities:
+            if entity not in table:
+                # only plain syllables are context free, abbreviations and
+                #   formatting entities might depend on their neighbours
+                if not fromOperator.isReadingEntity(entity) \
+                    or (hasattr(fromOperator, 'isAbbreviatedEntity')
+                        and fromOperator.isAbbreviatedEntity(entity)):
+                    table[entity] = None
+                else:
+                    try:
+                        converted = self._convertEntitiesTwoStage([entity],
+                            fromReading, toReading)
+                    except (ConversionError, DecompositionError):
+                        # let the two-stage conversion raise the error
+                        converted = None
+                    if converted and len(converted) == 1:
+                        table[entity] = converted[0]
+                    else:
+                        table[entity] = None
+
+            toReadingEntity = table[entity]
+            if toReadingEntity is None:
+                return None
+            toReadingEntities.append(toReadingEntity)
+
+        return toReadingEntities
+
+    def _convertEntitiesTwoStage(self, readingEntities, fromReading,
+        toReading):
+        """
+        Converts the given entities to the bridge reading and from there to the
+        target reading.
+
+        :type readingEntities: list of str
+        :param readingEntities: list of entities written in source reading
+        :type fromReading: str
+        :param fromReading: name of the source reading
+        :type toReading: str
+        :param toReading: name of the target reading
+        :rtype: list of str
+        :return: list of entities written in target reading
+        """
         bridgeReading = self.bridgeLookup[(fromReading, toReading)]
 
         # to bridge reading
@@ -40,7 +40,6 @@ import copy
 import types
 
 from sqlalchemy import select
-from sqlalchemy.sql import or_
 
 from cjklib.exception import (DecompositionError, AmbiguousDecompositionError,
     InvalidEntityError, CompositionError, UnsupportedError,
@@ -189,6 +188,10 @@ class RomanisationOperator(ReadingOperator):
         :keyword case: if set to ``'lower'``, only lower case will be supported,
             if set to ``'both'`` a mix of upper and lower case will be
             supported.
+        :keyword segmentationEngine: if set to ``'lattice'`` (default),
+            segmentation will be done on a lattice over string positions,
+            visiting each position only once, if set to ``'recursive'`` the
+            former recursive segmentation will be used.
         """
         super(RomanisationOperator, self).__init__(**options)
 
@@ -196,10 +199,15 @@ class RomanisationOperator(ReadingOperator):
             raise ValueError("Invalid option %s for keyword 'case'"
                 % repr(self.case))
 
+        if self.segmentationEngine not in ['lattice', 'recursive']:
+            raise ValueError("Invalid option %s for keyword"
+                " 'segmentationEngine'" % repr(self.segmentationEngine))
+
     @classmethod
     def getDefaultOptions(cls):
         options = super(RomanisationOperator, cls).getDefaultOptions()
-        options.update({'strictSegmentation': False, 'case': 'both'})
+        options.update({'strictSegmentation': False, 'case': 'both',
+            'segmentationEngine': 'lattice'})
 
         return options
 
@@ -355,7 +363,10 @@ class RomanisationOperator(ReadingOperator):
             single syllables
         :raise DecompositionError: if the given string has an invalid format.
         """
-        segmentationTree = self._recursiveSegmentation(readingString)
+        if self.segmentationEngine == 'lattice':
+            segmentationTree = self._latticeSegmentation(readingString)
+        else:
+            segmentationTree = self._recursiveSegmentation(readingString)
         if readingString != '' and len(segmentationTree) == 0:
             if self.strictSegmentation:
                 raise DecompositionError(
@@ -399,6 +410,53 @@ class RomanisationOperator(ReadingOperator):
             substringIndex = substringIndex + 1
         return segmentationParts
 
+    def _latticeSegmentation(self, readingString):
+        """
+        Takes a string written in the romanisation and returns the possible
+        segmentations as a tree of syllables.
+
+        Other than
+        :meth:`~cjklib.reading.operator.RomanisationOperator._recursiveSegmentation`
+        the string is scanned from its end, building a lattice over string
+        positions. The subtree of segmentations starting at a given position is
+        computed only once and shared by all entities ending there, so the
+        effort is linear in the length of the string times the length of the
+        longest entity.
+
+        The tree is represented by tuples ``(syllable, subtree)`` and is equal
+        to the one returned by the recursive segmentation.
+
+        :type readingString: str
+        :param readingString: reading string
+        :rtype: list of tuple
+        :return: a tree of possible segmentations (if ambiguous) into single
+            syllables
+        """
+        stringLength = len(readingString)
+        # segmentation subtrees for each start position
+        lattice = [None] * stringLength
+        for startIndex in range(stringLength - 1, -1, -1):
+            segmentationParts = []
+            endIndex = startIndex + 1
+            while endIndex <= stringLength \
+                and self._hasEntitySubstring(
+                    readingString[startIndex:endIndex].lower()):
+
+                entity = readingString[startIndex:endIndex]
+                if self.isReadingEntity(entity) \
+                    or self.isFormattingEntity(entity):
+                    if endIndex == stringLength:
+                        segmentationParts.append((entity, None))
+                    elif lattice[endIndex]:
+                        segmentationParts.append((entity, lattice[endIndex]))
+                endIndex = endIndex + 1
+            lattice[startIndex] = segmentationParts
+
+        if stringLength:
+            return lattice[0]
+        else:
+            return []
+
     def _hasMergeableEntities(self, decomposition):
         """
         Checks if the given decomposition has two or more following entities
@@ -1998,19 +2056,26 @@ class PinyinOperator(TonalRomanisationOperator):
 
         standardPlainSyllable = self.convertPlainEntity(standardPlainSyllable)
 
-        table = self.db.tables['PinyinInitialFinal']
-        entry = self.db.selectRow(
-            select([table.c.PinyinInitial, table.c.PinyinFinal],
-                table.c.Pinyin == standardPlainSyllable))
-        if not entry:
+        if standardPlainSyllable not in self._initialFinalData:
             raise InvalidEntityError("'%s' not a valid plain Pinyin syllable'"
                 % plainSyllable)
+        entry = self._initialFinalData[standardPlainSyllable]
 
         if erhuaForm:
             return (entry[0], entry[1] + 'r')
         else:
             return (entry[0], entry[1])
 
+    @cachedproperty
+    def _initialFinalData(self):
+        """Table information about syllable initials and finals."""
+        table = self.db.tables['PinyinInitialFinal']
+        result = self.db.selectRows(
+            select([table.c.Pinyin, table.c.PinyinInitial,
+                table.c.PinyinFinal]))
+
+        return dict([(s, (i, f)) for s, i, f in result])
+
 
 class WadeGilesOperator(TonalRomanisationOperator):
     u"""
@@ -2536,6 +2601,12 @@ class WadeGilesOperator(TonalRomanisationOperator):
 
         return frozenset(plainSyllables)
 
+    @cachedproperty
+    def _dbPlainSyllables(self):
+        """Set of plain syllables in the database's standard form."""
+        table = self.db.tables['WadeGilesSyllables']
+        return frozenset(self.db.selectScalars(select([table.c.WadeGiles])))
+
     def checkPlainEntity(self, plainEntity, option):
         u"""
         Checks if the given plain entity with is a form with lost diacritics or
@@ -2581,10 +2652,10 @@ class WadeGilesOperator(TonalRomanisationOperator):
         if plainForm.startswith('sz'):
             plainForm = 'ss' + plainForm[2:]
 
-        table = self.db.tables['WadeGilesSyllables']
-        result = self.db.selectScalars(select([table.c.WadeGiles],
-                table.c.WadeGiles.in_([plainForm,
-                    plainForm.replace(vowel, originalVowel)])))
+        result = []
+        for form in [plainForm, plainForm.replace(vowel, originalVowel)]:
+            if form in self._dbPlainSyllables and form not in result:
+                result.append(form)
         assert(len(result) <= 2)
         if len(result) == 2:
             return 'ambiguous'
@@ -2704,14 +2775,20 @@ class WadeGilesOperator(TonalRomanisationOperator):
         except AmbiguousConversionError, e:
             raise UnsupportedError(*e.args)
 
-        table = self.db.tables['WadeGilesInitialFinal']
-        entry = self.db.selectRow(
-            select([table.c.WadeGilesInitial, table.c.WadeGilesFinal],
-                table.c.WadeGiles == standardPlainSyllable))
-        if not entry:
+        if standardPlainSyllable not in self._initialFinalData:
             raise UnsupportedError("Not supported for '%s'" % plainSyllable)
 
-        return (entry[0], entry[1])
+        return self._initialFinalData[standardPlainSyllable]
+
+    @cachedproperty
+    def _initialFinalData(self):
+        """Table information about syllable initials and finals."""
+        table = self.db.tables['WadeGilesInitialFinal']
+        result = self.db.selectRows(
+            select([table.c.WadeGiles, table.c.WadeGilesInitial,
+                table.c.WadeGilesFinal]))
+
+        return dict([(s, (i, f)) for s, i, f in result])
 
 
 class GROperator(TonalRomanisationOperator):
@@ -3197,6 +3274,36 @@ class GROperator(TonalRomanisationOperator):
 
         return rhotacisedFinals
 
+    @cachedproperty
+    def _baseFinalsForRhotacised(self):
+        """
+        Mapping of rhotacised final to pairs of entity final and the column
+        of the first match.
+        """
+        table = self.db.tables['GRRhotacisedFinals']
+
+        finalTypes = [column.name for column in table.c \
+            if column.name != 'GRFinal']
+
+        baseFinals = {}
+
+        columns = [table.c.GRFinal]
+        columns.extend([table.c[final] for final in finalTypes])
+        for row in self.db.selectRows(select(columns)):
+            nonRhotacisedFinal = row[0]
+            seen = set()
+            for idx, column in enumerate(finalTypes):
+                rhotacisedFinal = row[idx + 1]
+                if rhotacisedFinal is None or rhotacisedFinal in seen:
+                    continue
+                seen.add(rhotacisedFinal)
+                if rhotacisedFinal not in baseFinals:
+                    baseFinals[rhotacisedFinal] = []
+                baseFinals[rhotacisedFinal].append(
+                    (nonRhotacisedFinal, column))
+
+        return baseFinals
+
     def getRhotacisedTonalEntity(self, plainEntity, tone):
         """
         Gets the r-coloured entity (Erlhuah form) with tone mark for the given
@@ -3314,33 +3421,16 @@ class GROperator(TonalRomanisationOperator):
         entityList = set()
 
         # lookup table data
-        table = self.db.tables['GRRhotacisedFinals']
-
-        finalTypes = [column.name for column in table.c \
-            if column.name != 'GRFinal']
-
-        columns = [table.c.GRFinal]
-        finalTypeColumns = [table.c[final] for final in finalTypes]
-        columns.extend(finalTypeColumns)
-
-        results = self.db.selectRows(select(columns,
-            or_(*[column == baseTonalFinal for column in finalTypeColumns])))
+        results = self._baseFinalsForRhotacised.get(baseTonalFinal, [])
         if not results:
             raise InvalidEntityError(
                 "Invalid rhotacised entity given for '%s'" % tonalEntity)
 
         rhotacisedColumnToneLookup = self._rhotacisedColumnToneLookup
 
-        for row in results:
-            nonRhotacisedFinal = row[0]
+        for nonRhotacisedFinal, column in results:
             # match tone
-            for idx, col in enumerate(row[1:]):
-                if col == baseTonalFinal:
-                    column = finalTypes[idx]
-                    toneIndex = rhotacisedColumnToneLookup[column]
-                    break
-            else:
-                assert(False)
+            toneIndex = rhotacisedColumnToneLookup[column]
 
             # special case
             if initial in ['m', 'n', 'l', 'r'] and toneIndex == 1 and not h:
@@ -3606,15 +3696,20 @@ class MandarinIPAOperator(TonalIPAOperator):
         :raise InvalidEntityError: if the entity is invalid (e.g. syllable
             nucleus or tone invalid).
         """
-        table = self.db.tables['MandarinIPAInitialFinal']
-        entry = self.db.selectRow(
-            select([table.c.IPAInitial, table.c.IPAFinal],
-                table.c.IPA == plainSyllable))
-        if not entry:
+        if plainSyllable not in self._initialFinalData:
             raise InvalidEntityError(
                 "Entity '%s' is no valid IPA form in this system'"
                     % plainSyllable)
-        return (entry[0], entry[1])
+        return self._initialFinalData[plainSyllable]
+
+    @cachedproperty
+    def _initialFinalData(self):
+        """Table information about syllable initials and finals."""
+        table = self.db.tables['MandarinIPAInitialFinal']
+        result = self.db.selectRows(
+            select([table.c.IPA, table.c.IPAInitial, table.c.IPAFinal]))
+
+        return dict([(s, (i, f)) for s, i, f in result])
 
 
 class MandarinBrailleOperator(ReadingOperator):
@@ -3659,12 +3754,8 @@ class MandarinBrailleOperator(ReadingOperator):
                 % repr(self.missingToneMark))
 
         # split regex
-        initials = ''.join(self.db.selectScalars(
-            select([self.db.tables['PinyinBrailleInitialMapping'].c.Braille],
-                distinct=True)))
-        finals = ''.join(self.db.selectScalars(
-            select([self.db.tables['PinyinBrailleFinalMapping'].c.Braille],
-                distinct=True)))
+        initials = ''.join(self._brailleInitials)
+        finals = ''.join(self._brailleFinals)
         # initial and final optional (but at least one), tone optional
         self._splitRegex = re.compile(ur'((?:(?:[' + re.escape(initials) \
             + '][' + re.escape(finals) + ']?)|['+ re.escape(finals) \
@@ -3679,6 +3770,20 @@ class MandarinBrailleOperator(ReadingOperator):
 
         return options
 
+    @cachedproperty
+    def _brailleInitials(self):
+        """Set of Braille characters used for syllable initials."""
+        table = self.db.tables['PinyinBrailleInitialMapping']
+        return frozenset(self.db.selectScalars(
+            select([table.c.Braille], distinct=True)))
+
+    @cachedproperty
+    def _brailleFinals(self):
+        """Set of Braille characters used for syllable finals."""
+        table = self.db.tables['PinyinBrailleFinalMapping']
+        return frozenset(self.db.selectScalars(
+            select([table.c.Braille], distinct=True)))
+
     @cachedmethod
     def getTones(self):
         """
@@ -3817,15 +3922,10 @@ class MandarinBrailleOperator(ReadingOperator):
 
             initial, final = self.getOnsetRhyme(plainEntity)
 
-            finalTable = self.db.tables['PinyinBrailleFinalMapping']
-            if final and self.db.selectScalar(select([finalTable.c['Braille']],
-                finalTable.c['Braille'] == final, distinct=True)) == None:
+            if final and final not in self._brailleFinals:
                 return False
 
-            initialTable = self.db.tables['PinyinBrailleInitialMapping']
-            if initial and self.db.selectScalar(select(
-                [initialTable.c['Braille']],
-                initialTable.c['Braille'] == initial, distinct=True)) == None:
+            if initial and initial not in self._brailleInitials:
                 return False
 
             return True
@@ -3843,11 +3943,7 @@ class MandarinBrailleOperator(ReadingOperator):
         :raise InvalidEntityError: if the entity is invalid.
         """
         if len(plainSyllable) == 1:
-            finalTable = self.db.tables['PinyinBrailleFinalMapping']
-            if plainSyllable and self.db.selectScalar(
-                select([finalTable.c.Braille],
-                    finalTable.c.Braille == plainSyllable,
-                    distinct=True)) != None:
+            if plainSyllable in self._brailleFinals:
                 return '', plainSyllable
             else:
                 return plainSyllable, ''
@@ -4743,14 +4839,19 @@ class CantoneseIPAOperator(TonalIPAOperator):
         :raise InvalidEntityError: if the entity is invalid (e.g. syllable
             nucleus or tone invalid).
         """
-        table = self.db.tables['CantoneseIPAInitialFinal']
-        entry = self.db.selectRow(
-            select([table.c.IPAInitial, table.c.IPAFinal],
-                table.c.IPA == plainSyllable))
-        if not entry:
+        if plainSyllable not in self._initialFinalData:
             raise InvalidEntityError("'" + plainSyllable \
                 + "' not a valid IPA form in this system'")
-        return (entry[0], entry[1])
+        return self._initialFinalData[plainSyllable]
+
+    @cachedproperty
+    def _initialFinalData(self):
+        """Table information about syllable initials and finals."""
+        table = self.db.tables['CantoneseIPAInitialFinal']
+        result = self.db.selectRows(
+            select([table.c.IPA, table.c.IPAInitial, table.c.IPAFinal]))
+
+        return dict([(s, (i, f)) for s, i, f in result])
 
     def getTonalEntity(self, plainEntity, tone):
         # reimplement to work with variable tone count
@@ -5065,14 +5166,19 @@ class ShanghaineseIPAOperator(TonalIPAOperator):
         :raise InvalidEntityError: if the entity is invalid (e.g. syllable
             nucleus or tone invalid).
         """
-        table = self.db.tables['ShanghaineseIPASyllables']
-        entry = self.db.selectRow(
-            select([table.c.IPAInitial, table.c.IPAFinal],
-                table.c.IPA == plainSyllable))
-        if not entry:
+        if plainSyllable not in self._initialFinalData:
             raise InvalidEntityError("'%s' not a valid IPA form in this system'"
                 % plainSyllable)
-        return (entry[0], entry[1])
+        return self._initialFinalData[plainSyllable]
+
+    @cachedproperty
+    def _initialFinalData(self):
+        """Table information about syllable initials and finals."""
+        table = self.db.tables['ShanghaineseIPASyllables']
+        result = self.db.selectRows(
+            select([table.c.IPA, table.c.IPAInitial, table.c.IPAFinal]))
+
+        return dict([(s, (i, f)) for s, i, f in result])
 
     @cachedproperty
     def _syllableData(self):
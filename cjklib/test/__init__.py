@@ -20,7 +20,7 @@ Unit tests.
 """
 
 __all__ = ['readingoperator', 'readingconverter', 'characterlookup',
-    'dictionary', 'attr', 'DatabaseConnectorMock', 'EngineMock']
+    'dictionary', 'connector', 'attr', 'DatabaseConnectorMock', 'EngineMock']
 
 from cjklib import dbconnector
 
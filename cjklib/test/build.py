@@ -26,11 +26,21 @@ import unittest
 import types
 import re
 import os.path
-
-from sqlalchemy import Table
+import shutil
+import sqlite3
+import tempfile
+import zipfile
+import gzip
+import tarfile
+import cStringIO
+
+from sqlalchemy import Table, Integer, String, select, func
+from sqlalchemy.sql import text
+from sqlalchemy.exceptions import IntegrityError
 
 from cjklib.build import DatabaseBuilder, builder
 from cjklib import util
+from cjklib import dbconnector
 
 class TableBuilderTest:
     """
@@ -69,8 +79,9 @@ class TableBuilderTest:
     """
 
     def setUp(self):
-        prefer = [self.BUILDER]
-        prefer.extend(self.PREFER_BUILDERS)
+        # builders are preferred by name
+        prefer = [self.BUILDER.__name__]
+        prefer.extend(clss.__name__ for clss in self.PREFER_BUILDERS)
 
         self.dataPath = self.EXTERNAL_DATA_PATHS[:]
         self.dataPath.append(util.getDataPath())
@@ -255,6 +266,13 @@ class MysqlCharacterVariantBuilderTest(TableBuilderTest, unittest.TestCase):
     TABLE_DEPEND_OPTIONS = [(builder.UnihanBuilder, {'wideBuild': False})]
 
 
+class StrokeOrderLookupBuilderTest(TableBuilderTest, unittest.TestCase):
+    BUILDER = builder.StrokeOrderLookupBuilder
+    # don't depend on Unihan for table StrokeCount
+    PREFER_BUILDERS = [builder.StrokeCountBuilder]
+    OPTIONS = [{}, {'includePartial': True}]
+
+
 class EDICTBuilderTest(TableBuilderTest, unittest.TestCase):
     BUILDER = builder.EDICTBuilder
     OPTIONS = [{'enableFTS3': False},
@@ -285,6 +303,669 @@ class CFDICTBuilderTest(TableBuilderTest, unittest.TestCase):
         {'filePath': './test/downloads/CFDICT', 'fileType': '.tar.bz2'}]
 
 
+class UnihanGeneratorTest(unittest.TestCase):
+    """Tests :class:`~cjklib.build.builder.UnihanGenerator`."""
+    FILES = {
+        'Unihan_Readings.txt': '# Unihan_Readings.txt\n#\n\n'
+            'U+4E00\tkCantonese\tjat1\n'
+            'U+4E00\tkMandarin\tYI1\n'
+            'U+4E8C\tkMandarin\tER4\n'
+            'U+20001\tkMandarin\tQI1\n'
+            '# EOF\n',
+        'Unihan_DictionaryLikeData.txt': '# Unihan_DictionaryLikeData.txt\n'
+            'U+4E00\tkTotalStrokes\t1\r\n'
+            'U+4E01  kTotalStrokes   2\r\n'
+            'U+4E8C\tkTotalStrokes\t2\r\n',
+        'Unihan_Variants.txt': '',
+        }
+
+    ENTRIES = [
+        (u'\u4e00', {'kCantonese': u'jat1', 'kMandarin': u'YI1',
+            'kTotalStrokes': u'1'}),
+        (u'\u4e01', {'kTotalStrokes': u'2'}),
+        (u'\u4e8c', {'kMandarin': u'ER4', 'kTotalStrokes': u'2'}),
+        ]
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.fileNames = []
+        for fileName, content in self.FILES.items():
+            filePath = os.path.join(self.tempDir, fileName)
+            f = open(filePath, 'wb')
+            f.write(content)
+            f.close()
+            self.fileNames.append(filePath)
+
+        self.zipFile = os.path.join(self.tempDir, 'Unihan.zip')
+        z = zipfile.ZipFile(self.zipFile, 'w', zipfile.ZIP_DEFLATED)
+        for fileName, content in self.FILES.items():
+            z.writestr(fileName, content)
+        z.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def testGenerator(self):
+        """Test if entries are merged from all files."""
+        for fileNames in (self.fileNames, [self.zipFile]):
+            generator = builder.UnihanGenerator(fileNames, wideBuild=False,
+                quiet=True)
+            self.assertEquals(list(generator.generator()), self.ENTRIES)
+            self.assertEquals(set(generator.keys()),
+                set(['kCantonese', 'kMandarin', 'kTotalStrokes']))
+
+    def testWideBuild(self):
+        """Test if characters outside the BMP are only read for wide builds."""
+        generator = builder.UnihanGenerator(self.fileNames, wideBuild=True,
+            quiet=True)
+        entries = list(generator.generator())
+        self.assertEquals(len(entries), len(self.ENTRIES) + 1)
+        self.assertEquals(entries[-1][1], {'kMandarin': u'QI1'})
+
+    def testTupleGenerator(self):
+        """Test if entries are limited to the given keys."""
+        keys = ['kTotalStrokes', 'kMandarin']
+        generator = builder.UnihanGenerator(self.fileNames, useKeys=keys,
+            wideBuild=False, quiet=True)
+        self.assertEquals(list(generator.tupleGenerator(keys)),
+            [(u'\u4e00', u'1', u'YI1'), (u'\u4e01', u'2', None),
+                (u'\u4e8c', u'2', u'ER4')])
+
+        generator = builder.UnihanGenerator([self.zipFile],
+            useKeys=['kCantonese'], wideBuild=False, quiet=True)
+        self.assertEquals(list(generator.tupleGenerator(['kCantonese'])),
+            [(u'\u4e00', u'jat1')])
+
+    def testGetHandles(self):
+        """Test if the deprecated handles give the decoded file content."""
+        for fileNames in (self.fileNames, [self.zipFile]):
+            generator = builder.UnihanGenerator(fileNames, quiet=True)
+            handles = generator.getHandles()
+            self.assertEquals(set(os.path.basename(fileName)
+                for fileName in handles), set(self.FILES.keys()))
+            for fileName, handle in handles.items():
+                self.assertEquals(handle.read(),
+                    self.FILES[os.path.basename(fileName)].decode('utf-8'))
+                handle.close()
+
+
+class EntryGeneratorBuilderInsertTest(unittest.TestCase):
+    """
+    Tests chunked inserts of
+    :class:`~cjklib.build.builder.EntryGeneratorBuilder`.
+    """
+    class NumberBuilder(builder.EntryGeneratorBuilder):
+        PROVIDES = 'CjklibTestNumbers'
+        COLUMNS = ['Number', 'Name']
+        PRIMARY_KEYS = ['Number']
+        COLUMN_TYPES = {'Number': Integer(), 'Name': String(10)}
+
+        ENTRIES = [[number, unicode(number)] for number in range(25)]
+
+        def getGenerator(self):
+            return iter(self.ENTRIES)
+
+    def _getDatabase(self):
+        return dbconnector.DatabaseConnector({'sqlalchemy.url': 'sqlite://'})
+
+    def _build(self, builderClass, **options):
+        dbBuilder = DatabaseBuilder(dbConnectInst=self._getDatabase(),
+            quiet=True, additionalBuilders=[builderClass], **options)
+        dbBuilder.build([builderClass.PROVIDES])
+        table = dbBuilder.db.tables[builderClass.PROVIDES]
+        return dbBuilder.db.selectRows(table.select().order_by(table.c.Number))
+
+    def testBatchSize(self):
+        """Test if all entries are written independent of the batch size."""
+        for batchSize in [1, 7, 25, 1000]:
+            rows = self._build(self.NumberBuilder, batchSize=batchSize)
+            self.assertEquals([list(row) for row in rows],
+                self.NumberBuilder.ENTRIES)
+
+    def testFindOffendingEntry(self):
+        """Test if bisection finds the entry violating a constraint."""
+        class DuplicateBuilder(self.NumberBuilder):
+            ENTRIES = [[number, unicode(number)] for number in range(25)] \
+                + [[12, u'duplicate']]
+
+        for batchSize in [7, 1000]:
+            self.assertRaises(IntegrityError, self._build, DuplicateBuilder,
+                batchSize=batchSize)
+
+        instance = DuplicateBuilder(dbConnectInst=self._getDatabase(),
+            quiet=True)
+        table = instance.buildTableObject(instance.PROVIDES, instance.COLUMNS,
+            instance.COLUMN_TYPES, instance.PRIMARY_KEYS)
+        table.create()
+        entries = [{'Number': number, 'Name': name}
+            for number, name in DuplicateBuilder.ENTRIES]
+        self.assertEquals(instance._findOffendingEntry(table, entries),
+            {'Number': 12, 'Name': u'duplicate'})
+        self.assertEquals(instance._findOffendingEntry(table, entries[:-1]),
+            None)
+
+
+class ParallelBuildTest(unittest.TestCase):
+    """
+    Tests the parallel build of :class:`~cjklib.build.DatabaseBuilder`.
+    """
+    class NumberBuilder(builder.EntryGeneratorBuilder):
+        PROVIDES = 'CjklibTestNumbers'
+        COLUMNS = ['Number', 'Name']
+        PRIMARY_KEYS = ['Number']
+        INDEX_KEYS = [['Name']]
+        COLUMN_TYPES = {'Number': Integer(), 'Name': String(10)}
+
+        def getGenerator(self):
+            return iter([[number, unicode(number)] for number in range(500)])
+
+    class SquareBuilder(builder.EntryGeneratorBuilder):
+        PROVIDES = 'CjklibTestSquares'
+        DEPENDS = ['CjklibTestNumbers']
+        COLUMNS = ['Number', 'Square']
+        PRIMARY_KEYS = ['Number']
+        COLUMN_TYPES = {'Number': Integer(), 'Square': Integer()}
+
+        def getGenerator(self):
+            table = self.db.tables['CjklibTestNumbers']
+            return iter([[number, number * number] for number
+                in self.db.selectScalars(table.select().with_only_columns(
+                    [table.c.Number]).order_by(table.c.Name))])
+
+    class MissingDataBuilder(builder.EntryGeneratorBuilder):
+        PROVIDES = 'CjklibTestMissing'
+        COLUMNS = ['Number']
+        COLUMN_TYPES = {'Number': Integer()}
+
+        def getGenerator(self):
+            raise IOError("No data for 'CjklibTestMissing'")
+
+    class MissingDependencyBuilder(SquareBuilder):
+        PROVIDES = 'CjklibTestMissingSquares'
+        DEPENDS = ['CjklibTestMissing']
+
+    TABLES = ['CjklibTestNumbers', 'CjklibTestSquares', 'PinyinSyllables',
+        'KangxiRadical', 'Strokes']
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def _build(self, jobs, tables, **options):
+        databaseFile = os.path.join(self.tempDir, 'build_%d.db' % jobs)
+        db = dbconnector.DatabaseConnector(
+            {'sqlalchemy.url': 'sqlite:///%s' % databaseFile})
+        dbBuilder = DatabaseBuilder(dbConnectInst=db, quiet=True, jobs=jobs,
+            dataPath=[util.getDataPath()], additionalBuilders=[
+                self.NumberBuilder, self.SquareBuilder,
+                self.MissingDataBuilder, self.MissingDependencyBuilder],
+            **options)
+        try:
+            dbBuilder.build(tables)
+        finally:
+            db.connection.close()
+        self.statistics = dbBuilder.getBuildStatistics()
+        return databaseFile
+
+    def testParallelBuildEqualsSerial(self):
+        """Test if the parallel build gives the same result as the serial."""
+        serialFile = self._build(1, self.TABLES)
+        parallelFile = self._build(3, self.TABLES)
+
+        serialDump = list(sqlite3.connect(serialFile).iterdump())
+        connection = sqlite3.connect(parallelFile)
+        self.assertEquals(list(connection.iterdump()), serialDump)
+        self.assertEquals(
+            connection.execute("PRAGMA journal_mode").fetchone()[0].lower(),
+            'delete')
+
+    def testBuildStatistics(self):
+        """Test if statistics are recorded for each built table."""
+        for jobs in (1, 3):
+            self._build(jobs, ['CjklibTestNumbers', 'CjklibTestSquares'])
+            self.assertEquals([(stats['table'], stats['builder'],
+                    stats['rows']) for stats in self.statistics],
+                [('CjklibTestNumbers', 'NumberBuilder', 500),
+                    ('CjklibTestSquares', 'SquareBuilder', 500)])
+            for stats in self.statistics:
+                self.assert_(set(['parse', 'insert', 'index'])
+                    <= set(stats['phases']))
+                self.assert_(stats['seconds'] >= 0)
+                self.assert_(stats['peakMemoryIncrease'] is None
+                    or stats['peakMemoryIncrease'] >= 0)
+
+    def testMissingMultiprocessing(self):
+        """Test if builds fall back to serial without multiprocessing."""
+        from cjklib import build
+        multiprocessing = build.multiprocessing
+        build.multiprocessing = None
+        try:
+            databaseFile = self._build(3, ['CjklibTestNumbers',
+                'CjklibTestSquares'])
+        finally:
+            build.multiprocessing = multiprocessing
+        self.assertEquals(sqlite3.connect(databaseFile).execute(
+            "SELECT COUNT(*) FROM CjklibTestSquares").fetchone()[0], 500)
+
+    def testParallelBuildFailure(self):
+        """Test if failing builders are handled in a parallel build."""
+        tables = ['CjklibTestNumbers', 'CjklibTestMissingSquares']
+        self.assertRaises(IOError, self._build, 3, tables)
+
+        databaseFile = self._build(3, tables, noFail=True)
+        tableNames = set(name for name, in sqlite3.connect(databaseFile)\
+            .execute("SELECT name FROM sqlite_master WHERE type = 'table'"))
+        self.assertEquals(tableNames, set(['CjklibTestNumbers']))
+
+
+class EDICTFormatBuilderStreamTest(unittest.TestCase):
+    """
+    Tests streamed loading of dictionaries by
+    :class:`~cjklib.build.builder.EDICTFormatBuilder`.
+    """
+    CONTENT = u"""# CC-CEDICT
+\u4e2d\u570b \u4e2d\u56fd [Zhong1 guo2] /China/Middle Kingdom/
+\u4eba [ren2] /man/person/people/
+\u4eba\u5011 \u4eba\u4eec [ren2 men5] /people/
+\u4eba [ren2] /person/
+"""
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        content = self.CONTENT.encode('utf-8')
+
+        self.filePaths = []
+        filePath = os.path.join(self.tempDir, 'cedict_ts.u8')
+        f = open(filePath, 'w')
+        f.write(content)
+        f.close()
+        self.filePaths.append(filePath)
+
+        filePath = os.path.join(self.tempDir, 'cedict.gz')
+        f = gzip.GzipFile(filePath, 'w')
+        f.write(content)
+        f.close()
+        self.filePaths.append(filePath)
+
+        filePath = os.path.join(self.tempDir, 'cedict.zip')
+        z = zipfile.ZipFile(filePath, 'w', zipfile.ZIP_DEFLATED)
+        z.writestr('cedict_ts.u8', content)
+        z.close()
+        self.filePaths.append(filePath)
+
+        filePath = os.path.join(self.tempDir, 'cedict.tar.bz2')
+        tar = tarfile.open(filePath, 'w:bz2')
+        info = tarfile.TarInfo('cedict_ts.u8')
+        info.size = len(content)
+        tar.addfile(info, cStringIO.StringIO(content))
+        tar.close()
+        self.filePaths.append(filePath)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def _build(self, tables, **options):
+        db = dbconnector.DatabaseConnector({'sqlalchemy.url': 'sqlite://'})
+        dbBuilder = DatabaseBuilder(dbConnectInst=db, quiet=True,
+            dataPath=[self.tempDir], **options)
+        dbBuilder.build(tables)
+
+        table = db.tables['CEDICT']
+        entries = db.selectRows(select([table.c.HeadwordTraditional,
+            table.c.HeadwordSimplified, table.c.Reading,
+            table.c.Translation]))
+        table = db.tables['CEDICT_Words']
+        words = set(db.selectRows(select([table.c.Headword, table.c.Reading,
+            table.c.Word])))
+        return db, entries, words
+
+    def testStreamedFileTypes(self):
+        """Test if compressed files and FTS3 tables give the same result."""
+        _, entries, words = self._build(['CEDICT', 'CEDICT_Words'],
+            filePath=self.filePaths[0])
+        self.assertEquals(len(entries), 4)
+        self.assertEquals(entries[1],
+            (u'\u4eba', None, u'ren2', u'/man/person/people/'))
+
+        for filePath in self.filePaths:
+            for enableFTS3 in (False, True):
+                _, otherEntries, otherWords = self._build(['CEDICT'],
+                    filePath=filePath, enableFTS3=enableFTS3, wordIndex=True,
+                    batchSize=2)
+                self.assertEquals(otherEntries, entries)
+                self.assertEquals(otherWords, words)
+
+    def testUpdate(self):
+        """Test if an update gives the same result as a rebuild."""
+        content = self.CONTENT.replace(u'/man/person/people/', u'/man/')\
+            .replace(u'\u4eba [ren2] /person/\n', u'')\
+            + u'\u4eba [ren2] /human/\n\u5927 [da4] /big/\n'
+        filePath = os.path.join(self.tempDir, 'cedict_new.u8')
+        f = open(filePath, 'w')
+        f.write(content.encode('utf-8'))
+        f.close()
+
+        _, entries, words = self._build(['CEDICT', 'CEDICT_Words'],
+            filePath=filePath)
+
+        for enableFTS3 in (False, True):
+            db, _, _ = self._build(['CEDICT', 'CEDICT_Words'],
+                filePath=self.filePaths[0], enableFTS3=enableFTS3)
+            dbBuilder = DatabaseBuilder(dbConnectInst=db, quiet=True,
+                filePath=filePath)
+            changes = dbBuilder.update(['CEDICT'])
+            self.assertEquals(changes, {'CEDICT': (3, 2, 0)})
+
+            table = db.tables['CEDICT']
+            updatedEntries = db.selectRows(select([table.c.HeadwordTraditional,
+                table.c.HeadwordSimplified, table.c.Reading,
+                table.c.Translation]))
+            self.assertEquals(sorted(updatedEntries), sorted(entries))
+            table = db.tables['CEDICT_Words']
+            updatedWords = set(db.selectRows(select([table.c.Headword,
+                table.c.Reading, table.c.Word])))
+            self.assertEquals(updatedWords, words)
+
+            # single changed entry is updated in place
+            f = open(filePath, 'w')
+            f.write(content.replace(u'/China/', u'/PRC/').encode('utf-8'))
+            f.close()
+            self.assertEquals(dbBuilder.update(['CEDICT']),
+                {'CEDICT': (0, 0, 1)})
+            self.assert_(db.selectScalar(select([table.c.Word],
+                table.c.Word == u'prc')))
+            self.assert_(not db.selectScalar(select([table.c.Word],
+                table.c.Word == u'china')))
+
+            # readings only differing in case are separate entries
+            table = db.tables['CEDICT']
+            caseContent = content.replace(u'/China/', u'/PRC/') \
+                + u'\u6cf0 [Tai4] /surname Tai/\n' \
+                + u'\u6cf0 [tai4] /safe/peaceful/\n'
+            for newContent, targetChanges, targetEntries in [
+                (caseContent, (2, 0, 0),
+                    [(u'Tai4', u'/surname Tai/'),
+                        (u'tai4', u'/safe/peaceful/')]),
+                (caseContent.replace(u'/surname Tai/', u'/surname Tai (new)/'),
+                    (0, 0, 1),
+                    [(u'Tai4', u'/surname Tai (new)/'),
+                        (u'tai4', u'/safe/peaceful/')]),
+                (caseContent.replace(u'\u6cf0 [Tai4] /surname Tai/\n', u''),
+                    (0, 1, 0), [(u'tai4', u'/safe/peaceful/')]),
+                ]:
+                f = open(filePath, 'w')
+                f.write(newContent.encode('utf-8'))
+                f.close()
+                self.assertEquals(dbBuilder.update(['CEDICT']),
+                    {'CEDICT': targetChanges})
+                self.assertEquals(sorted(db.selectRows(select([table.c.Reading,
+                        table.c.Translation],
+                    table.c.HeadwordTraditional == u'\u6cf0'))),
+                    targetEntries)
+
+            f = open(filePath, 'w')
+            f.write(content.encode('utf-8'))
+            f.close()
+
+    def testRemoveWordIndex(self):
+        """Test if the word index is removed with the dictionary."""
+        db, _, _ = self._build(['CEDICT'], filePath=self.filePaths[1],
+            wordIndex=True)
+        dbBuilder = DatabaseBuilder(dbConnectInst=db, quiet=True,
+            wordIndex=True)
+        dbBuilder.remove(['CEDICT'])
+        self.assertEquals(db.getTableNames(), set())
+
+    def testTranslationIndex(self):
+        """Test if the translation index holds all senses after an update."""
+        def getSenses(db):
+            return sorted(db.selectRows(text("SELECT c.HeadwordTraditional,"
+                " c.Reading, s.Translation FROM CEDICT c JOIN CEDICT_Senses s"
+                " ON c.rowid = s.rowid / %d"
+                    % builder.EDICTFormatBuilder.SENSE_ROWID_FACTOR)))
+
+        db, _, _ = self._build(['CEDICT'], filePath=self.filePaths[0],
+            wordIndex=True, translationIndex=True, batchSize=2)
+        senses = getSenses(db)
+        self.assertEquals(len(senses), 7)
+        self.assert_((u'\u4eba', u'ren2', u'person') in senses)
+
+        content = self.CONTENT.replace(u'/man/person/people/', u'/man/')\
+            .replace(u'\u4eba [ren2] /person/\n', u'')\
+            + u'\u5927 [da4] /big/large/\n'
+        filePath = os.path.join(self.tempDir, 'cedict_new.u8')
+        f = open(filePath, 'w')
+        f.write(content.encode('utf-8'))
+        f.close()
+        dbBuilder = DatabaseBuilder(dbConnectInst=db, quiet=True,
+            filePath=filePath, wordIndex=True)
+        dbBuilder.update(['CEDICT'])
+
+        otherDB, _, _ = self._build(['CEDICT'], filePath=filePath,
+            wordIndex=True, translationIndex=True)
+        self.assertEquals(getSenses(db), getSenses(otherDB))
+
+        dbBuilder.remove(['CEDICT'])
+        self.assertEquals(db.getTableNames(), set())
+
+    def testTonelessReading(self):
+        """Test if the toneless reading is kept after an update."""
+        def getReadings(db):
+            table = db.tables['CEDICT']
+            return sorted(db.selectRows(select([table.c.Reading,
+                table.c.ReadingToneless])))
+
+        content = self.CONTENT + u'\u5927 [da4] /big/large/\n'
+        filePath = os.path.join(self.tempDir, 'cedict_new.u8')
+        f = open(filePath, 'w')
+        f.write(content.encode('utf-8'))
+        f.close()
+
+        for enableFTS3 in (False, True):
+            db, _, _ = self._build(['CEDICT'], filePath=self.filePaths[0],
+                wordIndex=True, tonelessReading=True, enableFTS3=enableFTS3)
+            self.assert_((u'Zhong1 guo2', u'Zhong guo') in getReadings(db))
+
+            dbBuilder = DatabaseBuilder(dbConnectInst=db, quiet=True,
+                filePath=filePath)
+            dbBuilder.update(['CEDICT'])
+            otherDB, _, _ = self._build(['CEDICT'], filePath=filePath,
+                wordIndex=True, tonelessReading=True)
+            self.assertEquals(getReadings(db), getReadings(otherDB))
+
+
+
+class BulkLoadBuildTest(unittest.TestCase):
+    """
+    Tests bulk loading and optimization of SQLite databases in
+    :class:`~cjklib.build.DatabaseBuilder`.
+    """
+    TABLES = ['CjklibTestNumbers', 'CjklibTestSquares', 'PinyinSyllables']
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def _getBuilder(self, fileName, **options):
+        databaseFile = os.path.join(self.tempDir, fileName)
+        db = dbconnector.DatabaseConnector(
+            {'sqlalchemy.url': 'sqlite:///%s' % databaseFile})
+        return DatabaseBuilder(dbConnectInst=db, quiet=True,
+            dataPath=[util.getDataPath()], additionalBuilders=[
+                ParallelBuildTest.NumberBuilder,
+                ParallelBuildTest.SquareBuilder], **options)
+
+    def testBulkLoad(self):
+        """Test if bulk loading gives the same result and resets settings."""
+        dumps = []
+        for fileName, bulkLoad in (('plain.db', False), ('bulk.db', True)):
+            dbBuilder = self._getBuilder(fileName, bulkLoad=bulkLoad)
+            dbBuilder.build(self.TABLES)
+            self.assertEquals(dbBuilder.db.selectScalar(
+                text("PRAGMA main.journal_mode")).lower(), 'delete')
+            self.assertEquals(dbBuilder.db.selectScalar(
+                text("PRAGMA main.synchronous")), 2)
+            dbBuilder.db.connection.close()
+
+            connection = sqlite3.connect(os.path.join(self.tempDir, fileName))
+            dumps.append(list(connection.iterdump()))
+        self.assertEquals(dumps[0], dumps[1])
+
+    def testOptimizeInto(self):
+        """Test if the database is written to a compact read-only copy."""
+        dbBuilder = self._getBuilder('build.db')
+        dbBuilder.build(self.TABLES)
+
+        targetFile = os.path.join(self.tempDir, 'optimized.db')
+        dbBuilder.optimize(pageSize=8192, targetFile=targetFile)
+        dbBuilder.db.connection.close()
+        self.assertEquals(os.stat(targetFile).st_mode & 0777, 0444)
+
+        connection = sqlite3.connect(targetFile)
+        self.assertEquals(connection.execute("PRAGMA page_size").fetchone(),
+            (8192, ))
+        self.assert_(connection.execute(
+            "SELECT count(*) FROM sqlite_stat1").fetchone()[0] > 0)
+        self.assertEquals(connection.execute(
+            "SELECT count(*) FROM CjklibTestSquares").fetchone(), (500, ))
+
+
+
+class IncrementalBuildTest(unittest.TestCase):
+    """
+    Tests the incremental build of :class:`~cjklib.build.DatabaseBuilder`.
+    """
+    class WordBuilder(builder.EntryGeneratorBuilder):
+        PROVIDES = 'CjklibTestWords'
+        COLUMNS = ['Word']
+        COLUMN_TYPES = {'Word': String(10)}
+
+        def __init__(self, **options):
+            super(IncrementalBuildTest.WordBuilder, self).__init__(**options)
+            self.suffix = options.get('suffix', '')
+
+        @classmethod
+        def getDefaultOptions(cls):
+            options = super(IncrementalBuildTest.WordBuilder,
+                cls).getDefaultOptions()
+            options['suffix'] = ''
+            return options
+
+        def getSourceFiles(self):
+            return [self.findFile(['cjklib_test_words.txt'])]
+
+        def getGenerator(self):
+            IncrementalBuildTest.built.append(self.PROVIDES)
+            filePath, = self.getSourceFiles()
+            return iter([[line.strip() + self.suffix] for line
+                in open(filePath)])
+
+    class WordLengthBuilder(builder.EntryGeneratorBuilder):
+        PROVIDES = 'CjklibTestWordLengths'
+        DEPENDS = ['CjklibTestWords']
+        COLUMNS = ['Word', 'Length']
+        COLUMN_TYPES = {'Word': String(10), 'Length': Integer()}
+
+        def getGenerator(self):
+            IncrementalBuildTest.built.append(self.PROVIDES)
+            table = self.db.tables['CjklibTestWords']
+            return iter([[word, len(word)] for word
+                in self.db.selectScalars(select([table.c.Word]))])
+
+    TABLES = ['CjklibTestWords', 'CjklibTestWordLengths']
+
+    built = []
+    """Tables built by the test builders."""
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.sourceFile = os.path.join(self.tempDir, 'cjklib_test_words.txt')
+        self._writeSource('a\nbc\n')
+        self.db = dbconnector.DatabaseConnector({'sqlalchemy.url':
+            'sqlite:///%s' % os.path.join(self.tempDir, 'build.db')})
+
+    def tearDown(self):
+        self.db.connection.close()
+        shutil.rmtree(self.tempDir)
+
+    def _writeSource(self, content):
+        f = open(self.sourceFile, 'w')
+        f.write(content)
+        f.close()
+
+    def _build(self, tables, **options):
+        del self.built[:]
+        options.setdefault('rebuildExisting', False)
+        options.setdefault('incremental', True)
+        dbBuilder = DatabaseBuilder(dbConnectInst=self.db, quiet=True,
+            dataPath=[self.tempDir],
+            additionalBuilders=[self.WordBuilder, self.WordLengthBuilder],
+            **options)
+        dbBuilder.build(tables)
+        return dbBuilder, self.built[:]
+
+    def testSkipUnchanged(self):
+        """Test if unchanged tables are not rebuilt."""
+        _, built = self._build(self.TABLES)
+        self.assertEquals(built, self.TABLES)
+
+        _, built = self._build(self.TABLES)
+        self.assertEquals(built, [])
+
+        # only the content of source files counts
+        sourceStat = os.stat(self.sourceFile)
+        os.utime(self.sourceFile,
+            (sourceStat.st_atime, sourceStat.st_mtime + 10))
+        _, built = self._build(self.TABLES)
+        self.assertEquals(built, [])
+
+    def testRebuildChanged(self):
+        """Test if changed tables and their dependents are rebuilt."""
+        self._build(self.TABLES)
+
+        self._writeSource('a\nbc\ndef\n')
+        _, built = self._build(['CjklibTestWords'])
+        self.assertEquals(built, self.TABLES)
+        table = self.db.tables['CjklibTestWordLengths']
+        self.assertEquals(self.db.selectScalar(select([func.max(
+            table.c.Length)])), 3)
+
+        _, built = self._build(['CjklibTestWords'],
+            **{'--CjklibTestWords-suffix': 'x'})
+        self.assertEquals(built, self.TABLES)
+        _, built = self._build(self.TABLES,
+            **{'--CjklibTestWords-suffix': 'x'})
+        self.assertEquals(built, [])
+
+    def testRemove(self):
+        """Test if the manifest is removed with the last table."""
+        dbBuilder, _ = self._build(self.TABLES)
+        self.assert_(self.db.mainHasTable(DatabaseBuilder.MANIFEST_TABLE))
+
+        dbBuilder.remove(self.TABLES)
+        self.assertEquals(self.db.getTableNames(), set())
+
+    def testNonIncremental(self):
+        """Test if only incremental builds record tables in the manifest."""
+        self._build(self.TABLES, incremental=False)
+        self.assertEquals(self.db.getTableNames(), set(self.TABLES))
+
+        dbBuilder, _ = self._build(self.TABLES, rebuildExisting=True)
+        self.assert_(dbBuilder._getManifestFingerprint('CjklibTestWords'))
+
+        # a rebuild without a record is outdated in the next incremental build
+        dbBuilder, _ = self._build(['CjklibTestWords'], rebuildExisting=True,
+            incremental=False)
+        self.assertEquals(
+            dbBuilder._getManifestFingerprint('CjklibTestWords'), None)
+        self.assert_(dbBuilder.isOutdated('CjklibTestWords'))
+
+
+
 # Generate default test classes for TableBuilder without special definitions
 for builderClass in DatabaseBuilder.getTableBuilderClasses(
     resolveConflicts=False):
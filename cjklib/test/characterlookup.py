@@ -22,12 +22,14 @@ Unit tests for :mod:`cjklib.characterlookup`.
 # pylint: disable-msg=E1101
 #  testcase attributes and methods are only available in concrete classes
 
+import sys
 import re
 import unittest
 
 from cjklib.reading import ReadingFactory
 from cjklib import characterlookup
 from cjklib import exception
+from cjklib import util
 from cjklib.test import (NeedsDatabaseTest, attr, DatabaseConnectorMock,
     EngineMock)
 
@@ -92,6 +94,36 @@ class CharacterLookupMetaTest(CharacterLookupTest, unittest.TestCase):
             domain, dbConnectInst=mydb)
         self.db.metadata.remove(tableObj)
 
+    def testSnapshot(self):
+        """Test if the snapshot is reported and answers without queries."""
+        cjk = characterlookup.CharacterLookup('T', dbConnectInst=self.db,
+            snapshot=True)
+        self.assert_(cjk.snapshotSize > 0)
+        self.assert_(cjk.snapshotLoadTime >= 0)
+        self.assertEquals(self.characterLookup.snapshotSize, None)
+
+        # no size estimate before Python 2.6
+        getsizeof = sys.getsizeof
+        del sys.getsizeof
+        try:
+            self.assertEquals(characterlookup._getObjectSize({}), None)
+        finally:
+            sys.getsizeof = getsizeof
+
+        def lookup():
+            for char in u'中国漢字台':
+                try:
+                    cjk.getStrokeOrder(char)
+                except exception.NoInformationError:
+                    pass
+                cjk.getDecompositionEntries(char)
+
+        # warm up caches outside of the snapshot, e.g. stroke names
+        lookup()
+        executeCount = self.db.executeCount
+        lookup()
+        self.assertEquals(self.db.executeCount, executeCount)
+
     def testAvailableCharacterDomains(self):
         """Test if ``getAvailableCharacterDomains()`` returns proper domains."""
         # test default domain
@@ -152,6 +184,28 @@ class CharacterLookupCharacterDomainTest(CharacterLookupTest,
             for char in characterLookupDomain.getDomainCharacterIterator():
                 self.assert_(characterLookupDomain.isCharacterInDomain(char))
 
+    def testCharacterRangeSet(self):
+        """
+        Test if the range set of the Unicode domain includes exactly the
+        characters of its ranges.
+        """
+        ranges = self.characterLookup.HAN_SCRIPT_RANGES
+        rangeSet = util.CharacterRangeSet(ranges)
+        rangeChars = list(util.CharacterRangeIterator(ranges))
+        self.assertEquals(list(rangeSet), rangeChars)
+        self.assertEquals(len(rangeSet), len(rangeChars))
+
+        for rangeFrom, rangeTo in rangeSet.getRanges():
+            self.assert_(util.fromCodepoint(rangeFrom) in rangeSet)
+            self.assert_(util.fromCodepoint(rangeTo) in rangeSet)
+            self.assert_(util.fromCodepoint(rangeFrom - 1) not in rangeSet)
+            self.assert_(util.fromCodepoint(rangeTo + 1) not in rangeSet)
+        self.assert_(u'说说' not in rangeSet)
+        self.assert_(u'' not in rangeSet)
+
+        charSet = util.CharacterRangeSet.fromCharacters(rangeChars[::2])
+        self.assertEquals(list(charSet), rangeChars[::2])
+
     def testFilterIdentityOnSelf(self):
         """
         Test if filterDomainCharacters operates as identity on characters from
@@ -208,6 +262,83 @@ class CharacterLookupStrokeOrderTest(CharacterLookupTest, unittest.TestCase):
             except exception.NoInformationError:
                 continue
 
+    @attr('quiteslow')
+    def testStrokeOrderLookupMatchesDecomposition(self):
+        """
+        Tests if stroke orders from table ``StrokeOrderLookup`` match those
+        built from the character decomposition.
+        """
+        if not self.characterLookup.hasStrokeOrderLookup:
+            return
+        cjk = characterlookup.CharacterLookup('T', 'GlyphInformation',
+            dbConnectInst=self.db)
+        cjk.hasStrokeOrderLookup = False
+        for char in cjk.getDomainCharacterIterator():
+            for includePartial in (False, True):
+                try:
+                    strokeOrder = cjk.getStrokeOrderAbbrev(char,
+                        includePartial=includePartial)
+                except exception.NoInformationError:
+                    strokeOrder = None
+                try:
+                    lookupStrokeOrder \
+                        = self.characterLookup.getStrokeOrderAbbrev(char,
+                            includePartial=includePartial)
+                except exception.NoInformationError:
+                    lookupStrokeOrder = None
+                self.assertEquals(lookupStrokeOrder, strokeOrder,
+                    "Stroke order %r does not match %r" \
+                        % (lookupStrokeOrder, strokeOrder)
+                    + " for character '%s'" % char)
+
+
+class CharacterLookupComponentIndexTest(CharacterLookupTest,
+    unittest.TestCase):
+
+    COMPONENT_CONSTRUCTS = [
+        [[u'氵']],
+        [[u'口']],
+        [[u'木'], [u'口']],
+        [[u'米', u'木']],
+        [[u'⿕'], [u'氵', u'水']],
+        [[u'亻', u'人'], [u'口'], [u'一']],
+        [[u'\uffff']],
+        ]
+
+    def testComponentIndexMatchesDatabase(self):
+        """
+        Tests if lookups using the component index return the same
+        characters as the database lookup.
+        """
+        if not self.characterLookup.hasComponentLookup:
+            return
+        for locale, domain in [('T', 'Unicode'), ('C', 'GB2312')]:
+            cjk = characterlookup.CharacterLookup(locale, domain,
+                dbConnectInst=self.db)
+            indexCjk = characterlookup.CharacterLookup(locale, domain,
+                dbConnectInst=self.db, componentIndex=True)
+            for componentConstruct in self.COMPONENT_CONSTRUCTS:
+                for includeAllGlyphs in (False, True):
+                    result = cjk.getCharactersForEquivalentComponents(
+                        componentConstruct, includeAllGlyphs=includeAllGlyphs)
+                    indexResult = indexCjk.getCharactersForEquivalentComponents(
+                        componentConstruct, includeAllGlyphs=includeAllGlyphs)
+                    self.assertEquals(sorted(indexResult), sorted(result),
+                        "Component index result does not match for %r" \
+                            % componentConstruct)
+
+                    if cjk.hasStrokeCount:
+                        strokeCounts = []
+                        for char, glyph in indexResult:
+                            try:
+                                strokeCounts.append(
+                                    cjk.getStrokeCount(char, glyph))
+                            except exception.NoInformationError:
+                                strokeCounts.append(None)
+                        self.assertEquals(strokeCounts, sorted(strokeCounts),
+                            "Component index result not sorted for %r" \
+                                % componentConstruct)
+
 
 class CharacterLookupReadingMethodsTest(CharacterLookupTest, unittest.TestCase):
     """
@@ -312,19 +443,27 @@ class CharacterLookupReferenceTest(CharacterLookupTest):
         # add name of reading
         return clearName + ' (for %s)' % self.METHOD_NAME
 
-    def getCharacterLookupInst(self, options):
+    def getCharacterLookupInst(self, options, snapshot=False):
         if not hasattr(self, '_instanceDict'):
             self._instanceDict = {}
-        if options not in self._instanceDict:
-            self._instanceDict[options] = characterlookup.CharacterLookup(
-                dbConnectInst=self.db, *options)
+        if (options, snapshot) not in self._instanceDict:
+            self._instanceDict[(options, snapshot)] \
+                = characterlookup.CharacterLookup(dbConnectInst=self.db,
+                    snapshot=snapshot, *options)
 
-        return self._instanceDict[options]
+        return self._instanceDict[(options, snapshot)]
 
     def testMethodReferences(self):
         """Test if the given references are reached"""
+        self._testMethodReferences(snapshot=False)
+
+    def testMethodReferencesSnapshot(self):
+        """Test if the given references are reached using a snapshot"""
+        self._testMethodReferences(snapshot=True)
+
+    def _testMethodReferences(self, snapshot):
         for options, references in self.REFERENCE_LIST:
-            cjk = self.getCharacterLookupInst(options)
+            cjk = self.getCharacterLookupInst(options, snapshot)
             method = getattr(cjk, self.METHOD_NAME)
 
             for methodArgs, methodOptions, target in references:
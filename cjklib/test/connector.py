@@ -0,0 +1,413 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# This file is part of cjklib.
+#
+# cjklib is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# cjklib is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with cjklib.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Unit tests for :mod:`cjklib.dbconnector`.
+"""
+
+import sys
+import unittest
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import cPickle
+import marshal
+
+from sqlalchemy import Table, Column, Integer, Unicode, select, bindparam
+from sqlalchemy.sql import text, and_
+
+from cjklib import dbconnector
+
+class ConcurrencyTest(unittest.TestCase):
+    """Tests the concurrency modes of the database connector."""
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.urls = []
+        for name in ['main', 'other']:
+            filePath = os.path.join(self.tempDir, '%s.db' % name)
+            connection = sqlite3.connect(filePath)
+            connection.execute("CREATE TABLE %s (Value INTEGER)" % name)
+            connection.execute("INSERT INTO %s VALUES (1)" % name)
+            connection.commit()
+            connection.close()
+            self.urls.append('sqlite:///%s' % filePath)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def _getConnector(self, concurrency):
+        return dbconnector.DatabaseConnector({'sqlalchemy.url': self.urls[0],
+            'attach': self.urls[1:], 'concurrency': concurrency})
+
+    def _runThreads(self, db, release=False):
+        results = []
+        def query():
+            try:
+                table = db.tables['other']
+                results.append((id(db.connection.connection.connection),
+                    db.selectScalar(table.select())))
+            except Exception, e:
+                results.append(e)
+            if release:
+                db.releaseConnection()
+
+        threads = [threading.Thread(target=query) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+            # run one after another to have released connections reused
+            if release:
+                thread.join()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def testInvalidMode(self):
+        """Test that unknown modes and in-memory databases are refused."""
+        self.assertRaises(ValueError, self._getConnector, 'process')
+        self.assertRaises(ValueError, dbconnector.DatabaseConnector,
+            {'sqlalchemy.url': 'sqlite://', 'concurrency': 'thread'})
+
+    def testThread(self):
+        """Test that each thread gets an own connection."""
+        db = self._getConnector('thread')
+        results = self._runThreads(db)
+        self.assertEquals([value for _, value in results], [1, 1, 1])
+        self.assertEquals(len(set(connId for connId, _ in results)), 3)
+
+    def testPool(self):
+        """Test that released connections are reused by other threads."""
+        db = self._getConnector('pool')
+        results = self._runThreads(db, release=True)
+        self.assertEquals([value for _, value in results], [1, 1, 1])
+        self.assertEquals(len(set(connId for connId, _ in results)), 1)
+
+    def testLaterAttached(self):
+        """Test that connections catch up on later attached databases."""
+        db = dbconnector.DatabaseConnector({'sqlalchemy.url': self.urls[0],
+            'concurrency': 'thread'})
+        db.attachDatabase(self.urls[1])
+        results = self._runThreads(db)
+        self.assertEquals([value for _, value in results], [1, 1, 1])
+
+    def testFork(self):
+        """Test that a child process opens own connections."""
+        if not hasattr(os, 'fork'):
+            return
+
+        for concurrency in dbconnector.DatabaseConnector.CONCURRENCY_MODES:
+            db = self._getConnector(concurrency)
+            connId = id(db.connection.connection.connection)
+            readPipe, writePipe = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    value = db.selectScalar(text("SELECT Value FROM other"))
+                    newConnId = id(db.connection.connection.connection)
+                    os.write(writePipe, str(int(value == 1
+                        and newConnId != connId)))
+                finally:
+                    os._exit(0)
+            os.close(writePipe)
+            result = os.read(readPipe, 1)
+            os.close(readPipe)
+            os.waitpid(pid, 0)
+            self.assertEquals(result, '1')
+            # parent's connection is untouched
+            self.assertEquals(
+                db.selectScalar(text("SELECT Value FROM other")), 1)
+
+
+class StatementCacheTest(unittest.TestCase):
+    """Tests the statement cache of the database connector."""
+    def setUp(self):
+        self.db = dbconnector.DatabaseConnector({'sqlalchemy.url': 'sqlite://'})
+        self.table = Table('Entries', self.db.metadata,
+            Column('Headword', Unicode(255)), Column('Value', Integer))
+        self.table.create()
+        self.db.execute(self.table.insert(), [
+            {'Headword': u'\u4e2d', 'Value': 1},
+            {'Headword': u'\u56fd', 'Value': 2},
+            {'Headword': u'\u56fd', 'Value': 3}])
+
+    def testCompiledStatement(self):
+        """Test that statements are compiled once per key."""
+        table = self.table
+        def getStatement():
+            return select([table.c.Value],
+                table.c.Headword == bindparam('headword'))\
+                    .order_by(table.c.Value)
+
+        for headword, values in [(u'\u56fd', [2, 3]), (u'\u4e2d', [1])]:
+            statement = self.db.getCompiledStatement('test', getStatement)
+            self.assertEquals(
+                self.db.selectScalars(statement, headword=headword), values)
+        self.assertEquals(self.db.getStatementCacheInfo(),
+            {'hits': 1, 'misses': 1, 'size': 1})
+
+        self.db.clearStatementCache()
+        self.assertEquals(self.db.getStatementCacheInfo()['size'], 0)
+
+    def testStatementShape(self):
+        """Test that statements only differing in values share a compile."""
+        table = self.table
+        def query(headword, value, limit=None):
+            statement, params = self.db.compileStatement(
+                select([table.c.Value], and_(table.c.Headword == headword,
+                    table.c.Value >= value)).order_by(table.c.Value)\
+                        .limit(limit))
+            return self.db.selectScalars(statement, **params)
+
+        self.assertEquals(query(u'\u56fd', 3), [3])
+        self.assertEquals(query(u'\u56fd', 0), [2, 3])
+        self.assertEquals(query(u'\u4e2d', 0), [1])
+        self.assertEquals(self.db.getStatementCacheInfo(),
+            {'hits': 2, 'misses': 1, 'size': 1})
+
+        # values of limit and offset are bound
+        self.assertEquals(query(u'\u56fd', 0, limit=1), [2])
+        self.assertEquals(query(u'\u56fd', 0, limit=2), [2, 3])
+        statement, params = self.db.compileStatement(select([table.c.Value])\
+            .order_by(table.c.Value).limit(1).offset(2))
+        self.assertEquals(self.db.selectScalars(statement, **params), [3])
+        self.assertEquals(self.db.getStatementCacheInfo(),
+            {'hits': 3, 'misses': 3, 'size': 3})
+
+        # the number of values changes the shape
+        statement, params = self.db.compileStatement(select([table.c.Value],
+            table.c.Headword.in_([u'\u4e2d', u'\u56fd'])))
+        self.assertEquals(sorted(self.db.selectScalars(statement, **params)),
+            [1, 2, 3])
+        self.assertEquals(self.db.getStatementCacheInfo()['size'], 4)
+
+    def testCacheSize(self):
+        """Test that the statement cache keeps the most recent statements."""
+        db = dbconnector.DatabaseConnector({'sqlalchemy.url': 'sqlite://',
+            'statementCacheSize': 2})
+        table = self.table
+        for count in range(1, 5):
+            db.compileStatement(select([table.c.Value],
+                table.c.Headword.in_([u'\u4e2d'] * count)))
+        self.assertEquals(db.getStatementCacheInfo(),
+            {'hits': 0, 'misses': 4, 'size': 2})
+
+    def testThreads(self):
+        """Test that threads can share the statement cache."""
+        table = self.table
+        def getStatement():
+            return select([table.c.Value])
+
+        errors = []
+        def compileStatements():
+            try:
+                for _ in range(200):
+                    for key in range(12):
+                        self.db.getCompiledStatement(key, getStatement)
+            except Exception, e:
+                errors.append(e)
+
+        self.db = dbconnector.DatabaseConnector({'sqlalchemy.url': 'sqlite://',
+            'statementCacheSize': 10})
+        checkInterval = sys.getcheckinterval()
+        sys.setcheckinterval(1)
+        try:
+            threads = [threading.Thread(target=compileStatements)
+                for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setcheckinterval(checkInterval)
+
+        self.assertEquals(errors, [])
+        info = self.db.getStatementCacheInfo()
+        self.assertEquals(info['hits'] + info['misses'], 4 * 200 * 12)
+        self.assertEquals(info['size'], 10)
+
+
+class MetadataCacheTest(unittest.TestCase):
+    """Tests the file cache of reflected table definitions."""
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.urls = []
+        for name in ['main', 'other']:
+            filePath = os.path.join(self.tempDir, '%s.db' % name)
+            connection = sqlite3.connect(filePath)
+            connection.execute(("CREATE TABLE %s (Headword VARCHAR(10)"
+                " NOT NULL, Value INTEGER DEFAULT 0, PRIMARY KEY (Headword))")
+                % name)
+            connection.execute("CREATE VIEW %sView AS SELECT * FROM %s"
+                % (name, name))
+            connection.commit()
+            connection.close()
+            self.urls.append('sqlite:///%s' % filePath)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def _getConnector(self):
+        return dbconnector.DatabaseConnector({'sqlalchemy.url': self.urls[0],
+            'attach': self.urls[1:], 'metadataCache': 'True'})
+
+    def _noReflection(self, *args, **kwargs):
+        raise AssertionError("Table reflected")
+
+    def testCachedTables(self):
+        """Test that cached tables are set up without reflection."""
+        db = self._getConnector()
+        tables = ['main', 'other', 'mainView', 'otherView']
+        reflected = dict((name, db.tables[name]) for name in tables)
+        db.saveMetadataCache()
+        for name in ['main', 'other']:
+            cacheFile = os.path.join(self.tempDir, '%s.db.metadata' % name)
+            self.assert_(os.path.exists(cacheFile))
+
+        db = self._getConnector()
+        db.engine.reflecttable = self._noReflection
+        for name in tables:
+            table = db.tables[name]
+            self.assertEquals(table.schema, reflected[name].schema)
+            self.assertEquals(
+                [(c.name, c.type.__class__, c.primary_key, c.nullable)
+                    for c in table.c],
+                [(c.name, c.type.__class__, c.primary_key, c.nullable)
+                    for c in reflected[name].c])
+        self.assert_(db.hasTable('otherView'))
+        self.assert_(not db.hasTable('missing'))
+        self.assertRaises(KeyError, db.tables.__getitem__, 'missing')
+        self.assertEquals(db.selectScalar(
+            select([db.tables['other'].c.Value])), None)
+
+    def testSchemaChange(self):
+        """Test that the cache is dropped once the schema changes."""
+        db = self._getConnector()
+        db.tables['other']
+        db.saveMetadataCache()
+
+        otherDB = dbconnector.DatabaseConnector(self.urls[1])
+        otherDB.execute(text("ALTER TABLE other ADD COLUMN Extra INTEGER"))
+        otherDB.execute(text("CREATE TABLE added (Value INTEGER)"))
+
+        db = self._getConnector()
+        self.assert_('Extra' in db.tables['other'].c)
+        self.assert_(db.hasTable('added'))
+
+    def testUntrustedCache(self):
+        """Test that cache files are not unpickled and are validated."""
+        class Payload(object):
+            def __reduce__(self):
+                return (open, (markerFile, 'w'))
+
+        markerFile = os.path.join(self.tempDir, 'marker')
+        cacheFile = os.path.join(self.tempDir, 'main.db.metadata')
+        f = open(cacheFile, 'wb')
+        cPickle.dump(Payload(), f)
+        f.close()
+        db = self._getConnector()
+        self.assertEquals(db.tables['main'].c.Value.nullable, True)
+        db.saveMetadataCache()
+        self.assert_(not os.path.exists(markerFile))
+
+        # classes are only taken from SQLAlchemy
+        f = open(cacheFile, 'rb')
+        cache = marshal.load(f)
+        f.close()
+        definition = cache['tables']['main']
+        definition[0] = (definition[0][0], ('dialect', 'os', {}))\
+            + tuple(definition[0][2:])
+        f = open(cacheFile, 'wb')
+        marshal.dump(cache, f)
+        f.close()
+        db = self._getConnector()
+        db.engine.reflecttable = self._noReflection
+        self.assertRaises(AssertionError, db.tables.__getitem__, 'main')
+
+
+class ServingTest(unittest.TestCase):
+    """Tests the serving profiles for read-only databases."""
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.urls = []
+        for name in ['main', 'other']:
+            filePath = os.path.join(self.tempDir, '%s.db' % name)
+            connection = sqlite3.connect(filePath)
+            connection.execute("CREATE TABLE %s (Value INTEGER)" % name)
+            connection.execute("INSERT INTO %s VALUES (1)" % name)
+            connection.commit()
+            connection.close()
+            self.urls.append('sqlite:///%s' % filePath)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def _getConnector(self, serving, concurrency=None):
+        return dbconnector.DatabaseConnector({'sqlalchemy.url': self.urls[0],
+            'attach': self.urls[1:], 'serving': serving,
+            'concurrency': concurrency, 'mmapSize': '1048576'})
+
+    def testInvalidMode(self):
+        """Test that unknown modes and other engines are refused."""
+        self.assertRaises(ValueError, self._getConnector, 'readwrite')
+
+    def testMissingURISupport(self):
+        """Test that serving is refused if SQLite doesn't support URIs."""
+        hasURISupport = dbconnector._hasSQLiteURISupport
+        dbconnector._hasSQLiteURISupport = lambda dbapi: False
+        try:
+            for serving in dbconnector.DatabaseConnector.SERVING_MODES:
+                self.assertRaises(ValueError, self._getConnector, serving)
+        finally:
+            dbconnector._hasSQLiteURISupport = hasURISupport
+
+    def testReadOnly(self):
+        """Test that databases are opened read-only."""
+        if not dbconnector._hasSQLiteURISupport(sqlite3):
+            # SQLite can't open the databases read-only
+            return
+        for serving in dbconnector.DatabaseConnector.SERVING_MODES:
+            db = self._getConnector(serving)
+            for name in ['main', 'other']:
+                table = db.tables[name]
+                self.assertEquals(db.selectScalar(select([table.c.Value])), 1)
+                self.assertRaises(Exception, db.execute, table.insert(),
+                    Value=2)
+            self.assertEquals(db.selectScalar(text("PRAGMA query_only")), 1)
+            if serving == 'readonly':
+                self.assertEquals(
+                    db.selectScalar(text("PRAGMA main.mmap_size")), 1048576)
+
+    def testMemoryCopy(self):
+        """Test that databases are served from a copy in memory."""
+        if not dbconnector._hasSQLiteURISupport(sqlite3):
+            # SQLite can't open the databases read-only
+            return
+        db = self._getConnector('memory', 'thread')
+        for name in ['main', 'other']:
+            os.remove(os.path.join(self.tempDir, '%s.db' % name))
+
+        results = []
+        def query():
+            table = db.tables['other']
+            results.append(db.selectScalar(select([table.c.Value])))
+        threads = [threading.Thread(target=query) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEquals(results, [1, 1])
@@ -27,9 +27,12 @@ import os
 import new
 import unittest
 
+from sqlalchemy import select
+
 from cjklib.dictionary import (getAvailableDictionaries, getDictionaryClass,
     getDictionary)
 from cjklib.dictionary import search as searchstrategy
+from cjklib import dictionary
 from cjklib.build import DatabaseBuilder
 from cjklib import util
 from cjklib.test import NeedsTemporaryDatabaseTest, attr, EngineMock
@@ -93,6 +96,9 @@ class DictionaryResultTest(DictionaryTest):
     DICTIONARY_OPTIONS = {}
     """Options for the dictionary instance passed when constructing object."""
 
+    BUILDER_OPTIONS = {}
+    """Options for building the dictionary."""
+
     class _ContentGenerator(object):
         def getGenerator(self):
             for line in self.content:
@@ -111,7 +117,7 @@ class DictionaryResultTest(DictionaryTest):
 
         self.builder = DatabaseBuilder(quiet=True, dbConnectInst=self.db,
             additionalBuilders=[contentBuilder], prefer=["SimpleDictBuilder"],
-            rebuildExisting=True, noFail=False)
+            rebuildExisting=True, noFail=False, **self.BUILDER_OPTIONS)
         self.builder.build(self.DICTIONARY)
         assert self.db.mainHasTable(self.DICTIONARY)
 
@@ -152,6 +158,57 @@ class DictionaryResultTest(DictionaryTest):
                             % (resultPrettyPrint(targetResultIndices),
                                 resultPrettyPrint(resultIndices))))
 
+    def testLimit(self):
+        """Test if a limit on access methods ``getFor...`` is exact."""
+        for methodName, options, requests in self.ACCESS_RESULTS:
+            options = dict(options) or {}
+            method = getattr(self.dictionary, methodName)
+            for request, targetResultIndices in requests:
+                for limit in range(1, len(targetResultIndices) + 1):
+                    results = list(method(request, limit=limit, **options))
+                    self.assertEquals(len(results), limit,
+                        "Mismatch for method %s and string %s (limit %d)"
+                            % (repr(methodName), repr(request), limit))
+
+                # filters aren't kept registered by unfinished results
+                results = iter(method(request, **options))
+                if targetResultIndices:
+                    results.next()
+                self.assertEquals(dictionary._matchFunctions, {})
+
+    def testPages(self):
+        """Test if pages of access methods give all results."""
+        def getAllPages(methodName, request, **options):
+            entries, cursor = self.dictionary.getPage(methodName, request,
+                limit=2, **options)
+            while cursor:
+                page, cursor = self.dictionary.getPage(methodName, request,
+                    limit=2, cursor=cursor, **options)
+                entries.extend(page)
+            return entries
+
+        for methodName, options, requests in self.ACCESS_RESULTS:
+            options = dict(options) or {}
+            for request, targetResultIndices in requests:
+                entries = getAllPages(methodName, request, **options)
+                self.assertEquals(
+                    sorted(self.resultIndexMap[tuple(e)] for e in entries),
+                    sorted(targetResultIndices))
+
+        dictionaryTable = self.db.tables[self.DICTIONARY]
+        for orderBy in (None, ['Reading'], [('Reading', 'desc')],
+            [(dictionaryTable.c.Reading, 'desc'),
+                self.dictionary.COLUMNS[0]]):
+            entries = getAllPages('getAll', None, orderBy=orderBy)
+            self.assertEquals(entries,
+                list(self.dictionary.getAll(orderBy=(orderBy or [])
+                    + self.dictionary.COLUMNS)))
+
+        self.assertRaises(ValueError, self.dictionary.getPage, 'getAll',
+            cursor='invalid')
+        self.assertRaises(ValueError, self.dictionary.getPage, 'getAll',
+            orderBy=[('Reading', 'down')])
+
 
 class FullDictionaryTest(DictionaryTest):
     """Base class for testing a full database instance."""
@@ -266,6 +323,105 @@ class CEDICTDictionaryResultTest(DictionaryResultTest, unittest.TestCase):
         ]
 
 
+class CEDICTFullTextResultTest(CEDICTDictionaryResultTest):
+    """Test results using the full text index of translations."""
+    BUILDER_OPTIONS = {'translationIndex': True}
+
+    def testFullTextIndex(self):
+        """Test if the full text index is used and results are ranked."""
+        strategy = self.dictionary.translationSearchStrategy
+        self.assert_(strategy._getFullTextQuery(u'to guide') is not None)
+        self.assert_(strategy._getFullTextQuery(u'to_guide') is None)
+
+        results = self.dictionary.getForTranslation(u'to guide')
+        self.assertEquals([self.resultIndexMap[tuple(e)] for e in results],
+            [4, 5])
+
+        self.dictionary.db.execute(
+            "DELETE FROM CEDICT_Senses WHERE Translation = 'until'")
+        self.assertEquals(list(self.dictionary.getForTranslation(u'until')),
+            [])
+
+
+class CEDICTTonelessReadingResultTest(CEDICTDictionaryResultTest):
+    """Test results using the column of toneless readings."""
+    BUILDER_OPTIONS = {'tonelessReading': True}
+
+    INSTALL_CONTENT = CEDICTDictionaryResultTest.INSTALL_CONTENT + [
+        (u'卡拉OK', u'卡拉OK', u'ka3 la1 O K', u'/karaoke/'),
+        ]
+
+    ACCESS_RESULTS = CEDICTDictionaryResultTest.ACCESS_RESULTS + [
+        ('getForReading', (('toneMarkType', 'numbers'),),
+            [(u'ka la O K', [15])]),
+        ('getFor', (('toneMarkType', 'numbers'),), [(u'ka la%', [15])]),
+        ]
+
+    def testTonelessReadingIndex(self):
+        """Test if toneless searches use the index of toneless readings."""
+        dictionaryTable = self.db.tables[self.DICTIONARY]
+        strategy = self.dictionary.readingSearchStrategy
+        for request, targetResultIndices in [(u'zhidao', [0, 1, 2, 3, 4, 5]),
+            (u'zhi3dao', [4]), (u'zhi dao%', [0, 1, 2, 3, 4, 5, 6, 7]),
+            (u'zhi dao _', [7]), (u'zhi dao _ shou', [6])]:
+            whereClause = strategy.getWhereClause(dictionaryTable.c.Reading,
+                request, toneMarkType='numbers')
+            compiled = select([dictionaryTable.c.Reading],
+                whereClause).compile(dialect=self.db.engine.dialect)
+            plan = ' '.join(unicode(row[3]) for row in self.db.connection
+                .execute('EXPLAIN QUERY PLAN ' + unicode(compiled),
+                    [compiled.params[name] for name in compiled.positiontup]))
+            self.assert_('CEDICT__ReadingToneless' in plan,
+                "Index not used for %s: %s" % (repr(request), plan))
+
+            results = self.dictionary.getForReading(request,
+                toneMarkType='numbers')
+            self.assertEquals(
+                set(self.resultIndexMap[tuple(e)] for e in results),
+                set(targetResultIndices))
+
+
+class CEDICTUnionSearchResultTest(CEDICTDictionaryResultTest):
+    """Test results of searches combining indexed branches."""
+    BUILDER_OPTIONS = {'tonelessReading': True, 'translationIndex': True}
+
+    def testUnionSearch(self):
+        """Test if every branch of a search uses an index."""
+        dictionaryTable = self.db.tables[self.DICTIONARY]
+        headwordIndices = ['CEDICT__HeadwordSimplified',
+            'CEDICT__HeadwordTraditional']
+        for request, targetIndices, targetResultIndices in [
+            (u'zhidao', headwordIndices
+                + ['CEDICT__ReadingToneless', 'CEDICT_Senses'],
+                [0, 1, 2, 3, 4, 5]),
+            (u'zhi导', headwordIndices + ['CEDICT__Reading', 'CEDICT_Senses'],
+                [1, 4, 5]),
+            (u'指dao', headwordIndices + ['CEDICT_Senses'], [4]),
+            (u'個', headwordIndices, [8]),
+            ]:
+            clauses, _ = self.dictionary._getSearch(request,
+                toneMarkType='numbers')
+            compiled = select([dictionaryTable.c.HeadwordSimplified],
+                self.dictionary._getUnionClause(clauses)).compile(
+                    dialect=self.db.engine.dialect)
+            plan = [unicode(row[3]) for row in self.db.connection
+                .execute('EXPLAIN QUERY PLAN ' + unicode(compiled),
+                    [compiled.params[name] for name in compiled.positiontup])]
+
+            self.assert_('COMPOUND QUERY' in plan,
+                "No union used for %s: %s" % (repr(request), plan))
+            self.assert_(not [line for line in plan
+                    if re.match(r'SCAN main\.CEDICT\b', line)],
+                "Table scanned for %s: %s" % (repr(request), plan))
+            usedIndices = set(re.findall(r'\b(CEDICT_\w+)', ' '.join(plan)))
+            self.assertEquals(usedIndices, set(targetIndices))
+
+            results = self.dictionary.getFor(request, toneMarkType='numbers')
+            self.assertEquals(
+                set(self.resultIndexMap[tuple(e)] for e in results),
+                set(targetResultIndices))
+
+
 class CEDICTGRMetaTest(DictionaryMetaTest, unittest.TestCase):
     DICTIONARY = 'CEDICTGR'
 
@@ -318,6 +474,16 @@ class HanDeDictDictionaryResultTest(DictionaryResultTest, unittest.TestCase):
         ]
 
 
+class HanDeDictTonelessReadingResultTest(HanDeDictDictionaryResultTest):
+    """Test results using the column of toneless readings."""
+    BUILDER_OPTIONS = {'tonelessReading': True}
+
+
+class HanDeDictFullTextResultTest(HanDeDictDictionaryResultTest):
+    """Test results using the full text index of translations."""
+    BUILDER_OPTIONS = {'translationIndex': True}
+
+
 class CFDICTMetaTest(DictionaryMetaTest, unittest.TestCase):
     DICTIONARY = 'CFDICT'
 
@@ -449,3 +615,22 @@ class WildcardParameterTest(ParameterTest, unittest.TestCase):
         'translationSearchStrategy': searchstrategy.SimpleWildcardTranslation(
             singleCharacter='?', multipleCharacters='*'),
         }
+
+
+class FullTextEscapeParameterTest(EscapeParameterTest):
+    """Test if non-standard escape will yield proper results."""
+    BUILDER_OPTIONS = {'translationIndex': True}
+
+
+class FullTextCaseInsensitiveParameterTest(CaseInsensitiveParameterTest):
+    """
+    Test if non-default setting of caseInsensitive will yield proper results.
+    """
+    BUILDER_OPTIONS = {'translationIndex': True}
+
+
+class FullTextWildcardParameterTest(WildcardParameterTest):
+    """
+    Test if non-default settings of wildcards will yield proper results.
+    """
+    BUILDER_OPTIONS = {'translationIndex': True}
@@ -35,7 +35,7 @@ from cjklib.reading import ReadingFactory, converter, operator
 from cjklib import exception
 from cjklib.test import NeedsDatabaseTest, attr
 
-from cjklib.util import titlecase, istitlecase
+from cjklib.util import titlecase, istitlecase, LRUDict
 
 class ReadingConverterTest(NeedsDatabaseTest):
     """
@@ -381,6 +381,38 @@ class ReadingConverterTestCaseCheck(NeedsDatabaseTest, unittest.TestCase):
         return testClasses
 
 
+class LRUDictTest(unittest.TestCase):
+    """Tests :class:`~cjklib.util.LRUDict`."""
+    def testEviction(self):
+        """Test if the least recently used entry is discarded."""
+        cache = LRUDict(2)
+        cache['a'] = 1
+        cache['b'] = 2
+        cache['a']
+        cache['c'] = 3
+        self.assertEquals(sorted(cache.items()), [('a', 1), ('c', 3)])
+
+        self.assertEquals(cache.pop('a'), 1)
+        self.assertEquals(cache.pop('a', None), None)
+        cache['d'] = 4
+        cache['e'] = 5
+        self.assertEquals(sorted(cache.items()), [('d', 4), ('e', 5)])
+
+        self.assertEquals(cache.popitem(), ('d', 4))
+        self.assertEquals(cache.setdefault('f', 6), 6)
+        self.assertEquals(cache.setdefault('f', 7), 6)
+        cache['g'] = 7
+        self.assertEquals(sorted(cache.items()), [('f', 6), ('g', 7)])
+
+        cache.update({'h': 8}, i=9)
+        cache.update([('j', 10)])
+        self.assertEquals(len(cache), 2)
+        self.assert_('j' in cache)
+
+        cache.clear()
+        self.assertRaises(KeyError, cache.popitem)
+
+
 class ReadingConverterReferenceTest(ReadingConverterTest):
     """
     Base class for testing of references against
@@ -412,6 +444,58 @@ class ReadingConverterReferenceTest(ReadingConverterTest):
                         + ' (conversion %s to %s, options %s)' \
                             % (self.fromReading, self.toReading, options))
 
+    def testConvertManyReferences(self):
+        """
+        Test if ``convertMany()`` reaches the given conversion references in
+        input order, also for repeated input.
+        """
+        for options, references in self.CONVERSION_REFERENCES:
+            # repeat input to make use of the cache
+            readingStrings = [reference for reference, _ in references] * 2
+            targets = [target for _, target in references] * 2
+
+            results = self.f.convertMany(readingStrings, self.fromReading,
+                self.toReading, captureErrors=True, **options)
+            for reference, target, result in zip(readingStrings, targets,
+                results):
+                if type(target) in [types.TypeType, types.ClassType] \
+                    and issubclass(target, Exception):
+                    self.assert_(isinstance(result, target),
+                        "Exception %s for %s not captured: %s" \
+                            % (repr(target), repr(reference), repr(result)) \
+                        + ' (conversion %s to %s, options %s)' \
+                            % (self.fromReading, self.toReading, options))
+                else:
+                    self.assertEquals(result, target,
+                        "Conversion for %s to %s failed: %s" \
+                            % (repr(reference), repr(target), repr(result)) \
+                        + ' (conversion %s to %s, options %s)' \
+                            % (self.fromReading, self.toReading, options))
+
+    def testNoQueriesAfterWarmUp(self):
+        """
+        Test if converting the given conversion references a second time
+        issues no further database queries.
+        """
+        def convertReferences():
+            for options, references in self.CONVERSION_REFERENCES:
+                for reference, _ in references:
+                    try:
+                        self.f.convert(reference, self.fromReading,
+                            self.toReading, **options)
+                    except (exception.ConversionError,
+                        exception.DecompositionError,
+                        exception.CompositionError):
+                        pass
+
+        convertReferences()
+        executeCount = self.db.executeCount
+        convertReferences()
+        self.assertEquals(self.db.executeCount, executeCount,
+            "%d queries issued after warm-up" \
+                % (self.db.executeCount - executeCount) \
+            + ' (conversion %s to %s)' % (self.fromReading, self.toReading))
+
 
 class CantoneseYaleDialectConsistencyTest(ReadingConverterConsistencyTest,
     unittest.TestCase):
@@ -1538,6 +1622,74 @@ class BrailleWadeGilesConsistencyTest(ReadingConverterConsistencyTest,
         #]
 
 
+class BridgeConverterCompiledTest(NeedsDatabaseTest, unittest.TestCase):
+    """
+    Tests the composed conversion tables of
+    :class:`~cjklib.reading.converter.BridgeConverter`.
+    """
+    PINYIN_SAMPLES = [u'nǐ hǎo', u'zhōngguórén', u'Xiàndài Hànyǔ',
+        u'háo, háo', u'yīdiǎnr', u'Tā shì lǎoshī.', u'hànzì - Hanzi']
+
+    def setUp(self):
+        NeedsDatabaseTest.setUp(self)
+        self.f = ReadingFactory(dbConnectInst=self.db)
+        self.compiledConverter = converter.BridgeConverter(
+            dbConnectInst=self.db)
+        self.twoStageConverter = converter.BridgeConverter(
+            dbConnectInst=self.db, compiledBridge=False)
+
+    def tearDown(self):
+        self.f.clearCache()
+
+    def convert(self, converterInst, entities, fromReading, toReading):
+        try:
+            return converterInst.convertEntities(entities, fromReading,
+                toReading)
+        except Exception, e:
+            # both ways should fail alike
+            return type(e)
+
+    def testCompiledMatchesTwoStage(self):
+        """
+        Test if conversion with composed tables yields the same result as the
+        two-stage conversion.
+        """
+        for fromReading, _, toReading \
+            in converter.BridgeConverter.CONVERSION_BRIDGE:
+            for sample in self.PINYIN_SAMPLES:
+                try:
+                    readingString = self.f.convert(sample, 'Pinyin',
+                        fromReading)
+                except (exception.ConversionError,
+                    exception.CompositionError):
+                    continue
+                entities = self.f.decompose(readingString, fromReading)
+                # convert twice, second time from the filled table
+                for entityList in [entities] + [[e] for e in entities] * 2:
+                    compiled = self.convert(self.compiledConverter,
+                        entityList, fromReading, toReading)
+                    twoStage = self.convert(self.twoStageConverter,
+                        entityList, fromReading, toReading)
+                    self.assertEquals(compiled, twoStage,
+                        "Composed conversion of %s differs: %s, %s" \
+                            % (repr(entityList), repr(compiled),
+                                repr(twoStage)) \
+                        + ' (conversion %s to %s)' % (fromReading, toReading))
+
+    def testContextSensitiveStepNotCompiled(self):
+        """
+        Test if bridges including a context-sensitive step are not compiled.
+        """
+        for fromReading, bridgeReading, toReading \
+            in converter.BridgeConverter.CONVERSION_BRIDGE:
+            compilable = self.compiledConverter._isCompilableBridge(
+                fromReading, toReading)
+            contextSensitive = converter.BridgeConverter\
+                .CONTEXT_SENSITIVE_STEPS.intersection(
+                    [(fromReading, bridgeReading), (bridgeReading, toReading)])
+            self.assertEquals(compilable, not contextSensitive)
+
+
 class ShanghaineseIPADialectConsistencyTest(ReadingConverterConsistencyTest,
     unittest.TestCase):
     CONVERSION_DIRECTION = ('ShanghaineseIPA', 'ShanghaineseIPA')
@@ -618,6 +618,36 @@ class ReadingOperatorReferenceTest(ReadingOperatorTest):
                             + ' (reading %s, dialect %s)' \
                                 % (self.READING_NAME, dialect))
 
+    def testSegmentationEngineReferences(self):
+        """
+        Test if lattice and recursive segmentation return the same
+        decomposition tree for the given decomposition references.
+        """
+        if not hasattr(self.readingOperatorClass, 'getDecompositionTree'):
+            return
+
+        for dialect, references in self.DECOMPOSITION_REFERENCES:
+            latticeOperator = self.f.createReadingOperator(self.READING_NAME,
+                segmentationEngine='lattice', **dialect)
+            recursiveOperator = self.f.createReadingOperator(
+                self.READING_NAME, segmentationEngine='recursive', **dialect)
+            for reference, _ in references:
+                try:
+                    recursiveTree = recursiveOperator.getDecompositionTree(
+                        reference)
+                except exception.DecompositionError:
+                    self.assertRaises(exception.DecompositionError,
+                        latticeOperator.getDecompositionTree, reference)
+                    continue
+
+                latticeTree = latticeOperator.getDecompositionTree(reference)
+                self.assertEquals(latticeTree, recursiveTree,
+                    "Lattice segmentation %s of %s differs from recursive: %s" \
+                        % (repr(latticeTree), repr(reference),
+                            repr(recursiveTree)) \
+                    + ' (reading %s, dialect %s)' \
+                        % (self.READING_NAME, dialect))
+
     def testCompositionReferences(self):
         """Test if the given composition references are reached."""
         for dialect, references in self.COMPOSITION_REFERENCES:
@@ -25,6 +25,7 @@ Utilities.
 import sys
 import re
 import copy
+import bisect
 import os.path
 import platform
 import ConfigParser
@@ -405,6 +406,98 @@ class CharacterRangeIterator(object):
             self._curRange = self._popRange()
         return fromCodepoint(curIndex)
 
+class CharacterRangeSet(object):
+    """
+    Provides a set of characters stored as sorted codepoint ranges.
+    Membership is checked by bisection over the ranges.
+
+    .. versionadded:: 0.3.1
+    """
+    def __init__(self, ranges=None):
+        """
+        :type ranges: list
+        :param ranges: codepoint ranges given in hex, either as single
+            codepoint or as tuple of first and last codepoint, see
+            :class:`~cjklib.util.CharacterRangeIterator`
+        """
+        codepointRanges = []
+        for charRange in (ranges or []):
+            if type(charRange) == type(()):
+                rangeFrom, rangeTo = charRange
+            else:
+                rangeFrom, rangeTo = (charRange, charRange)
+            codepointRanges.append((int(rangeFrom, 16), int(rangeTo, 16)))
+        self._setRanges(codepointRanges)
+
+    @classmethod
+    def fromCharacters(cls, chars):
+        """
+        Creates a set from the given characters, joining consecutive
+        codepoints into ranges.
+
+        :type chars: iterable of str
+        :param chars: characters
+        :rtype: instance
+        :return: a :class:`~cjklib.util.CharacterRangeSet` instance
+        """
+        rangeSet = cls()
+        rangeSet._setRanges([(toCodepoint(char), toCodepoint(char))
+            for char in chars])
+        return rangeSet
+
+    def _setRanges(self, codepointRanges):
+        """
+        Sorts the given codepoint ranges and merges overlapping and adjacent
+        ones.
+        """
+        self._starts = []
+        self._ends = []
+        for rangeFrom, rangeTo in sorted(codepointRanges):
+            if self._ends and rangeFrom <= self._ends[-1] + 1:
+                self._ends[-1] = max(self._ends[-1], rangeTo)
+            else:
+                self._starts.append(rangeFrom)
+                self._ends.append(rangeTo)
+
+    def containsCodepoint(self, codepoint):
+        """
+        Checks if the given codepoint is included in the set.
+
+        :type codepoint: int
+        :param codepoint: Unicode codepoint
+        :rtype: bool
+        :return: ``True`` if the codepoint is included, ``False`` otherwise
+        """
+        idx = bisect.bisect_right(self._starts, codepoint) - 1
+        return idx >= 0 and codepoint <= self._ends[idx]
+
+    def __contains__(self, char):
+        try:
+            codepoint = toCodepoint(char)
+        except (ValueError, TypeError):
+            # not a single character
+            return False
+        return self.containsCodepoint(codepoint)
+
+    def __iter__(self):
+        for rangeFrom, rangeTo in zip(self._starts, self._ends):
+            for codepoint in xrange(rangeFrom, rangeTo + 1):
+                yield fromCodepoint(codepoint)
+
+    def __len__(self):
+        return sum(rangeTo - rangeFrom + 1 for rangeFrom, rangeTo
+            in zip(self._starts, self._ends))
+
+    def getRanges(self):
+        """
+        Gets the codepoint ranges of this set.
+
+        :rtype: list of tuple
+        :return: sorted list of disjoint codepoint ranges as tuples of first
+            and last codepoint
+        """
+        return zip(self._starts, self._ends)
+
 #{ Library extensions
 
 class UnicodeCSVFileIterator(object):
@@ -745,6 +838,85 @@ else:
                 self[key] = value = self.creator(key)
                 return value
 
+class LRUDict(dict):
+    """
+    A dict holding a limited number of entries. If full, the least recently
+    used entry is discarded on adding a new one.
+    """
+    def __init__(self, maxSize):
+        dict.__init__(self)
+        self.maxSize = maxSize
+        # doubly linked list of keys in order of use, oldest first
+        self._end = end = []
+        end += [None, end, end]
+        self._links = {}
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        self._unlink(key)
+        self._append(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key in self:
+            self._unlink(key)
+        elif len(self) >= self.maxSize:
+            oldestKey = self._end[2][0]
+            self._unlink(oldestKey)
+            dict.__delitem__(self, oldestKey)
+        self._append(key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._unlink(key)
+
+    def clear(self):
+        dict.clear(self)
+        self._end[1:] = [self._end, self._end]
+        self._links.clear()
+
+    def pop(self, key, *default):
+        if key in self:
+            self._unlink(key)
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        """Removes and returns the least recently used entry."""
+        if not self:
+            raise KeyError('popitem(): dictionary is empty')
+        key = self._end[2][0]
+        return key, self.pop(key)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        if len(args) > 1:
+            raise TypeError('expected at most 1 argument, got %d' % len(args))
+        if args:
+            other = args[0]
+            if hasattr(other, 'keys'):
+                for key in other.keys():
+                    self[key] = other[key]
+            else:
+                for key, value in other:
+                    self[key] = value
+        for key, value in kwargs.items():
+            self[key] = value
+
+    def _append(self, key):
+        end = self._end
+        last = end[1]
+        last[2] = end[1] = self._links[key] = [key, last, end]
+
+    def _unlink(self, key):
+        _, prev, next = self._links.pop(key)
+        prev[2] = next
+        next[1] = prev
+
 if sys.version_info >= (2, 6):
     from collections import MutableMapping
 